@@ -0,0 +1,279 @@
+"""
+Admission control for the chat request path.
+
+Every request to /get holds a worker for at least two seconds, so one user
+holding down Enter, or a script, could otherwise occupy all of them. Two
+kinds of limit keep requests from piling up:
+
+    RateLimiter        a token bucket for each user, or address when nobody
+                       is logged in. ``init_app`` rejects requests from a
+                       user whose bucket is empty with a 429 before any work
+                       is done
+    ConcurrencyLimit   the number of requests in an expensive stage at once,
+                       searching the knowledge base or fetching timetables.
+                       Requests wait up to a deadline for a turn and are
+                       then rejected with a 503, or are turned away by
+                       ``check`` before doing any work when no turn is free
+
+Both count what they admit and reject, and ``render_admission_metrics``
+formats the counts and the time spent waiting for a turn as Prometheus
+metrics.
+"""
+import math
+import time
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from tracing import Histogram
+
+
+class Rejected(Exception):
+    """
+    Raised when a request is not admitted.
+
+    :param reason: The name of the limit that rejected the request.
+
+    :param status: The HTTP status of the response.
+
+    :param retry_after: Whole seconds after which the request may be admitted.
+    """
+
+    def __init__(self, reason, status, retry_after):
+        super().__init__(reason)
+        self.reason = reason
+        self.status = status
+        self.retry_after = retry_after
+
+
+class RateLimiter(object):
+    """
+    A token bucket for each key, holding at most ``burst`` tokens and refilled
+    with ``rate`` tokens a second. Each admitted request takes a token.
+
+    The buckets of at most ``maximum_keys`` keys are kept, the least recently
+    used one is dropped first. A dropped bucket starts full again, as it
+    would have refilled while its key was idle.
+
+    :param rate: Tokens added to each bucket a second. A rate of 0 admits every request.
+
+    :param clock: The function giving the current time in seconds.
+        Defaults to ``time.monotonic``.
+    """
+
+    def __init__(self, rate, burst, maximum_keys=10000, clock=time.monotonic):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.maximum_keys = maximum_keys
+        self.clock = clock
+
+        # The tokens of each key and when they were counted
+        self.buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.admitted = 0
+        self.rejected = 0
+
+    def __len__(self):
+        return len(self.buckets)
+
+    def acquire(self, key):
+        """
+        Take a token from the key's bucket, raising ``Rejected`` when it is empty.
+        """
+        if not self.rate:
+            return
+
+        now = self.clock()
+
+        with self._lock:
+            tokens, updated_at = self.buckets.pop(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated_at) * self.rate)
+
+            if tokens < 1:
+                self.buckets[key] = (tokens, now)
+                self.rejected += 1
+                raise Rejected('rate_limit', 429, math.ceil((1 - tokens) / self.rate))
+
+            self.buckets[key] = (tokens - 1, now)
+            self.admitted += 1
+
+            while len(self.buckets) > self.maximum_keys:
+                self.buckets.popitem(last=False)
+
+
+class ConcurrencyLimit(object):
+    """
+    Lets at most ``limit`` requests into a stage at once. Others wait in
+    turn for up to ``timeout`` seconds and are then rejected, a timeout of 0
+    rejects them straight away.
+
+    :param name: The name the limit's metrics and rejections are labelled with.
+
+    :param limit: The number of requests let in at once. A limit of 0 lets in every request.
+    """
+
+    def __init__(self, name, limit, timeout, clock=time.monotonic):
+        self.name = name
+        self.limit = limit
+        self.timeout = timeout
+        self.clock = clock
+
+        self._semaphore = threading.BoundedSemaphore(limit) if limit else None
+        self._lock = threading.Lock()
+
+        self.in_flight = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.wait_histogram = Histogram()
+
+    def acquire(self):
+        """
+        Wait for a turn, raising ``Rejected`` when none comes before the timeout.
+        """
+        if self._semaphore is None:
+            return
+
+        # Most requests get a turn without waiting, and without being counted as waiting
+        if not self._semaphore.acquire(blocking=False):
+            start = self.clock()
+
+            with self._lock:
+                self.waiting += 1
+            try:
+                acquired = self.timeout > 0 and self._semaphore.acquire(timeout=self.timeout)
+            finally:
+                with self._lock:
+                    self.waiting -= 1
+
+            self.wait_histogram.observe(self.clock() - start)
+
+            if not acquired:
+                with self._lock:
+                    self.rejected += 1
+                raise Rejected(self.name, 503, max(1, math.ceil(self.timeout)))
+        else:
+            self.wait_histogram.observe(0)
+
+        with self._lock:
+            self.in_flight += 1
+            self.admitted += 1
+
+    def check(self):
+        """
+        Raise ``Rejected`` straight away when every turn is taken, without
+        taking one. Lets a request be turned away before it does any work
+        ahead of the stage.
+        """
+        if self._semaphore is None:
+            return
+
+        with self._lock:
+            if self.in_flight < self.limit:
+                return
+            self.rejected += 1
+
+        raise Rejected(self.name, 503, max(1, math.ceil(self.timeout)))
+
+    def release(self):
+        if self._semaphore is None:
+            return
+
+        with self._lock:
+            self.in_flight -= 1
+        self._semaphore.release()
+
+    @contextmanager
+    def slot(self):
+        """
+            Holds a turn for the code in a with block
+        """
+        self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+
+def render_admission_metrics(rate_limiter, *limits):
+    """
+        Formats the counts of the rate limiter and concurrency limits as
+        lines of Prometheus metrics
+    """
+    lines = [
+        '# HELP dcubuddy_admission_admitted_total Requests admitted by each limit',
+        '# TYPE dcubuddy_admission_admitted_total counter',
+        'dcubuddy_admission_admitted_total{{limit="rate_limit"}} {}'.format(rate_limiter.admitted),
+    ]
+    lines.extend(
+        'dcubuddy_admission_admitted_total{{limit="{}"}} {}'.format(limit.name, limit.admitted)
+        for limit in limits
+    )
+
+    lines.extend([
+        '# HELP dcubuddy_admission_rejected_total Requests rejected by each limit',
+        '# TYPE dcubuddy_admission_rejected_total counter',
+        'dcubuddy_admission_rejected_total{{limit="rate_limit"}} {}'.format(rate_limiter.rejected),
+    ])
+    lines.extend(
+        'dcubuddy_admission_rejected_total{{limit="{}"}} {}'.format(limit.name, limit.rejected)
+        for limit in limits
+    )
+
+    for metric, description, attribute in (
+        ('dcubuddy_admission_in_flight', 'Requests holding a turn', 'in_flight'),
+        ('dcubuddy_admission_waiting', 'Requests waiting for a turn', 'waiting'),
+    ):
+        lines.append('# HELP {} {}'.format(metric, description))
+        lines.append('# TYPE {} gauge'.format(metric))
+        for limit in limits:
+            lines.append('{}{{limit="{}"}} {}'.format(metric, limit.name, getattr(limit, attribute)))
+
+    lines.extend([
+        '# HELP dcubuddy_admission_queue_wait_seconds Time requests waited for a turn',
+        '# TYPE dcubuddy_admission_queue_wait_seconds histogram',
+    ])
+    for limit in limits:
+        histogram = limit.wait_histogram
+        counts, count, total = histogram.snapshot()
+        for bound, bucket_count in zip(histogram.buckets, counts):
+            lines.append('dcubuddy_admission_queue_wait_seconds_bucket{{limit="{}",le="{}"}} {}'.format(
+                limit.name, bound, bucket_count
+            ))
+        lines.append('dcubuddy_admission_queue_wait_seconds_bucket{{limit="{}",le="+Inf"}} {}'.format(
+            limit.name, count
+        ))
+        lines.append('dcubuddy_admission_queue_wait_seconds_sum{{limit="{}"}} {}'.format(limit.name, total))
+        lines.append('dcubuddy_admission_queue_wait_seconds_count{{limit="{}"}} {}'.format(limit.name, count))
+
+    return lines
+
+
+REJECTION_MESSAGES = {
+    429: "You're sending messages too quickly, please wait a moment and try again.",
+    503: "I'm a bit busy right now, please try again in a moment.",
+}
+
+
+def init_app(app, rate_limiter, routes=('/get',)):
+    """
+        Rate limits requests to the routes of a Flask app by user, and
+        answers requests rejected anywhere in the app with a short message
+    """
+    from flask import request
+    from flask_login import current_user
+
+    routes = frozenset(routes)
+
+    @app.errorhandler(Rejected)
+    def reject(error):
+        return REJECTION_MESSAGES[error.status], error.status, {'Retry-After': str(error.retry_after)}
+
+    if not rate_limiter.rate:
+        return
+
+    @app.before_request
+    def limit_rate():
+        if request.path in routes:
+            user_id = current_user.get_id()
+            rate_limiter.acquire('user:' + user_id if user_id else 'address:' + str(request.remote_addr))
@@ -13,21 +13,69 @@ from sqlalchemy.orm import validates
 from werkzeug.security import generate_password_hash, check_password_hash
 from flask_login import LoginManager, UserMixin, login_user, login_required, logout_user, current_user
 import datetime
+from concurrent.futures import ThreadPoolExecutor
 from models import *
 from timetable import *
+from timetable_intent import match_timetable_intent, resolve_weekday, get_timetable_response
 import time
+import logging
 from resources import valid_courses
-
+import structured_logging
+import tracing
+import profiling
+import settings
+from response_cache import ResponseCache, normalize_input, get_knowledge_base_version, render_cache_metrics
+from conversation_state import ConversationStateStore
+import admission_control
+
+# Days are resolved to weekday numbers when the request is made
 timetable_prompts = {
-    "Here is your timetable for today :)": datetime.datetime.now().isoweekday() % 6,
-    "Here is your timetable for tomorrow :)": (datetime.datetime.now().isoweekday() % 6) + 1,
-    "Here is your timetable for monday :)": 1,
-    "Here is your timetable for tuesday :)": 2,
-    "Here is your timetable for wednesday :)": 3,
-    "Here is your timetable for thursday :)": 4,
-    "Here is your timetable for friday :)": 5
+    "Here is your timetable for today :)": 'today',
+    "Here is your timetable for tomorrow :)": 'tomorrow',
+    "Here is your timetable for monday :)": 'monday',
+    "Here is your timetable for tuesday :)": 'tuesday',
+    "Here is your timetable for wednesday :)": 'wednesday',
+    "Here is your timetable for thursday :)": 'thursday',
+    "Here is your timetable for friday :)": 'friday'
+}
+
+# Fetches timetables from opentimetable while the request carries on
+timetable_executor = ThreadPoolExecutor(max_workers=8)
+
+# Learns from inputs answered from a cache, one at a time so each conversation stays in order
+learning_executor = ThreadPoolExecutor(max_workers=1)
+
+logger = logging.getLogger(__name__)
+
+# Replies that are the same for every user, timetables and command results are never cached
+response_cache = ResponseCache(settings.RESPONSE_CACHE_SIZE)
+
+# Recent inputs that got the default response, so repeated junk is not searched again
+negative_cache = ResponseCache(settings.NEGATIVE_CACHE_SIZE, ttl=settings.NEGATIVE_CACHE_TTL, name='negative')
+default_responses = {
+    statement.text for adapter in chatbot.logic_adapters
+    for statement in getattr(adapter, 'default_responses', [])
 }
 
+# The last prompt each user was given, such as "Sure, what campus?"
+conversation_states = ConversationStateStore(
+    chatbot, settings.CONVERSATION_STATE_SIZE, ttl=settings.CONVERSATION_STATE_TTL
+)
+
+# Messages each user can send, and requests let into the search and the timetable fetches at once
+rate_limiter = admission_control.RateLimiter(settings.RATE_LIMIT, settings.RATE_LIMIT_BURST)
+nlp_limit = admission_control.ConcurrencyLimit('nlp', settings.NLP_CONCURRENCY, settings.ADMISSION_QUEUE_TIMEOUT)
+upstream_limit = admission_control.ConcurrencyLimit(
+    'upstream', settings.UPSTREAM_CONCURRENCY, settings.ADMISSION_QUEUE_TIMEOUT
+)
+
+structured_logging.init_app(app)
+tracing.init_app(app)
+tracing.register_metrics(lambda: render_cache_metrics(response_cache, negative_cache, conversation_states))
+tracing.register_metrics(lambda: admission_control.render_admission_metrics(rate_limiter, nlp_limit, upstream_limit))
+profiling.init_app(app)
+admission_control.init_app(app, rate_limiter)
+
 
 @app.route('/')
 def index():
@@ -77,27 +125,119 @@ def logout():
 
 @app.route("/get")
 def get_bot_response():
-    time.sleep(2)
     userText = request.args.get('msg').strip()
+    user_id = current_user.get_id()
+    knowledge_base_version = get_knowledge_base_version(chatbot)
+
+    # Timetable requests skip the chatbot and start fetching straight away
+    with tracing.span('timetable_intent'):
+        day = match_timetable_intent(userText)
+    if day:
+        profiling.set_category('timetable')
+        weekday = resolve_weekday(day)
+        pending_timetable = start_timetable_fetch(weekday)
+
+        # A prompt only applies to the message right after it, once that message is admitted
+        if user_id:
+            conversation_states.pop_prompt(user_id, knowledge_base_version)
+        with tracing.span('sleep'):
+            time.sleep(2)
+        return fetch_timetable(get_timetable_response(day), weekday, pending_timetable)
+
     text_split = userText.split()
     command = text_split[0]
-    if command in commands:
-        if len(text_split) == 3:
-            return commands[command](text_split[1], text_split[2])
-        elif len(text_split) == 2:
-            return commands[command](text_split[1])
-        else:
-            try:
-                return commands[command]()
-            except IndexError:
-                return "Sorry, too many arguments given to command."
 
+    cached_response = None
+    if command not in commands:
+        normalized_text = normalize_input(userText)
+
+        # Replies to a prompt depend on the prompt, so they are neither looked up nor cached
+        if not user_id or not conversation_states.has_prompt(user_id, knowledge_base_version):
+            with tracing.span('response_cache'):
+                cached_response = response_cache.get(normalized_text, knowledge_base_version)
+                if cached_response is None:
+                    cached_response = negative_cache.get(normalized_text, knowledge_base_version)
+
+        # Messages for the search are turned away before the sleep when it has no free turn,
+        # cached responses do not need one
+        if cached_response is None:
+            nlp_limit.check()
 
-    bot_response = str(chatbot.get_response(userText))
+    with tracing.span('sleep'):
+        time.sleep(2)
+    if command in commands:
+        profiling.set_category('command')
+        if user_id:
+            conversation_states.pop_prompt(user_id, knowledge_base_version)
+        with tracing.span('command'):
+            if len(text_split) == 3:
+                return commands[command](text_split[1], text_split[2])
+            elif len(text_split) == 2:
+                return commands[command](text_split[1])
+            else:
+                try:
+                    return commands[command]()
+                except IndexError:
+                    return "Sorry, too many arguments given to command."
+
+
+    profiling.set_category('chatbot')
+
+    if cached_response is not None:
+        if user_id:
+            conversation_states.set_prompt(user_id, cached_response, knowledge_base_version)
+        if not chatbot.read_only:
+            learning_executor.submit(
+                learn_cached_response, userText, cached_response, 'user:' + user_id if user_id else ''
+            )
+        return cached_response
+
+    with nlp_limit.slot():
+        # Only used up now, so a message turned away can be sent again as a reply to the prompt
+        prompt = conversation_states.pop_prompt(user_id, knowledge_base_version) if user_id else None
+
+        conversation = {}
+        if user_id:
+            conversation['conversation'] = 'user:' + user_id
+        if prompt is not None:
+            conversation['in_response_to'], conversation['search_in_response_to'] = prompt
+
+        with tracing.span('chatbot'):
+            bot_response = str(chatbot.get_response(userText, **conversation))
+    if user_id:
+        conversation_states.set_prompt(user_id, bot_response, knowledge_base_version)
     if bot_response in timetable_prompts:
-        return fetch_timetable(bot_response, timetable_prompts[bot_response])
+        return fetch_timetable(bot_response, resolve_weekday(timetable_prompts[bot_response]))
+    if prompt is None:
+        if bot_response in default_responses:
+            negative_cache.set(normalized_text, bot_response, knowledge_base_version)
+        else:
+            response_cache.set(normalized_text, bot_response, knowledge_base_version)
     return bot_response
 
+def learn_cached_response(text, response, conversation):
+    """
+        Saves an input answered from a cache and its response, as
+        chatbot.get_response saves the exchanges it answers
+    """
+    Statement = chatbot.storage.get_object('statement')
+
+    try:
+        input_statement = Statement(text=text, conversation=conversation)
+        for preprocessor in chatbot.preprocessors:
+            input_statement = preprocessor(input_statement)
+        input_statement.search_text = chatbot.storage.tagger.get_bigram_pair_string(input_statement.text)
+
+        chatbot.learn_response(input_statement)
+        chatbot.storage.create(**Statement(
+            text=response,
+            in_response_to=input_statement.text,
+            conversation=conversation,
+            persona='bot:' + chatbot.name
+        ).serialize())
+    except Exception:
+        logger.exception('Unable to learn the cached response to %r', text)
+
 def update_course(course):
     if course.upper() not in valid_courses.courses:
         return "Sorry that is not a valid course."
@@ -133,7 +273,7 @@ def delete_assignment(name):
         return "You have no assignments with this name"
     to_delete = db.session.query(AssignmentTrayItems).filter(AssignmentTrayItems.tray_id == assignment_tray.id, AssignmentTrayItems.assignment_name == name).first()
 
-    print(to_delete)
+    logger.debug('Deleting assignment %s from tray %s', name, assignment_tray.id)
     if not to_delete:
         return "You have no assignments with this name"
 
@@ -159,7 +299,10 @@ commands =  {"!addassignment": add_assignment,
     "!updatecourse": update_course
 }
 
-def fetch_timetable(response, weekday):
+def start_timetable_fetch(weekday):
+    """
+        Starts fetching the current user's timetable in the background
+    """
     course = current_user.coursecode.upper()
     week = 1
 
@@ -169,8 +312,23 @@ def fetch_timetable(response, weekday):
     # If user is asking for tomorrows timetable on a sunday
     if weekday == 8:
         weekday = 1
+
+    # The turn is held until the fetch is done, not until the request is
+    upstream_limit.acquire()
+    try:
+        pending_timetable = timetable_executor.submit(tracing.bind(get_timetable), course, weekday, week)
+    except Exception:
+        upstream_limit.release()
+        raise
+    pending_timetable.add_done_callback(lambda future: upstream_limit.release())
+    return pending_timetable
+
+def fetch_timetable(response, weekday, pending_timetable=None):
+    if pending_timetable is None:
+        pending_timetable = start_timetable_fetch(weekday)
     reply = response + "<br><br>"
-    timetable = get_timetable(course, weekday, week)
+    with tracing.span('timetable_wait'):
+        timetable = pending_timetable.result()
     if timetable == "":
         return "There are no classes on this day"
     reply += timetable
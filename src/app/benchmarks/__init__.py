@@ -0,0 +1,5 @@
+"""
+Standalone benchmarks for DCUBuddy. Run them from ``src/app``, for example::
+
+    python -m benchmarks.sqlite_concurrency
+"""
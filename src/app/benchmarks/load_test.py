@@ -0,0 +1,285 @@
+"""
+Replays a mix of DCUBuddy traffic against a running app with many simulated
+users and reports throughput and p50/p95/p99 latency for each kind of
+request.
+
+Each user signs up, logs in and then repeatedly picks one of these by weight:
+
+    login            POST /login
+    dcubuddy         GET  /dcubuddy
+    viewassignments  GET  /get?msg=!viewassignments
+    timetable        GET  /get?msg=timetable for <day>
+    question         GET  /get?msg=<a question from training_data/>
+
+Start the app against the local opentimetable stand-in so timetable
+requests are repeatable, with the rate limit off, then run from src/app:
+
+    python -m tools.fake_opentimetable --latency 0.3 &
+    DCUBUDDY_OPENTIMETABLE_URL=http://localhost:8001 DCUBUDDY_RATE_LIMIT=0 python app.py &
+    python -m benchmarks.load_test --url http://localhost:5000 --users 20 --duration 60 \\
+        --mix login=1,dcubuddy=2,viewassignments=3,timetable=4,question=10
+
+With the rate limit on, simulated users that did not manage to log in
+share the limit of the load test's address, so the run mostly measures how
+fast their requests are turned away. Requests answered with a 429 or 503 are
+counted on their own and left out of the latencies and throughput, and
+the run warns when any were rate limited.
+
+Results are compared with a stored baseline when one exists, and
+--save-baseline replaces it with this run's results.
+"""
+import io
+import os
+import re
+import json
+import time
+import uuid
+import random
+import argparse
+import threading
+import requests
+import yaml
+from chatterbot.corpus import list_corpus_files
+
+
+BASELINE_DIRECTORY = os.path.join(os.path.dirname(__file__), 'baselines')
+
+DEFAULT_MIX = 'login=1,dcubuddy=2,viewassignments=3,timetable=4,question=10'
+
+DAYS = ('today', 'tomorrow', 'monday', 'tuesday', 'wednesday', 'thursday', 'friday')
+
+CSRF_PATTERN = re.compile(r'name="csrf_token" type="hidden" value="([^"]+)"')
+
+# Statuses of requests that admission control turned away, rate limited and busy
+REJECTED_STATUSES = (429, 503)
+
+
+def parse_mix(mix):
+    weights = {}
+    for item in mix.split(','):
+        name, weight = item.split('=')
+        weights[name.strip()] = float(weight)
+    return weights
+
+
+def load_questions(corpus_path='../training_data/'):
+    """
+        The first statement of each conversation, except timetable requests
+    """
+    questions = []
+    for file_path in list_corpus_files(corpus_path):
+        with io.open(file_path, encoding='utf-8') as data_file:
+            data = yaml.safe_load(data_file) or {}
+        if 'timetable' in (data.get('categories') or []):
+            continue
+        for conversation in data.get('conversations') or []:
+            if conversation and not str(conversation[0]).startswith('!'):
+                questions.append(str(conversation[0]))
+    return questions
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+class SimulatedUser(object):
+
+    def __init__(self, url, email, password, course, questions, timeout):
+        self.url = url.rstrip('/')
+        self.email = email
+        self.password = password
+        self.course = course
+        self.questions = questions
+        self.timeout = timeout
+        self.session = requests.Session()
+
+    def get_csrf_token(self, path):
+        response = self.session.get(self.url + path, timeout=self.timeout)
+        match = CSRF_PATTERN.search(response.text)
+        return match.group(1) if match else ''
+
+    def signup(self):
+        self.session.post(self.url + '/signup', data={
+            'csrf_token': self.get_csrf_token('/signup'),
+            'email': self.email,
+            'coursecode': self.course,
+            'password': self.password,
+        }, timeout=self.timeout)
+
+    # Each operation returns the status of its response and whether it succeeded
+
+    def login(self):
+        response = self.session.post(self.url + '/login', data={
+            'csrf_token': self.get_csrf_token('/login'),
+            'email': self.email,
+            'password': self.password,
+        }, timeout=self.timeout)
+        return response.status_code, response.ok and 'Invalid email or password' not in response.text
+
+    def dcubuddy(self):
+        response = self.session.get(self.url + '/dcubuddy', timeout=self.timeout)
+        return response.status_code, response.ok
+
+    def send(self, message):
+        response = self.session.get(self.url + '/get', params={'msg': message}, timeout=self.timeout)
+        return response.status_code, response.ok
+
+    def viewassignments(self):
+        return self.send('!viewassignments')
+
+    def timetable(self):
+        return self.send('timetable for ' + random.choice(DAYS))
+
+    def question(self):
+        return self.send(random.choice(self.questions))
+
+
+def run(url, users, duration, weights, course, questions, timeout):
+    """
+        Returns the latencies, the number of errors and the number of
+        rejections by status of each operation
+    """
+    run_id = uuid.uuid4().hex[:8]
+    names = list(weights)
+    latencies = {name: [] for name in names}
+    errors = {name: 0 for name in names}
+    rejections = {name: {status: 0 for status in REJECTED_STATUSES} for name in names}
+    lock = threading.Lock()
+
+    def simulate(number):
+        user = SimulatedUser(
+            url, 'loadtest-{}-{}@mail.dcu.ie'.format(run_id, number), 'loadtest-password',
+            course, questions, timeout
+        )
+        user.signup()
+        user.login()
+        # !viewassignments needs an assignment tray to exist
+        user.send('!addassignment loadtest 01/01')
+
+        deadline = time.perf_counter() + duration
+        while time.perf_counter() < deadline:
+            name = random.choices(names, weights=[weights[name] for name in names])[0]
+            start = time.perf_counter()
+            try:
+                status, ok = getattr(user, name)()
+            except requests.RequestException:
+                status, ok = None, False
+            elapsed = time.perf_counter() - start
+
+            with lock:
+                # Rejections are answered straight away, so they would only make the latencies look better
+                if status in REJECTED_STATUSES:
+                    rejections[name][status] += 1
+                    continue
+
+                latencies[name].append(elapsed)
+                if not ok:
+                    errors[name] += 1
+
+    threads = [threading.Thread(target=simulate, args=(number,)) for number in range(users)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    return latencies, errors, rejections, time.perf_counter() - start
+
+
+def summarize(latencies, errors, rejections, duration):
+    """
+        Gets the throughput and latency of the requests that were let in, and
+        the number that were rate limited or busy, of each operation
+    """
+    results = {}
+    for name, values in latencies.items():
+        rate_limited, busy = rejections[name][429], rejections[name][503]
+        if not values and not rate_limited and not busy:
+            continue
+        results[name] = {
+            'requests': len(values),
+            'errors': errors[name],
+            'rate_limited': rate_limited,
+            'busy': busy,
+            'throughput': len(values) / duration,
+            'p50': 1000 * percentile(values, 0.50) if values else None,
+            'p95': 1000 * percentile(values, 0.95) if values else None,
+            'p99': 1000 * percentile(values, 0.99) if values else None,
+        }
+    return results
+
+
+def format_latency(value):
+    return '{:>9.1f}'.format(value) if value is not None else '{:>9}'.format('-')
+
+
+def report(results, baseline=None, regression_threshold=0.2):
+    print('{:<16} {:>8} {:>7} {:>7} {:>7} {:>9} {:>9} {:>9} {:>9}  {}'.format(
+        'operation', 'requests', 'errors', '429', '503', 'req/s', 'p50 ms', 'p95 ms', 'p99 ms',
+        'p95 vs baseline' if baseline else ''
+    ))
+    for name, result in sorted(results.items()):
+        comparison = ''
+        if baseline and baseline.get(name, {}).get('p95') and result['p95'] is not None:
+            change = result['p95'] / baseline[name]['p95'] - 1
+            comparison = '{:+.0%}{}'.format(change, '  REGRESSION' if change > regression_threshold else '')
+        print('{:<16} {:>8} {:>7} {:>7} {:>7} {:>9.1f} {} {} {}  {}'.format(
+            name, result['requests'], result['errors'], result['rate_limited'], result['busy'],
+            result['throughput'], format_latency(result['p50']), format_latency(result['p95']),
+            format_latency(result['p99']), comparison
+        ))
+
+    rate_limited = sum(result['rate_limited'] for result in results.values())
+    if rate_limited:
+        print('{} requests were rate limited, start the app with DCUBUDDY_RATE_LIMIT=0 '
+              'to measure its latency rather than its rate limit'.format(rate_limited))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--url', default='http://localhost:5000')
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--duration', type=float, default=60, help='seconds each user sends requests for')
+    parser.add_argument('--mix', default=DEFAULT_MIX, help='operation=weight pairs')
+    parser.add_argument('--course', default='CASE3')
+    parser.add_argument('--timeout', type=float, default=30)
+    parser.add_argument('--baseline', default='load_test', help='name of the baseline to compare with')
+    parser.add_argument('--save-baseline', action='store_true', help='store this run as the baseline')
+    parser.add_argument('--regression-threshold', type=float, default=0.2,
+                        help='p95 increase over the baseline reported as a regression')
+    args = parser.parse_args()
+
+    weights = parse_mix(args.mix)
+    unknown = set(weights) - {'login', 'dcubuddy', 'viewassignments', 'timetable', 'question'}
+    if unknown:
+        parser.error('unknown operations: {}'.format(', '.join(sorted(unknown))))
+
+    latencies, errors, rejections, duration = run(
+        args.url, args.users, args.duration, weights, args.course, load_questions(), args.timeout
+    )
+    results = summarize(latencies, errors, rejections, duration)
+
+    baseline_path = os.path.join(BASELINE_DIRECTORY, args.baseline + '.json')
+    baseline = None
+    if os.path.exists(baseline_path):
+        with open(baseline_path) as baseline_file:
+            baseline = json.load(baseline_file)['results']
+
+    report(results, baseline, args.regression_threshold)
+
+    if args.save_baseline:
+        os.makedirs(BASELINE_DIRECTORY, exist_ok=True)
+        with open(baseline_path, 'w') as baseline_file:
+            json.dump({
+                'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+                'users': args.users,
+                'duration': args.duration,
+                'mix': weights,
+                'results': results,
+            }, baseline_file, indent=2, sort_keys=True)
+        print('Saved baseline {}'.format(baseline_path))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,153 @@
+"""
+Measures what logging costs the request threads, per message, with the old
+setup and with structured_logging.
+
+    before   logging.basicConfig's StreamHandler written to on the calling
+             thread, messages built eagerly with str.format like SearchMatch
+             used to
+    after    structured_logging's queue and JSON writer thread, messages
+             built lazily with %-style arguments
+
+Each is measured with INFO messages logged and with them filtered out by the
+level, and with several request threads logging at once. Run from src/app:
+
+    python -m benchmarks.logging_overhead --messages 20000 --threads 1 8
+    python -m benchmarks.logging_overhead --write-delay 100
+"""
+import os
+import sys
+import time
+import logging
+import argparse
+import threading
+import structured_logging
+
+
+CANDIDATE = (
+    'In Glasnevin, there is the Londis shop and Nubar located inside the Hub '
+    '(marked K on the map). There is also the main restaurant located in the Pavillon'
+)
+
+
+class SlowStream(object):
+    """
+    A stream that takes a while to accept each write, like a full pipe to a
+    log collector.
+    """
+
+    def __init__(self, stream, delay):
+        self.stream = stream
+        self.delay = delay
+
+    def write(self, data):
+        time.sleep(self.delay)
+        return self.stream.write(data)
+
+    def flush(self):
+        self.stream.flush()
+
+
+def log_eagerly(logger, number):
+    logger.info('Using "{}" as a close match to "{}" with a confidence of {}'.format(
+        CANDIDATE, 'where can i get food?', 0.93
+    ))
+    logger.info('Response selected. Using "{}"'.format(CANDIDATE))
+
+
+def log_lazily(logger, number):
+    logger.info(
+        'Using "%s" as a close match to "%s" with a confidence of %s',
+        CANDIDATE, 'where can i get food?', 0.93
+    )
+    logger.info('Response selected. Using "%s"', CANDIDATE)
+
+
+def configure_before(stream, level):
+    root = logging.getLogger()
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(logging.Formatter(logging.BASIC_FORMAT))
+    root.addHandler(handler)
+    root.setLevel(level)
+    return lambda: root.removeHandler(handler)
+
+
+def configure_after(stream, level):
+    structured_logging.configure(level=level, log_format='json', stream=stream)
+    return structured_logging.stop
+
+
+SETUPS = {
+    'before': (configure_before, log_eagerly),
+    'after': (configure_after, log_lazily),
+}
+
+
+def run(setup, level, messages, thread_count, stream):
+    """
+        Returns the seconds per message spent on the logging threads and the
+        seconds until every message was written
+    """
+    configure, log = SETUPS[setup]
+    logger = logging.getLogger('chatterbot.chatterbot')
+    finish = configure(stream, level)
+
+    # Each call of log logs two messages
+    calls = messages // (2 * thread_count)
+    durations = []
+    lock = threading.Lock()
+
+    def log_messages():
+        start = time.perf_counter()
+        for number in range(calls):
+            log(logger, number)
+        with lock:
+            durations.append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=log_messages) for _ in range(thread_count)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # Stopping the writer thread waits for the queue to be written
+    finish()
+    stream.flush()
+    total = time.perf_counter() - start
+
+    logged = 2 * calls * thread_count
+    return sum(durations) / logged, total / logged
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--messages', type=int, default=20000)
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 8])
+    parser.add_argument('--stream', choices=('devnull', 'stderr'), default='devnull',
+                        help='where messages are written')
+    parser.add_argument('--write-delay', type=float, default=0,
+                        help='microseconds each write to the stream blocks for')
+    args = parser.parse_args()
+
+    stream = open(os.devnull, 'w') if args.stream == 'devnull' else sys.stderr
+    if args.write_delay:
+        stream = SlowStream(stream, args.write_delay / 1e6)
+
+    # Nothing else may write to the root logger while measuring
+    for handler in logging.getLogger().handlers[:]:
+        logging.getLogger().removeHandler(handler)
+
+    print('{:<8} {:<8} {:>7} {:>16} {:>16}'.format(
+        'setup', 'level', 'threads', 'us/msg on caller', 'us/msg written'
+    ))
+    for thread_count in args.threads:
+        for level in ('INFO', 'WARNING'):
+            for setup in ('before', 'after'):
+                caller, written = run(setup, level, args.messages, thread_count, stream)
+                print('{:<8} {:<8} {:>7} {:>16.2f} {:>16.2f}'.format(
+                    setup, level, thread_count, 1e6 * caller, 1e6 * written
+                ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,152 @@
+"""
+Compares the latency of SearchMatch's search algorithms, and how often they
+agree with chatterbot's IndexedTextSearch on the closest match, on the
+DCUBuddy training corpus and on a large synthetic corpus.
+
+    python -m benchmarks.search_algorithms --corpus dcubuddy
+    python -m benchmarks.search_algorithms --corpus synthetic --statements 100000
+"""
+import os
+import time
+import random
+import argparse
+import tempfile
+from chatterbot import ChatBot
+from chatterbot.conversation import Statement
+from chatterbot.search import IndexedTextSearch
+from chatterbot.trainers import ChatterBotCorpusTrainer
+from fts_search import FTSSearch
+from inverted_index_search import InvertedIndexSearch
+
+
+SEARCH_ALGORITHMS = (IndexedTextSearch, InvertedIndexSearch, FTSSearch)
+
+WORDS = (
+    'timetable', 'map', 'campus', 'glasnevin', 'exam', 'results', 'food',
+    'canteen', 'registry', 'fees', 'society', 'assignment', 'library', 'hours',
+    'where', 'when', 'what', 'how', 'is', 'the', 'my', 'can', 'i', 'find',
+    'open', 'close', 'today', 'tomorrow', 'monday', 'friday', 'lecture', 'lab',
+    'room', 'building', 'nubar', 'helix', 'henry', 'grattan', 'stokes', 'print',
+    'wifi', 'password', 'email', 'loop', 'module', 'grade', 'repeat', 'deadline',
+)
+
+
+def get_search_text(text):
+    words = text.lower().split()
+    return ' '.join('{}:{}'.format(a, b) for a, b in zip(words, words[1:]))
+
+
+def misspell(text):
+    words = text.split()
+    index = random.randrange(len(words))
+    word = words[index]
+    if len(word) > 3:
+        position = random.randrange(1, len(word) - 1)
+        words[index] = word[:position] + word[position + 1:]
+    return ' '.join(words)
+
+
+def load_dcubuddy(chatbot, query_count):
+    trainer = ChatterBotCorpusTrainer(chatbot)
+    trainer.show_training_progress = False
+    trainer.train('../training_data/')
+
+    texts = [statement.text for statement in chatbot.storage.filter(persona_not_startswith='bot:')]
+    tagger = chatbot.storage.tagger
+
+    queries = []
+    for text in random.sample(texts, min(query_count, len(texts))):
+        text = misspell(text) if random.random() < 0.5 else text
+        queries.append(Statement(text=text, search_text=tagger.get_bigram_pair_string(text)))
+    return queries
+
+
+def load_synthetic(chatbot, statement_count, query_count):
+    texts = [
+        ' '.join(random.choice(WORDS) for _ in range(random.randint(3, 9)))
+        for _ in range(statement_count)
+    ]
+
+    batch_size = 10000
+    for start in range(0, statement_count, batch_size):
+        chatbot.storage.create_many([
+            Statement(text=text, search_text=get_search_text(text), conversation='training')
+            for text in texts[start:start + batch_size]
+        ])
+
+    queries = []
+    for text in random.sample(texts, query_count):
+        text = misspell(text) if random.random() < 0.5 else text
+        queries.append(Statement(text=text, search_text=get_search_text(text)))
+    return queries
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def run(search_algorithm, queries):
+    closest = []
+    durations = []
+    for query in queries:
+        start = time.perf_counter()
+        results = list(search_algorithm.search(query))
+        durations.append(time.perf_counter() - start)
+        closest.append(results[-1].text if results else None)
+    return closest, durations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--corpus', choices=('dcubuddy', 'synthetic'), default='dcubuddy')
+    parser.add_argument('--statements', type=int, default=100000, help='size of the synthetic corpus')
+    parser.add_argument('--queries', type=int, default=200)
+    args = parser.parse_args()
+
+    random.seed(0)
+
+    with tempfile.TemporaryDirectory() as directory:
+        chatbot = ChatBot(
+            'Benchmark',
+            storage_adapter='sqlite_storage.SQLiteStorageAdapter',
+            database_uri='sqlite:///' + os.path.join(directory, 'benchmark.sqlite3'),
+            logic_adapters=[]
+        )
+
+        start = time.perf_counter()
+        if args.corpus == 'dcubuddy':
+            queries = load_dcubuddy(chatbot, args.queries)
+        else:
+            queries = load_synthetic(chatbot, args.statements, args.queries)
+        print('Loaded {} statements in {:.1f}s, {} queries'.format(
+            chatbot.storage.count(), time.perf_counter() - start, len(queries)
+        ))
+
+        baseline = None
+        for search_algorithm_class in SEARCH_ALGORITHMS:
+            start = time.perf_counter()
+            search_algorithm = search_algorithm_class(chatbot)
+            # Warm up any index the algorithm builds on its first search
+            list(search_algorithm.search(queries[0]))
+            setup = time.perf_counter() - start
+
+            closest, durations = run(search_algorithm, queries)
+            if baseline is None:
+                baseline = closest
+            agreement = sum(a == b for a, b in zip(closest, baseline)) / len(queries)
+
+            print('{:<22} setup {:>7.2f}s  mean {:>8.2f}ms  p50 {:>8.2f}ms  p95 {:>8.2f}ms  agreement {:>4.0%}'.format(
+                search_algorithm_class.name, setup,
+                1000 * sum(durations) / len(durations),
+                1000 * percentile(durations, 0.5),
+                1000 * percentile(durations, 0.95),
+                agreement
+            ))
+
+        chatbot.storage.engine.dispose()
+        chatbot.storage.read_engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
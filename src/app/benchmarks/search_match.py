@@ -0,0 +1,280 @@
+"""
+Replays labelled questions against SearchMatch trained on the DCUBuddy corpus
+and reports latency, comparisons per query and answer accuracy together, so a
+faster search cannot quietly give worse answers.
+
+The chat bot is configured like chatbot.py: SearchMatch with a 0.90 similarity
+threshold, trained on training_data/, with the comparison, intent router and
+search algorithm chatbot.py reads from settings.py. The options below override
+them for one run. --comparison bounded uses BoundedLevenshteinDistance, which
+gives up on candidates that cannot reach the threshold, and --comparison
+levenshtein chatterbot's LevenshteinDistance, which scores every candidate. Queries are read from benchmarks/search_match_queries.yml and
+are labelled exact, paraphrase, typo or unknown. Run from src/app:
+
+    python -m benchmarks.search_match
+    python -m benchmarks.search_match --search-algorithm fts_search.FTSSearch
+    python -m benchmarks.search_match --search-algorithm bk_tree_search.BKTreeSearch
+    python -m benchmarks.search_match --queries benchmarks/typo_queries.yml --search-algorithm trigram_search.TrigramSearch
+    python -m benchmarks.search_match --comparison bounded
+    python -m benchmarks.search_match --intent-router off
+
+Results are compared with a stored baseline when one exists, and
+--save-baseline replaces it with this run's results.
+"""
+import io
+import os
+import json
+import time
+import argparse
+import tempfile
+import yaml
+from chatterbot import ChatBot
+from chatterbot.comparisons import LevenshteinDistance
+from bounded_comparisons import BoundedLevenshteinDistance, get_comparison_function
+from intent_router import IntentRouter
+from parallel_training import ParallelCorpusTrainer
+import settings
+
+
+BASELINE_DIRECTORY = os.path.join(os.path.dirname(__file__), 'baselines')
+
+QUERY_PATH = os.path.join(os.path.dirname(__file__), 'search_match_queries.yml')
+
+# Stands in for chatbot.py's default response, so it is easy to recognise
+DEFAULT_RESPONSE = 'DEFAULT_RESPONSE'
+
+LABELS = ('exact', 'paraphrase', 'typo', 'unknown')
+
+COMPARISONS = {
+    'levenshtein': LevenshteinDistance,
+    'bounded': BoundedLevenshteinDistance,
+}
+
+
+def get_counting_comparison(comparison_class):
+    """
+        Gets a subclass of the comparison that counts every comparison made
+    """
+    class CountingComparison(comparison_class):
+
+        comparisons = 0
+
+        def compare(self, statement_a, statement_b):
+            CountingComparison.comparisons += 1
+            return super().compare(statement_a, statement_b)
+
+    return CountingComparison
+
+
+def load_queries(path=QUERY_PATH):
+    with io.open(path, encoding='utf-8') as query_file:
+        data = yaml.safe_load(query_file)
+
+    queries = []
+    for label in LABELS:
+        for query in data.get(label) or []:
+            queries.append((label, query['text'], query.get('response')))
+    return queries
+
+
+def create_chatbot(database_path, comparison, search_algorithm=None, workers=1, spacy_model=None,
+                   intent_router=None):
+    comparison = get_comparison_function(comparison)
+
+    logic_adapter = {
+        'import_path': 'search_all_adapter.SearchMatch',
+        'default_response': DEFAULT_RESPONSE,
+        'statement_comparison_function': comparison,
+        'maximum_similarity_threshold': 0.90,
+        'intent_router': intent_router,
+        'intent_confidence_threshold': settings.INTENT_ROUTER_THRESHOLD,
+        'search_algorithm': search_algorithm,
+        'spacy_model': settings.SPACY_MODEL,
+        # Search algorithms that save an index keep it next to the benchmark's database
+        'embedding_matrix_path': os.path.join(os.path.dirname(database_path), 'statement_vectors.npy'),
+        'bk_tree_path': os.path.join(os.path.dirname(database_path), 'statement_bk_tree.pickle')
+    }
+
+    chatbot = ChatBot(
+        'DCUBuddy',
+        storage_adapter='sqlite_storage.SQLiteStorageAdapter',
+        database_uri='sqlite:///' + database_path,
+        # chatterbot's own search algorithms are created with the chat bot's arguments
+        statement_comparison_function=comparison,
+        preprocessors=[
+            'chatterbot.preprocessors.clean_whitespace',
+            'chatterbot.preprocessors.unescape_html'
+        ],
+        logic_adapters=[logic_adapter]
+    )
+
+    ParallelCorpusTrainer(chatbot, workers=workers, spacy_model=spacy_model).train('../training_data/')
+
+    # Replaying the queries must not teach the bot anything
+    chatbot.read_only = True
+
+    return chatbot
+
+
+def is_correct(response, expected):
+    if expected is None:
+        return response == DEFAULT_RESPONSE
+    return response.startswith(expected)
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def run(chatbot, comparison, queries, repeat):
+    """
+        Returns the latency, comparison count and correctness of every query
+    """
+    results = {label: [] for label in LABELS}
+    misses = []
+
+    for _ in range(repeat):
+        for label, text, expected in queries:
+            comparison.comparisons = 0
+            start = time.perf_counter()
+            response = chatbot.get_response(text)
+            elapsed = time.perf_counter() - start
+
+            correct = is_correct(response.text, expected)
+            results[label].append((elapsed, comparison.comparisons, correct))
+
+            if not correct:
+                misses.append((label, text, response.text))
+
+    return results, misses
+
+
+def summarize(results):
+    summary = {}
+    everything = []
+    for label in LABELS:
+        if results[label]:
+            summary[label] = summarize_label(results[label])
+            everything.extend(results[label])
+    summary['all'] = summarize_label(everything)
+    return summary
+
+
+def summarize_label(results):
+    latencies = [elapsed for elapsed, _, _ in results]
+    return {
+        'queries': len(results),
+        'accuracy': sum(correct for _, _, correct in results) / len(results),
+        'comparisons': sum(comparisons for _, comparisons, _ in results) / len(results),
+        'mean': 1000 * sum(latencies) / len(latencies),
+        'p50': 1000 * percentile(latencies, 0.50),
+        'p95': 1000 * percentile(latencies, 0.95),
+        'p99': 1000 * percentile(latencies, 0.99),
+    }
+
+
+def report(summary, baseline=None, regression_threshold=0.2):
+    print('{:<11} {:>7} {:>8} {:>11} {:>9} {:>9} {:>9} {:>9}  {}'.format(
+        'label', 'queries', 'accuracy', 'comparisons', 'mean ms', 'p50 ms', 'p95 ms', 'p99 ms',
+        'vs baseline' if baseline else ''
+    ))
+    for label in LABELS + ('all',):
+        if label not in summary:
+            continue
+        result = summary[label]
+
+        comparison = ''
+        if baseline and label in baseline:
+            accuracy_change = result['accuracy'] - baseline[label]['accuracy']
+            latency_change = result['p95'] / baseline[label]['p95'] - 1
+            comparison = 'accuracy {:+.0%} p95 {:+.0%}'.format(accuracy_change, latency_change)
+            if accuracy_change < 0:
+                comparison += '  ACCURACY REGRESSION'
+            if latency_change > regression_threshold:
+                comparison += '  LATENCY REGRESSION'
+
+        print('{:<11} {:>7} {:>8.0%} {:>11.1f} {:>9.2f} {:>9.2f} {:>9.2f} {:>9.2f}  {}'.format(
+            label, result['queries'], result['accuracy'], result['comparisons'],
+            result['mean'], result['p50'], result['p95'], result['p99'], comparison
+        ))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--queries', default=QUERY_PATH, help='labelled query file')
+    parser.add_argument('--comparison', choices=sorted(COMPARISONS),
+                        default='bounded' if settings.BOUNDED_COMPARISON else 'levenshtein')
+    parser.add_argument('--search-algorithm', default=settings.SEARCH_ALGORITHM,
+                        help='import path of the search algorithm SearchMatch uses')
+    parser.add_argument('--intent-router', choices=('on', 'off'),
+                        default='on' if settings.INTENT_ROUTER_ENABLED else 'off',
+                        help='only search the category the intent router predicts')
+    parser.add_argument('--repeat', type=int, default=5, help='times each query is replayed')
+    parser.add_argument('--workers', type=int, default=1, help='training processes')
+    parser.add_argument('--spacy-model',
+                        help="model of a spaCy-based tagger, defaults to the model of the tagger's language")
+    parser.add_argument('--show-misses', action='store_true', help='print every wrong answer')
+    parser.add_argument('--baseline', default='search_match', help='name of the baseline to compare with')
+    parser.add_argument('--save-baseline', action='store_true', help='store this run as the baseline')
+    parser.add_argument('--regression-threshold', type=float, default=0.2,
+                        help='p95 increase over the baseline reported as a regression')
+    args = parser.parse_args()
+
+    queries = load_queries(args.queries)
+    comparison = get_counting_comparison(COMPARISONS[args.comparison])
+
+    intent_router = None
+    if args.intent_router == 'on':
+        intent_router = IntentRouter.from_corpus('../training_data/')
+
+    with tempfile.TemporaryDirectory() as directory:
+        start = time.perf_counter()
+        chatbot = create_chatbot(
+            os.path.join(directory, 'benchmark.sqlite3'), comparison,
+            args.search_algorithm, args.workers, args.spacy_model, intent_router
+        )
+        print('Trained {} statements in {:.1f}s, {} queries'.format(
+            chatbot.storage.count(), time.perf_counter() - start, len(queries)
+        ))
+
+        # Warm up any index the search algorithm builds on its first search
+        chatbot.get_response(queries[0][1])
+
+        results, misses = run(chatbot, comparison, queries, args.repeat)
+
+        chatbot.storage.engine.dispose()
+        chatbot.storage.read_engine.dispose()
+
+    summary = summarize(results)
+
+    baseline_path = os.path.join(BASELINE_DIRECTORY, args.baseline + '.json')
+    baseline = None
+    if os.path.exists(baseline_path):
+        with open(baseline_path) as baseline_file:
+            baseline = json.load(baseline_file)['results']
+
+    report(summary, baseline, args.regression_threshold)
+
+    if args.show_misses:
+        # Every repeat gives the same answer, so each miss is only shown once
+        for label, text, response in sorted(set(misses)):
+            print('{:<11} {!r} -> {!r}'.format(label, text, response[:60]))
+
+    if args.save_baseline:
+        os.makedirs(BASELINE_DIRECTORY, exist_ok=True)
+        with open(baseline_path, 'w') as baseline_file:
+            json.dump({
+                'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+                'comparison': args.comparison,
+                'search_algorithm': args.search_algorithm or 'indexed_text_search',
+                'intent_router': args.intent_router,
+                'spacy_model': args.spacy_model or 'default',
+                'repeat': args.repeat,
+                'results': summary,
+            }, baseline_file, indent=2, sort_keys=True)
+        print('Saved baseline {}'.format(baseline_path))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+"""
+Measures mixed read/write chat throughput against a SQLite knowledge base
+with many threads, comparing chatterbot's SQLStorageAdapter with
+SQLiteStorageAdapter.
+
+Each simulated chat message performs the same storage calls as
+``SearchMatch``: a ``search_text_contains`` search followed by a
+``search_in_response_to`` lookup, and learning messages also create the
+input and response statements.
+
+    python -m benchmarks.sqlite_concurrency --threads 16 --messages 25
+"""
+import os
+import time
+import random
+import argparse
+import tempfile
+import threading
+from chatterbot.conversation import Statement
+from chatterbot.storage import SQLStorageAdapter
+from sqlite_storage import SQLiteStorageAdapter
+
+
+WORDS = (
+    'timetable', 'map', 'campus', 'glasnevin', 'exam', 'results', 'food',
+    'canteen', 'registry', 'fees', 'society', 'assignment', 'library', 'hours',
+)
+
+
+def random_search_text(length=3):
+    return ' '.join(
+        'NN:' + random.choice(WORDS) for _ in range(length)
+    )
+
+
+def populate(adapter, statement_count):
+    statements = []
+    previous_search_text = ''
+    for index in range(statement_count):
+        search_text = random_search_text()
+        statements.append(Statement(
+            text='statement {}'.format(index),
+            search_text=search_text,
+            in_response_to='statement {}'.format(index - 1) if index else None,
+            search_in_response_to=previous_search_text,
+            conversation='training'
+        ))
+        previous_search_text = search_text
+    adapter.create_many(statements)
+
+
+def chat(adapter, message_count, write_ratio):
+    for _ in range(message_count):
+        search_text = random_search_text(2)
+        matches = list(adapter.filter(
+            search_text_contains=search_text,
+            persona_not_startswith='bot:',
+            page_size=1000
+        ))
+        closest = matches[0].search_text if matches else search_text
+        list(adapter.filter(search_in_response_to=closest))
+
+        if random.random() < write_ratio:
+            adapter.create(text='learned', search_text=search_text, conversation='benchmark')
+            adapter.create(
+                text='response', search_text=closest, conversation='benchmark',
+                in_response_to='learned', search_in_response_to=search_text
+            )
+
+
+def run(adapter_class, threads, messages, statements, write_ratio):
+    with tempfile.TemporaryDirectory() as directory:
+        database_uri = 'sqlite:///' + os.path.join(directory, 'benchmark.sqlite3')
+        adapter = adapter_class(database_uri=database_uri)
+        populate(adapter, statements)
+
+        errors = []
+
+        def worker():
+            try:
+                chat(adapter, messages, write_ratio)
+            except Exception as error:
+                errors.append(error)
+
+        workers = [threading.Thread(target=worker) for _ in range(threads)]
+
+        start = time.perf_counter()
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        duration = time.perf_counter() - start
+
+        adapter.engine.dispose()
+        if hasattr(adapter, 'read_engine'):
+            adapter.read_engine.dispose()
+
+    return threads * messages / duration, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--messages', type=int, default=25, help='messages per thread')
+    parser.add_argument('--statements', type=int, default=3000)
+    parser.add_argument('--write-ratio', type=float, default=0.5)
+    args = parser.parse_args()
+
+    for adapter_class in (SQLStorageAdapter, SQLiteStorageAdapter):
+        throughput, errors = run(
+            adapter_class, args.threads, args.messages, args.statements, args.write_ratio
+        )
+        print('{:<24} {:>10.1f} messages/second  {} failed threads'.format(
+            adapter_class.__name__, throughput, len(errors)
+        ))
+        for error in errors[:3]:
+            print('    {!r}'.format(error))
+
+
+if __name__ == '__main__':
+    main()
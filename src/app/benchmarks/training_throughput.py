@@ -0,0 +1,83 @@
+"""
+Measures how ParallelCorpusTrainer's training throughput scales with the
+number of tagging processes on a synthetic corpus.
+
+    python -m benchmarks.training_throughput --lines 100000 --workers 1 2 4
+"""
+import os
+import time
+import random
+import argparse
+import tempfile
+from chatterbot import ChatBot
+from parallel_training import ParallelCorpusTrainer
+
+
+WORDS = (
+    'timetable', 'map', 'campus', 'glasnevin', 'exam', 'results', 'food',
+    'canteen', 'registry', 'fees', 'society', 'assignment', 'library', 'hours',
+    'where', 'when', 'what', 'how', 'is', 'the', 'my', 'can', 'i', 'find',
+    'open', 'close', 'today', 'tomorrow', 'monday', 'friday', 'lecture', 'lab',
+)
+
+
+def write_corpus(directory, line_count, files=10):
+    """
+        Writes YAML corpus files with line_count statements in two line conversations
+    """
+    lines_per_file = line_count // files
+    for number in range(files):
+        with open(os.path.join(directory, 'corpus{}.yml'.format(number)), 'w') as corpus_file:
+            corpus_file.write('categories:\n- synthetic{}\nconversations:\n'.format(number))
+            for _ in range(lines_per_file // 2):
+                question, answer = (
+                    ' '.join(random.choice(WORDS) for _ in range(random.randint(3, 9)))
+                    for _ in range(2)
+                )
+                corpus_file.write('- - {}\n  - {}\n'.format(question, answer))
+
+
+def run(corpus, workers, spacy_model):
+    with tempfile.TemporaryDirectory() as directory:
+        chatbot = ChatBot(
+            'Benchmark',
+            storage_adapter='sqlite_storage.SQLiteStorageAdapter',
+            database_uri='sqlite:///' + os.path.join(directory, 'benchmark.sqlite3'),
+            logic_adapters=[]
+        )
+        trainer = ParallelCorpusTrainer(chatbot, workers=workers, spacy_model=spacy_model)
+
+        start = time.perf_counter()
+        count = trainer.train(corpus)
+        duration = time.perf_counter() - start
+
+        chatbot.storage.engine.dispose()
+        chatbot.storage.read_engine.dispose()
+
+    return count / duration
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--lines', type=int, default=100000)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, os.cpu_count()])
+    parser.add_argument('--spacy-model',
+                        help="model of a spaCy-based tagger, defaults to the model of the tagger's language")
+    args = parser.parse_args()
+
+    random.seed(0)
+
+    with tempfile.TemporaryDirectory() as corpus:
+        write_corpus(corpus, args.lines)
+
+        baseline = None
+        for workers in sorted(set(args.workers)):
+            throughput = run(corpus, workers, args.spacy_model)
+            baseline = baseline or throughput
+            print('{:>3} workers {:>10.0f} statements/second  {:>5.2f}x'.format(
+                workers, throughput, throughput / baseline
+            ))
+
+
+if __name__ == '__main__':
+    main()
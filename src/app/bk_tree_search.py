@@ -0,0 +1,318 @@
+"""
+A search algorithm for inputs with typos that only compares the input with
+statements that can be within the similarity threshold of it.
+
+The lowercased text of every searchable statement is put in a BK-tree keyed
+by the number of insertions and deletions between texts, the distance that
+``LevenshteinDistance``'s similarity is computed from. The threshold and the
+length of the input give the largest distance a match can be at, and the
+triangle inequality lets a search skip every subtree that cannot hold a text
+that close, so only a fraction of the corpus is compared.
+
+The tree is saved to ``bk_tree_path`` and loaded at startup instead of
+being built again, as long as the searchable statements have not changed.
+chatbot.py saves it to ``settings.BK_TREE_PATH``, which like the database is
+relative to the working directory.
+
+Statements are read through the read engine of SQL storage adapters, and
+through ``filter`` with adapters that keep them in memory.
+"""
+import os
+import pickle
+import tempfile
+import threading
+from rapidfuzz.distance import Indel
+from bounded_comparisons import ROUNDING_MARGIN, get_comparator, get_maximum_distance
+from sqlite_storage import get_read_engine
+import settings
+
+
+TREE_FORMAT = 1
+
+
+def normalize(text, maximum_length):
+    return text.lower()[:maximum_length]
+
+
+def get_search_radius(length, minimum_similarity):
+    """
+        Gets the largest distance from a text of this length at which any
+        other text can still be at least minimum_similarity alike
+    """
+    # A text at distance d is at most d longer, so d <= (2 * length + d) * (1 - minimum_similarity)
+    slack = 1 - minimum_similarity + ROUNDING_MARGIN
+    if slack >= 1:
+        return float('inf')
+    return int(2 * length * slack / (1 - slack))
+
+
+def statement_matches(statement, parameters):
+    for name, value in parameters.items():
+        if name == 'tags':
+            tags = [value] if isinstance(value, str) else value
+            if not set(tags).intersection(statement.get_tags()):
+                return False
+        elif getattr(statement, name) != value:
+            return False
+    return True
+
+
+class BKTree(object):
+    """
+    A BK-tree of texts, each with the ids of the statements that have it.
+
+    Nodes are stored in flat lists so the tree pickles without recursion:
+    the children of a node map their distance from it to their position.
+    """
+
+    def __init__(self, texts=None, ids=None, children=None):
+        self.texts = texts or []
+        self.ids = ids or []
+        self.children = children or []
+        self.positions = {text: node for node, text in enumerate(self.texts)}
+
+    def __len__(self):
+        return len(self.texts)
+
+    def add(self, text, statement_id):
+        node = self.positions.get(text)
+
+        if node is not None:
+            self.ids[node].append(statement_id)
+            return
+
+        new_node = len(self.texts)
+        self.texts.append(text)
+        self.ids.append([statement_id])
+        self.children.append({})
+        self.positions[text] = new_node
+
+        node = 0
+        while node != new_node:
+            distance = Indel.distance(text, self.texts[node])
+            node = self.children[node].setdefault(distance, new_node)
+
+    def search(self, text, radius):
+        """
+        Return the positions of the texts within ``radius`` of the text,
+        with their distance from it.
+        """
+        matches = []
+
+        if not self.texts:
+            return matches
+
+        nodes = [0]
+        while nodes:
+            node = nodes.pop()
+            distance = Indel.distance(text, self.texts[node])
+
+            if distance <= radius:
+                matches.append((node, distance))
+
+            for child_distance, child in self.children[node].items():
+                if distance - radius <= child_distance <= distance + radius:
+                    nodes.append(child)
+
+        return matches
+
+    def save(self, path, signature, maximum_length):
+        data = {
+            'format': TREE_FORMAT,
+            'signature': signature,
+            'maximum_length': maximum_length,
+            'texts': self.texts,
+            'ids': self.ids,
+            'children': self.children,
+        }
+
+        # Written to a temporary file of this process's own first, so other workers never
+        # load a partial tree and workers building at the same time never share a file
+        directory, name = os.path.split(os.path.abspath(path))
+        descriptor, temporary_path = tempfile.mkstemp(prefix=name + '.', suffix='.tmp', dir=directory)
+        try:
+            with os.fdopen(descriptor, 'wb') as tree_file:
+                pickle.dump(data, tree_file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temporary_path, path)
+        except BaseException:
+            os.remove(temporary_path)
+            raise
+
+    @classmethod
+    def load(cls, path, signature, maximum_length):
+        """
+        Return the saved tree, or None when there is no tree saved for these
+        statements.
+        """
+        if not os.path.exists(path):
+            return None
+
+        with open(path, 'rb') as tree_file:
+            data = pickle.load(tree_file)
+
+        if (data.get('format'), data.get('signature'), data.get('maximum_length')) != (
+            TREE_FORMAT, signature, maximum_length
+        ):
+            return None
+
+        return cls(data['texts'], data['ids'], data['children'])
+
+
+class BKTreeSearch(object):
+    """
+    A search algorithm that finds the statements within edit distance of the
+    input in a ``BKTree``, then scores them with the comparison function.
+
+    The search radius is the largest distance at which a statement can still
+    reach ``maximum_similarity_threshold``, so statements less similar than
+    the threshold are never returned. The tree is rebuilt when the
+    searchable statements in the database no longer match the saved tree, so
+    statements learned after startup are only found once it is rebuilt.
+
+    :param statement_comparison_function: The dot-notated import path
+        to a statement comparison function.
+        Defaults to ``LevenshteinDistance``.
+
+    :param maximum_similarity_threshold: The similarity the search radius is
+        computed for. Defaults to 0.95, like the logic adapters.
+
+    :param bk_tree_path: Where the tree is saved. Defaults to ``statement_bk_tree.pickle``.
+    """
+
+    name = 'bk_tree_search'
+
+    def __init__(self, chatbot, **kwargs):
+        from chatterbot.comparisons import LevenshteinDistance
+
+        self.chatbot = chatbot
+
+        statement_comparison_function = kwargs.get(
+            'statement_comparison_function',
+            LevenshteinDistance
+        )
+
+        self.compare_statements = get_comparator(
+            statement_comparison_function, self.chatbot.storage.tagger.language
+        )
+
+        self.minimum_similarity = kwargs.get('maximum_similarity_threshold', 0.95)
+        self.tree_path = kwargs.get('bk_tree_path', 'statement_bk_tree.pickle')
+
+        # Texts are cut like BoundedLevenshteinDistance cuts them
+        self.maximum_length = settings.COMPARISON_MAX_LENGTH
+
+        self.tree = None
+        self._lock = threading.Lock()
+
+    def get_searchable_statements(self):
+        """
+            Gets the id and text of every statement that can be searched, in order of id
+        """
+        engine = get_read_engine(self.chatbot.storage)
+
+        if engine is None:
+            statements = self.chatbot.storage.filter(persona_not_startswith='bot:', order_by=['id'])
+            return [(statement.id, statement.text) for statement in statements]
+
+        with engine.connect() as connection:
+            return connection.execute(
+                "SELECT id, text FROM statement WHERE persona NOT LIKE 'bot:%' ORDER BY id"
+            ).fetchall()
+
+    def get_signature(self):
+        """
+            Gets the number and largest id of the statements that can be searched
+        """
+        engine = get_read_engine(self.chatbot.storage)
+
+        if engine is None:
+            statement_ids = [statement_id for statement_id, _ in self.get_searchable_statements()]
+            return len(statement_ids), max(statement_ids, default=0)
+
+        with engine.connect() as connection:
+            count, max_id = connection.execute(
+                "SELECT count(*), max(id) FROM statement WHERE persona NOT LIKE 'bot:%'"
+            ).first()
+        return count, max_id or 0
+
+    def build(self, signature):
+        """
+            Puts every searchable statement in a new tree and saves it
+        """
+        tree = BKTree()
+
+        for statement_id, text in self.get_searchable_statements():
+            if text:
+                tree.add(normalize(text, self.maximum_length), statement_id)
+
+        tree.save(self.tree_path, signature, self.maximum_length)
+
+        self.chatbot.logger.info('Built a BK-tree of {} texts'.format(len(tree)))
+
+        return tree
+
+    def get_tree(self):
+        with self._lock:
+            if self.tree is None:
+                signature = self.get_signature()
+                tree = BKTree.load(self.tree_path, signature, self.maximum_length)
+                self.tree = tree if tree is not None else self.build(signature)
+        return self.tree
+
+    def get_statements(self, statement_ids):
+        if get_read_engine(self.chatbot.storage) is None:
+            return [
+                statement for statement_id in statement_ids
+                for statement in self.chatbot.storage.filter(id=statement_id)
+            ]
+
+        StatementModel = self.chatbot.storage.get_model('statement')
+
+        session = self.chatbot.storage.Session()
+        try:
+            models = session.query(StatementModel).filter(StatementModel.id.in_(statement_ids))
+            return [self.chatbot.storage.model_to_object(model) for model in models]
+        finally:
+            session.close()
+
+    def search(self, input_statement, **additional_parameters):
+        """
+        Search for close matches to the input. Confidence scores for
+        subsequent results will order of increasing value.
+
+        :param input_statement: A statement.
+        :type input_statement: chatterbot.conversation.Statement
+
+        :param **additional_parameters: Statement attributes the results must
+            match, ``tags`` matches statements with any of the given tags.
+
+        :rtype: Generator yielding one closest matching statement at a time.
+        """
+        if not input_statement.text:
+            return
+
+        text = normalize(input_statement.text, self.maximum_length)
+        tree = self.get_tree()
+
+        statement_ids = []
+        for node, distance in tree.search(text, get_search_radius(len(text), self.minimum_similarity)):
+            # The radius allows for the longest possible match, shorter texts need to be closer
+            if distance <= get_maximum_distance(len(text) + len(tree.texts[node]), self.minimum_similarity):
+                statement_ids.extend(tree.ids[node])
+
+        if not statement_ids:
+            return
+
+        results = []
+        for statement in self.get_statements(statement_ids):
+            if statement_matches(statement, additional_parameters):
+                statement.confidence = self.compare_statements(input_statement, statement)
+                results.append(statement)
+
+        results.sort(key=lambda statement: (statement.confidence, statement.id))
+
+        closest_confidence = 0
+        for statement in results:
+            if statement.confidence > closest_confidence:
+                closest_confidence = statement.confidence
+                yield statement
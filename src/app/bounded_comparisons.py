@@ -0,0 +1,172 @@
+"""
+A LevenshteinDistance that only pays for comparisons that can reach the
+similarity threshold.
+
+``LevenshteinDistance`` rounds ``2 * matches / total length`` to two decimal
+places. The number of insertions and deletions needed to turn one text into
+the other can only be ``total length - 2 * matches`` or more, so the
+threshold gives a maximum distance. Pairs whose difference in length is
+already over it are rejected without looking at the text. The other pairs are
+checked with rapidfuzz's banded distance computation, which gives up once the
+maximum is exceeded, or with a cheaper lower bound of the distance when
+rapidfuzz is not installed. Only pairs that pass are scored like
+``LevenshteinDistance`` does.
+
+``SearchMatch`` sets the minimum similarity of its comparator to its own
+maximum similarity threshold, so only pairs that could not have reached the
+threshold are rejected. They score 0 rather than their similarity, though,
+and ``SearchMatch`` answers from its best candidate even when it is under the
+threshold, so answers can change. chatbot.py only uses it when
+``settings.BOUNDED_COMPARISON`` is on.
+
+chatterbot 1.0.5 and later take the class of a comparator as the statement
+comparison function and create it with the tagger's language, while 1.0.4
+takes a comparator that was already created and whose class takes no
+arguments. ``get_comparison_function`` gives the installed version what it
+expects, and ``get_comparator`` creates a comparator from either.
+"""
+import inspect
+from collections import Counter
+from chatterbot import languages
+from chatterbot.comparisons import Comparator, LevenshteinDistance, SequenceMatcher
+import settings
+
+# Uses rapidfuzz's bit-parallel implementation when it is installed
+try:
+    from rapidfuzz.distance import Indel
+except ImportError:
+    Indel = None
+
+
+# Similarities are rounded, so a pair this far under the threshold can still reach it
+ROUNDING_MARGIN = 0.005 + 1e-9
+
+# chatterbot 1.0.4's Comparator has no __init__ of its own
+COMPARATORS_TAKE_LANGUAGE = Comparator.__init__ is not object.__init__
+
+
+def get_comparator(statement_comparison_function, language):
+    """
+        Gets a comparator to call with two statements from a statement
+        comparison function given either as a comparator or as its class
+    """
+    if not isinstance(statement_comparison_function, type):
+        return statement_comparison_function
+
+    if 'language' in inspect.signature(statement_comparison_function).parameters:
+        return statement_comparison_function(language=language)
+
+    return statement_comparison_function()
+
+
+def get_comparison_function(comparator_class, language=languages.ENG):
+    """
+        Gets the statement comparison function the installed chatterbot
+        takes for a class of comparator
+    """
+    if COMPARATORS_TAKE_LANGUAGE:
+        return comparator_class
+
+    return get_comparator(comparator_class, language)
+
+
+def get_maximum_distance(total_length, minimum_similarity):
+    """
+        Gets the largest distance at which two texts with this total length
+        can still be at least minimum_similarity alike
+    """
+    return int(total_length * (1 - minimum_similarity + ROUNDING_MARGIN))
+
+
+def get_bag_distance(text, other_text):
+    """
+        Counts the characters one text has more of than the other. No
+        sequence of insertions and deletions can be shorter.
+    """
+    counts = Counter(text)
+    counts.subtract(other_text)
+    return sum(map(abs, counts.values()))
+
+
+def exceeds_distance(text, other_text, maximum_distance):
+    """
+        Checks if more than maximum_distance insertions and deletions are
+        needed to turn text into other_text
+    """
+    if Indel is not None:
+        # Only computes the band of the matrix the maximum allows, stopping once it is exceeded
+        return Indel.distance(text, other_text, score_cutoff=maximum_distance) > maximum_distance
+
+    # A distance computed in Python would cost more than the comparison it saves
+    return get_bag_distance(text, other_text) > maximum_distance
+
+
+class BoundedLevenshteinDistance(LevenshteinDistance):
+    """
+    Compares statements like ``LevenshteinDistance``, but returns 0 for
+    pairs that cannot be at least ``minimum_similarity`` alike without
+    scoring them.
+
+    Every pair at or over ``minimum_similarity`` gets exactly the same
+    similarity as with ``LevenshteinDistance``, as long as neither text is
+    longer than ``maximum_length``.
+
+    :param minimum_similarity: The similarity below which pairs are rejected.
+        Defaults to 0.95, the logic adapters' default maximum similarity threshold.
+
+    :param maximum_length: Texts are cut to this many characters before they
+        are compared. Defaults to ``settings.COMPARISON_MAX_LENGTH``.
+    """
+
+    def __init__(self, language=None, minimum_similarity=0.95, maximum_length=None):
+        if COMPARATORS_TAKE_LANGUAGE:
+            super().__init__(language)
+        else:
+            super().__init__()
+            self.language = language
+
+        if maximum_length is None:
+            maximum_length = settings.COMPARISON_MAX_LENGTH
+
+        self.minimum_similarity = minimum_similarity
+        self.maximum_length = maximum_length
+
+    def compare(self, statement, other_statement):
+        """
+        Compare the two input statements.
+
+        :return: The percent of similarity between the text of the statements,
+            or 0 when it is under the minimum similarity.
+        :rtype: float
+        """
+
+        # Return 0 if either statement has a falsy text value
+        if not statement.text or not other_statement.text:
+            return 0
+
+        statement_text = str(statement.text.lower())[:self.maximum_length]
+        other_statement_text = str(other_statement.text.lower())[:self.maximum_length]
+
+        maximum_distance = get_maximum_distance(
+            len(statement_text) + len(other_statement_text), self.minimum_similarity
+        )
+
+        if abs(len(statement_text) - len(other_statement_text)) > maximum_distance:
+            return 0
+
+        if exceeds_distance(statement_text, other_statement_text, maximum_distance):
+            return 0
+
+        similarity = SequenceMatcher(
+            None,
+            statement_text,
+            other_statement_text
+        )
+
+        percent = round(similarity.ratio(), 2)
+
+        # The distance check lets through some pairs that round to just under the threshold
+        if percent < self.minimum_similarity:
+            return 0
+
+        return percent
@@ -0,0 +1,206 @@
+import atexit
+import logging
+import threading
+from sqlite_storage import SQLiteStorageAdapter
+
+
+class StatementWriteBuffer(object):
+    """
+    Queues statements in memory and hands them to a flush function in
+    batches from a background thread.
+
+    :param flush_function: Called with a list of statements on every flush.
+    :type flush_function: collections.abc.Callable
+
+    :param batch_size: Flush as soon as this many statements are queued.
+
+    :param flush_interval: The number of seconds to wait between flushes
+        when the batch size has not been reached.
+    """
+
+    def __init__(self, flush_function, batch_size=100, flush_interval=5.0, logger=None):
+        self.flush_function = flush_function
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.logger = logger or logging.getLogger(__name__)
+
+        self._pending = []
+        self._closed = False
+        self._condition = threading.Condition()
+        self._flush_lock = threading.Lock()
+
+        self._thread = threading.Thread(
+            target=self._run,
+            name='statement-write-buffer',
+            daemon=True
+        )
+        self._thread.start()
+
+        # Anything still queued when the interpreter exits is flushed
+        atexit.register(self.close)
+
+    def __len__(self):
+        with self._condition:
+            return len(self._pending)
+
+    def add(self, statement):
+        """
+        Queue a statement to be written on the next flush.
+        """
+        with self._condition:
+            closed = self._closed
+            if not closed:
+                self._pending.append(statement)
+                if len(self._pending) >= self.batch_size:
+                    self._condition.notify()
+
+        # Once the buffer is closed there is no thread left to flush it
+        if closed:
+            self.flush_function([statement])
+
+    def flush(self):
+        """
+        Write every queued statement in a single batch.
+        """
+        with self._flush_lock:
+            with self._condition:
+                batch, self._pending = self._pending, []
+
+            if not batch:
+                return
+
+            try:
+                self.flush_function(batch)
+            except Exception:
+                self.logger.exception('Unable to flush %d buffered statements', len(batch))
+            else:
+                self.logger.debug('Flushed %d buffered statements', len(batch))
+
+    def clear(self):
+        """
+        Discard every queued statement without writing it.
+        """
+        with self._condition:
+            self._pending = []
+
+    def close(self):
+        """
+        Stop the background thread after a final flush.
+        """
+        with self._condition:
+            if self._closed:
+                return
+            self._closed = True
+            self._condition.notify()
+
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                if not self._closed and len(self._pending) < self.batch_size:
+                    self._condition.wait(self.flush_interval)
+                closed = self._closed
+
+            self.flush()
+
+            if closed:
+                return
+
+
+class WriteBehindSQLStorageAdapter(SQLiteStorageAdapter):
+    """
+    A SQLiteStorageAdapter that keeps statements created while chatting out of
+    the request path. New statements are queued in memory and written with
+    ``create_many`` from a background thread, so a single transaction covers
+    a whole batch. Statements are not visible to ``filter`` until they have
+    been flushed.
+
+    :keyword write_behind_batch_size: Flush once this many statements are queued.
+        Defaults to 100.
+    :type write_behind_batch_size: int
+
+    :keyword write_behind_interval: Maximum number of seconds between flushes.
+        Defaults to 5.
+    :type write_behind_interval: float
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+
+        self.write_buffer = StatementWriteBuffer(
+            self.write_statements,
+            batch_size=kwargs.get('write_behind_batch_size', 100),
+            flush_interval=kwargs.get('write_behind_interval', 5.0),
+            logger=self.logger
+        )
+
+    def create(self, **kwargs):
+        """
+        Queues a new statement matching the keyword arguments specified.
+        Returns the statement that will be created.
+        """
+        Statement = self.get_object('statement')
+
+        tags = kwargs.pop('tags', [])
+
+        statement = Statement(**kwargs)
+        statement.add_tags(*tags)
+
+        self.write_buffer.add(statement)
+
+        return statement
+
+    def write_statements(self, statements):
+        """
+        Called from the background thread with each batch of queued statements.
+        """
+        self.create_many(statements)
+
+    def flush(self):
+        """
+        Write every queued statement to the database now.
+        """
+        self.write_buffer.flush()
+
+    def close(self):
+        """
+        Flush any queued statements and stop the background writer.
+        """
+        self.write_buffer.close()
+
+    def drop(self):
+        """
+        Drop the database, including statements that have not been flushed.
+        """
+        self.write_buffer.clear()
+        super().drop()
+
+
+class ReadOnlySQLStorageAdapter(SQLiteStorageAdapter):
+    """
+    A SQLiteStorageAdapter for nodes that only serve answers from the knowledge
+    base. Every method that would write to the database is ignored.
+    """
+
+    def create(self, **kwargs):
+        Statement = self.get_object('statement')
+
+        tags = kwargs.pop('tags', [])
+
+        statement = Statement(**kwargs)
+        statement.add_tags(*tags)
+
+        return statement
+
+    def create_many(self, statements):
+        pass
+
+    def update(self, statement):
+        pass
+
+    def remove(self, statement_text):
+        pass
+
+    def drop(self):
+        pass
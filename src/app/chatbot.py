@@ -1,15 +1,52 @@
 from chatterbot import ChatBot
-from chatterbot.trainers import ChatterBotCorpusTrainer
 from chatterbot.response_selection import get_most_frequent_response
-import logging
+import settings
+import structured_logging
+import schema_maintenance
+import tracing
+from intent_router import IntentRouter
+from parallel_training import ParallelCorpusTrainer
 from chatterbot.comparisons import LevenshteinDistance
+from bounded_comparisons import BoundedLevenshteinDistance, get_comparison_function
 
-logging.basicConfig(level=logging.INFO)
+structured_logging.configure()
+
+# The bounded comparison is faster but changes answers, see settings.BOUNDED_COMPARISON
+statement_comparison_function = get_comparison_function(
+    BoundedLevenshteinDistance if settings.BOUNDED_COMPARISON else LevenshteinDistance
+)
+
+storage_adapters = {
+    'sync': 'sqlite_storage.SQLiteStorageAdapter',
+    'write_behind': 'buffered_storage.WriteBehindSQLStorageAdapter',
+    'read_only': 'buffered_storage.ReadOnlySQLStorageAdapter',
+    'conversation_log': 'conversation_log.ConversationLogStorageAdapter',
+    'prebuilt': 'knowledge_base.KnowledgeBaseStorageAdapter',
+    'in_memory': 'memory_storage.InMemoryStorageAdapter'
+}
+
+# Modes that serve a knowledge base that has already been trained, the in-memory
+# mode can not train or learn with its writes disabled
+read_only = settings.KNOWLEDGE_BASE_MODE in ('read_only', 'prebuilt') or (
+    settings.KNOWLEDGE_BASE_MODE == 'in_memory' and not settings.IN_MEMORY_WRITES
+)
+
+intent_router = None
+if settings.INTENT_ROUTER_ENABLED:
+    intent_router = IntentRouter.from_corpus("../training_data/")
 
 # Creating ChatBot Instance
 chatbot = ChatBot(
     'DCUBuddy',
-    storage_adapter='chatterbot.storage.SQLStorageAdapter',
+    storage_adapter=storage_adapters[settings.KNOWLEDGE_BASE_MODE],
+    read_only=read_only,
+    knowledge_base_path=settings.KNOWLEDGE_BASE_PATH,
+    backing_storage_adapter=settings.IN_MEMORY_BACKING_STORE,
+    in_memory_writes=settings.IN_MEMORY_WRITES,
+    write_behind_batch_size=settings.WRITE_BEHIND_BATCH_SIZE,
+    write_behind_interval=settings.WRITE_BEHIND_INTERVAL,
+    # chatterbot's own search algorithms are created with the chat bot's arguments
+    statement_comparison_function=statement_comparison_function,
     preprocessors=[
         'chatterbot.preprocessors.clean_whitespace',
         'chatterbot.preprocessors.unescape_html'
@@ -19,12 +56,32 @@ chatbot = ChatBot(
         {
             'import_path': 'search_all_adapter.SearchMatch',
             'default_response': 'I am sorry, but I do not understand. I am still learning. <br><br> Please contact: mark.queypo2@mail.dcu.ie or conor.marsh2@mail.dcu.ie if you have any errors or any queries I should know.',
-            "statement_comparison_function": LevenshteinDistance,
-            'maximum_similarity_threshold': 0.90
+            "statement_comparison_function": statement_comparison_function,
+            'maximum_similarity_threshold': 0.90,
+            'intent_router': intent_router,
+            'intent_confidence_threshold': settings.INTENT_ROUTER_THRESHOLD,
+            'search_algorithm': settings.SEARCH_ALGORITHM,
+            'spacy_model': settings.SPACY_MODEL,
+            'embedding_matrix_path': settings.EMBEDDING_MATRIX_PATH,
+            'bk_tree_path': settings.BK_TREE_PATH
         }
     ],
     database_uri='sqlite:///database.sqlite3'
 )
 
-trainer = ChatterBotCorpusTrainer(chatbot)
-trainer.train("../training_data/")
\ No newline at end of file
+if not read_only:
+    trainer = ParallelCorpusTrainer(chatbot, workers=settings.TRAINING_WORKERS)
+    trainer.train("../training_data/")
+
+# Preprocessors are chatterbot functions, so they are timed by wrapping them,
+# after training so only requests are counted
+chatbot.preprocessors = [tracing.traced('preprocessors')(preprocessor) for preprocessor in chatbot.preprocessors]
+
+# The in-memory adapter keeps its statements in another storage adapter's database
+database = getattr(chatbot.storage, 'backing_storage', chatbot.storage)
+
+# Only the node that trains the knowledge base writes to it, compiled knowledge
+# bases already have their indexes
+if not read_only:
+    schema_maintenance.prepare(database.engine)
+    maintenance = schema_maintenance.MaintenanceScheduler(database.engine).start()
\ No newline at end of file
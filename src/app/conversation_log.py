@@ -0,0 +1,197 @@
+"""
+An append-only store for conversation history, kept apart from the
+statement table that ``SearchMatch`` searches.
+
+History is written as JSON lines to gzip compressed segment files. A new
+segment is started when the current one grows too large or too old, so
+old history can be archived or removed one file at a time. Search cost
+then depends only on the trained corpus and the statements that have been
+explicitly promoted into it.
+"""
+import os
+import gzip
+import glob
+import json
+import time
+import threading
+import datetime
+from buffered_storage import WriteBehindSQLStorageAdapter
+import settings
+
+
+# Statements promoted from the log are stored under this conversation name
+PROMOTED_CONVERSATION = 'promoted'
+
+# Conversations whose statements belong in the searchable knowledge base
+SEARCHABLE_CONVERSATIONS = ('training', PROMOTED_CONVERSATION)
+
+
+class ConversationLog(object):
+    """
+    A rotating, compressed, append-only log of statements.
+
+    :param directory: The directory segment files are written to.
+
+    :param max_bytes: Start a new segment once the current one reaches this size.
+
+    :param max_age: Start a new segment once the current one is this many seconds old.
+
+    :param retention: The number of segments to keep, 0 keeps every segment.
+    """
+
+    segment_prefix = 'conversations-'
+    segment_suffix = '.jsonl.gz'
+
+    def __init__(self, directory=None, max_bytes=None, max_age=None, retention=None):
+        self.directory = directory or settings.CONVERSATION_LOG_DIRECTORY
+        self.max_bytes = settings.CONVERSATION_LOG_MAX_BYTES if max_bytes is None else max_bytes
+        self.max_age = settings.CONVERSATION_LOG_MAX_AGE if max_age is None else max_age
+        self.retention = settings.CONVERSATION_LOG_RETENTION if retention is None else retention
+
+        self.segment_path = None
+        self.segment_started = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(self.directory, exist_ok=True)
+
+    def get_segments(self):
+        """
+        Return the paths of every segment, oldest first.
+        """
+        return sorted(glob.glob(os.path.join(
+            self.directory, self.segment_prefix + '*' + self.segment_suffix
+        )))
+
+    def append(self, statements):
+        """
+        Append a batch of statements to the current segment.
+        """
+        lines = ''.join(
+            json.dumps(statement.serialize(), default=str) + '\n' for statement in statements
+        )
+
+        if not lines:
+            return
+
+        with self._lock:
+            if self._should_rotate():
+                self._rotate()
+
+            # Each append adds a gzip member, which gzip reads back as one stream
+            with gzip.open(self.segment_path, 'at', encoding='utf-8') as segment:
+                segment.write(lines)
+
+    def read(self):
+        """
+        Yield every logged statement as a dictionary, oldest first.
+        """
+        for path in self.get_segments():
+            with gzip.open(path, 'rt', encoding='utf-8') as segment:
+                for line in segment:
+                    if line.strip():
+                        yield json.loads(line)
+
+    def _should_rotate(self):
+        if self.segment_path is None or not os.path.exists(self.segment_path):
+            return True
+
+        if time.time() - self.segment_started >= self.max_age:
+            return True
+
+        return os.path.getsize(self.segment_path) >= self.max_bytes
+
+    def _rotate(self):
+        timestamp = datetime.datetime.utcnow().strftime('%Y%m%d-%H%M%S-%f')
+
+        self.segment_path = os.path.join(
+            self.directory, self.segment_prefix + timestamp + self.segment_suffix
+        )
+        self.segment_started = time.time()
+
+        if self.retention:
+            # Keep room for the segment that is about to be created
+            for path in self.get_segments()[:-(self.retention - 1) or None]:
+                os.remove(path)
+
+
+class ConversationLogStorageAdapter(WriteBehindSQLStorageAdapter):
+    """
+    A storage adapter that writes statements learned while chatting to a
+    ``ConversationLog`` instead of the statement table. Statements created
+    in bulk, such as by corpus training, are still written to the database.
+
+    :keyword conversation_log_directory: The directory for log segments.
+        Defaults to ``settings.CONVERSATION_LOG_DIRECTORY``.
+    :type conversation_log_directory: str
+    """
+
+    def __init__(self, **kwargs):
+        self.conversation_log = ConversationLog(
+            directory=kwargs.get('conversation_log_directory')
+        )
+
+        super().__init__(**kwargs)
+
+    def write_statements(self, statements):
+        self.conversation_log.append(statements)
+
+
+def archive_learned_statements(storage, conversation_log):
+    """
+    Move every statement that is not part of the searchable knowledge base
+    from the statement table into the conversation log.
+
+    Returns the number of statements archived.
+    """
+    Statement = storage.get_model('statement')
+
+    session = storage.Session()
+
+    try:
+        models = session.query(Statement).filter(
+            ~Statement.conversation.in_(SEARCHABLE_CONVERSATIONS)
+        ).order_by(Statement.id).all()
+
+        statements = [storage.model_to_object(model) for model in models]
+
+        conversation_log.append(statements)
+
+        # Only the rows written to the log are deleted, not ones learned since they were read
+        for model in models:
+            session.delete(model)
+
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+
+    return len(statements)
+
+
+def promote_statements(storage, records):
+    """
+    Add logged statements to the searchable knowledge base.
+
+    :param records: Dictionaries as yielded by ``ConversationLog.read``.
+    """
+    Statement = storage.get_object('statement')
+
+    statements = []
+
+    for record in records:
+        statement = Statement(
+            text=record['text'],
+            in_response_to=record.get('in_response_to'),
+            search_text=record.get('search_text', ''),
+            search_in_response_to=record.get('search_in_response_to', ''),
+            persona=record.get('persona', ''),
+            conversation=PROMOTED_CONVERSATION
+        )
+        statement.add_tags(*record.get('tags', []))
+        statements.append(statement)
+
+    storage.create_many(statements)
+
+    return len(statements)
@@ -0,0 +1,87 @@
+"""
+Per-user state of the conversations with the chat bot.
+
+Some answers are prompts the corpus continues from, such as "Sure, what
+campus?" after "can you show me the map?". /get remembers the last prompt
+each user was given and passes it to ``get_response`` with the user's next
+message as ``in_response_to``, so ``SearchMatch`` first compares the message
+with the few replies the corpus has to that prompt instead of searching the
+whole knowledge base.
+"""
+import time
+import threading
+from response_cache import ResponseCache
+
+
+def get_prompts(storage):
+    """
+        Gets the search text of every trained statement that the corpus has
+        a reply to, by its text
+    """
+    return {
+        statement.in_response_to: statement.search_in_response_to
+        for statement in storage.filter(conversation='training', persona_not_startswith='bot:')
+        if statement.in_response_to
+    }
+
+
+class ConversationStateStore(ResponseCache):
+    """
+    The last prompt the chat bot gave each user, kept for ``ttl`` seconds
+    and for at most ``maximum_size`` users.
+
+    Only answers that the trained corpus has replies to are remembered.
+    The prompts are loaded from the chat bot's storage once for each
+    version of the knowledge base.
+
+    :param chatbot: The chat bot whose prompts are remembered.
+    """
+
+    def __init__(self, chatbot, maximum_size, ttl, clock=time.monotonic):
+        super().__init__(maximum_size, ttl=ttl, clock=clock, name='conversation')
+
+        self.chatbot = chatbot
+
+        self.prompts = {}
+        self.prompts_version = None
+        self._prompts_lock = threading.Lock()
+
+    def get_prompts(self, version):
+        with self._prompts_lock:
+            if version != self.prompts_version:
+                self.prompts = get_prompts(self.chatbot.storage)
+                self.prompts_version = version
+        return self.prompts
+
+    def set_prompt(self, user_id, text, version):
+        """
+            Remembers the answer as the user's last prompt when it is one
+        """
+        search_text = self.get_prompts(version).get(text)
+
+        if search_text is not None:
+            self.set(user_id, (text, search_text), version)
+
+    def has_prompt(self, user_id, version):
+        """
+            Whether the user has a prompt, without using it up or counting
+            a lookup
+        """
+        with self._lock:
+            self._use_version(version)
+            entry = self.entries.get(user_id)
+
+        return entry is not None and (entry[1] is None or entry[1] > self.clock())
+
+    def pop_prompt(self, user_id, version):
+        """
+            Returns the text and search text of the user's last prompt and
+            forgets it, or None when there is none
+        """
+        prompt = self.get(user_id, version)
+
+        if prompt is not None:
+            with self._lock:
+                self.entries.pop(user_id, None)
+
+        return prompt
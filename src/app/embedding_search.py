@@ -0,0 +1,243 @@
+"""
+A search algorithm that matches inputs to statements by the cosine
+similarity of their spaCy document vectors, so paraphrases that share few
+words with a known statement can still be found.
+
+The vectors of every searchable statement are stored as the rows of an
+L2-normalized matrix in a ``.npy`` file, with the statement ids in a second
+file next to it. Both are opened with ``mmap_mode='r'`` so every worker
+process shares the same pages instead of computing or loading its own copy.
+"""
+import os
+import tempfile
+import numpy
+from sqlite_storage import get_read_engine
+
+
+def get_ids_path(matrix_path):
+    root, extension = os.path.splitext(matrix_path)
+    return root + '.ids' + extension
+
+
+def normalize(vectors):
+    norms = numpy.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1
+    return vectors / norms
+
+
+def save_array(path, array):
+    """
+        Saves an array through a temporary file of this process's own, so
+        other workers never map a partial file and workers rebuilding at the
+        same time never write to the same file
+    """
+    directory, name = os.path.split(os.path.abspath(path))
+    descriptor, temporary_path = tempfile.mkstemp(prefix=name + '.', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(descriptor, 'wb') as array_file:
+            numpy.save(array_file, array)
+        os.replace(temporary_path, path)
+    except BaseException:
+        os.remove(temporary_path)
+        raise
+
+
+def get_parameters_key(parameters):
+    return tuple(sorted(
+        (name, tuple(value) if isinstance(value, (list, set, tuple)) else value)
+        for name, value in parameters.items()
+    ))
+
+
+def statement_matches(statement, parameters):
+    for name, value in parameters.items():
+        if name == 'tags':
+            tags = [value] if isinstance(value, str) else value
+            if not set(tags).intersection(statement.get_tags()):
+                return False
+        elif getattr(statement, name) != value:
+            return False
+    return True
+
+
+class EmbeddingSearch(object):
+    """
+    A search algorithm that ranks statements by the cosine similarity of
+    their spaCy document vectors to the input's, with one matrix-vector
+    product per search. The similarity is used as the confidence.
+
+    The matrix is rebuilt when the searchable statements in the database no
+    longer match the saved ids, so statements learned after startup are
+    only found by this algorithm once it is rebuilt.
+
+    :param spacy_model: The name of a spaCy model with word vectors.
+        Defaults to ``en_core_web_md``.
+
+    :param nlp: An already loaded spaCy pipeline, used instead of ``spacy_model``.
+
+    :param embedding_matrix_path: Where the normalized matrix is saved.
+        Defaults to ``statement_vectors.npy``.
+
+    :param max_candidates: The number of most similar statements that are
+        returned. Statements that do not match the search's parameters are
+        left out before they are counted. Defaults to 10.
+    """
+
+    name = 'embedding_search'
+
+    def __init__(self, chatbot, **kwargs):
+        self.chatbot = chatbot
+
+        self.nlp = kwargs.get('nlp')
+
+        if self.nlp is None:
+            import spacy
+            self.nlp = spacy.load(kwargs.get('spacy_model', 'en_core_web_md'))
+
+        self.matrix_path = kwargs.get('embedding_matrix_path', 'statement_vectors.npy')
+        self.ids_path = get_ids_path(self.matrix_path)
+
+        self.max_candidates = kwargs.get('max_candidates', 10)
+
+        self.matrix = None
+        self.ids = None
+
+        # The rows of the statements that match each set of search parameters
+        self.masks = {}
+
+    def get_signature(self):
+        """
+            Gets the number and largest id of the statements that can be searched
+        """
+        engine = get_read_engine(self.chatbot.storage)
+
+        if engine is None:
+            statement_ids = [
+                statement.id for statement in self.chatbot.storage.filter(persona_not_startswith='bot:')
+            ]
+            return len(statement_ids), max(statement_ids, default=0)
+
+        with engine.connect() as connection:
+            count, max_id = connection.execute(
+                "SELECT count(*), max(id) FROM statement WHERE persona NOT LIKE 'bot:%'"
+            ).first()
+        return count, max_id or 0
+
+    def build(self):
+        """
+            Computes the vectors of every searchable statement and saves them
+        """
+        statements = list(self.chatbot.storage.filter(persona_not_startswith='bot:'))
+
+        vectors = numpy.zeros((len(statements), self.nlp.vocab.vectors_length), dtype=numpy.float32)
+
+        for row, document in enumerate(self.nlp.pipe(statement.text for statement in statements)):
+            vectors[row] = document.vector
+
+        ids = numpy.array([statement.id for statement in statements], dtype=numpy.int64)
+
+        save_array(self.matrix_path, normalize(vectors))
+        save_array(self.ids_path, ids)
+
+        self.chatbot.logger.info('Computed vectors for {} statements'.format(len(statements)))
+
+    def load(self):
+        self.masks = {}
+
+        if os.path.exists(self.matrix_path) and os.path.exists(self.ids_path):
+            ids = numpy.load(self.ids_path, mmap_mode='r')
+            saved_signature = (len(ids), int(ids.max()) if len(ids) else 0)
+
+            if saved_signature == self.get_signature():
+                self.ids = ids
+                self.matrix = numpy.load(self.matrix_path, mmap_mode='r')
+                return
+
+        self.build()
+        self.ids = numpy.load(self.ids_path, mmap_mode='r')
+        self.matrix = numpy.load(self.matrix_path, mmap_mode='r')
+
+    def get_mask(self, parameters):
+        """
+            Gets which rows of the matrix are statements matching the parameters
+        """
+        key = get_parameters_key(parameters)
+        mask = self.masks.get(key)
+
+        if mask is None:
+            statement_ids = [
+                statement.id for statement in self.chatbot.storage.filter(
+                    persona_not_startswith='bot:', **parameters
+                )
+            ]
+            mask = numpy.isin(self.ids, statement_ids)
+            self.masks[key] = mask
+
+        return mask
+
+    def get_statements(self, statement_ids):
+        if get_read_engine(self.chatbot.storage) is None:
+            return {
+                statement.id: statement for statement_id in statement_ids
+                for statement in self.chatbot.storage.filter(id=statement_id)
+            }
+
+        StatementModel = self.chatbot.storage.get_model('statement')
+
+        session = self.chatbot.storage.Session()
+        try:
+            models = session.query(StatementModel).filter(StatementModel.id.in_(statement_ids))
+            return {
+                model.id: self.chatbot.storage.model_to_object(model) for model in models
+            }
+        finally:
+            session.close()
+
+    def search(self, input_statement, **additional_parameters):
+        """
+        Search for close matches to the input. Confidence scores for
+        subsequent results will order of increasing value.
+
+        :param input_statement: A statement.
+        :type input_statement: chatterbot.conversation.Statement
+
+        :param **additional_parameters: Statement attributes the results must
+            match, ``tags`` matches statements with any of the given tags.
+
+        :rtype: Generator yielding one closest matching statement at a time.
+        """
+        if self.matrix is None:
+            self.load()
+
+        vector = normalize(self.nlp(input_statement.text).vector.astype(numpy.float32))
+
+        if not len(self.ids) or not vector.any():
+            return
+
+        similarities = self.matrix @ vector
+        rows = numpy.arange(len(similarities))
+
+        # Only statements matching the parameters are ranked, so the best of them are never crowded out
+        if additional_parameters:
+            rows = rows[self.get_mask(additional_parameters)]
+
+            if not len(rows):
+                return
+
+        count = min(self.max_candidates, len(rows))
+        top = rows[numpy.argpartition(-similarities[rows], count - 1)[:count]]
+
+        # Least similar first, so the last result is the closest match
+        top = top[numpy.argsort(similarities[top])]
+
+        statements = self.get_statements([int(self.ids[row]) for row in top])
+
+        for row in top:
+            statement = statements.get(int(self.ids[row]))
+
+            if statement is None or not statement_matches(statement, additional_parameters):
+                continue
+
+            statement.confidence = float(similarities[row])
+
+            yield statement
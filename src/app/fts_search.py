@@ -0,0 +1,215 @@
+"""
+A search algorithm backed by an SQLite FTS5 index of the statement table.
+
+``statement_fts`` is an external content FTS5 table over ``statement.text``
+and ``statement.search_text``, so the indexed text is not stored twice.
+Triggers on ``statement`` keep it up to date, whichever adapter or tool
+writes to the knowledge base.
+"""
+import re
+from sqlalchemy import text
+from chatterbot.conversation import Statement
+from bounded_comparisons import get_comparator
+
+
+FTS_TABLE = 'statement_fts'
+
+# search_text tokens such as "VB:show" are kept whole instead of being split on ':'
+FTS_SCHEMA = (
+    'CREATE VIRTUAL TABLE IF NOT EXISTS statement_fts USING fts5('
+    'text, search_text, content=\'statement\', content_rowid=\'id\', '
+    'tokenize="unicode61 tokenchars \':_\'")',
+
+    'CREATE TRIGGER IF NOT EXISTS statement_fts_insert AFTER INSERT ON statement BEGIN '
+    'INSERT INTO statement_fts(rowid, text, search_text) '
+    'VALUES (new.id, new.text, new.search_text); '
+    'END',
+
+    'CREATE TRIGGER IF NOT EXISTS statement_fts_delete AFTER DELETE ON statement BEGIN '
+    'INSERT INTO statement_fts(statement_fts, rowid, text, search_text) '
+    'VALUES (\'delete\', old.id, old.text, old.search_text); '
+    'END',
+
+    'CREATE TRIGGER IF NOT EXISTS statement_fts_update AFTER UPDATE ON statement BEGIN '
+    'INSERT INTO statement_fts(statement_fts, rowid, text, search_text) '
+    'VALUES (\'delete\', old.id, old.text, old.search_text); '
+    'INSERT INTO statement_fts(rowid, text, search_text) '
+    'VALUES (new.id, new.text, new.search_text); '
+    'END',
+)
+
+WORD_PATTERN = re.compile(r'\w+')
+
+
+def ensure_fts_index(engine):
+    """
+        Creates the FTS5 table and its triggers, indexing any statements
+        that were added before the table existed
+    """
+    with engine.connect() as connection:
+        exists = connection.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name",
+            {'name': FTS_TABLE}
+        ).scalar()
+
+    # Nothing is written when the index exists, so read-only databases can be searched
+    if exists:
+        return
+
+    with engine.begin() as connection:
+        for sql in FTS_SCHEMA:
+            connection.execute(sql)
+
+        connection.execute("INSERT INTO statement_fts(statement_fts) VALUES ('rebuild')")
+
+
+def quote(token):
+    return '"{}"'.format(token.replace('"', '""'))
+
+
+def get_match_expression(search_text, text=''):
+    """
+        Builds an FTS5 query matching any bigram token of the search text
+        or any word of the text
+    """
+    clauses = []
+
+    search_tokens = sorted(set(search_text.split()))
+    if search_tokens:
+        clauses.append('search_text : ({})'.format(' OR '.join(quote(token) for token in search_tokens)))
+
+    words = sorted(set(WORD_PATTERN.findall(text.lower())))
+    if words:
+        clauses.append('text : ({})'.format(' OR '.join(quote(word) for word in words)))
+
+    return ' OR '.join(clauses)
+
+
+class FTSSearch(object):
+    """
+    A search algorithm that asks the FTS5 index for the best ``max_candidates``
+    statements by BM25 rank and only compares those with the input.
+
+    :param statement_comparison_function: The dot-notated import path
+        to a statement comparison function.
+        Defaults to ``LevenshteinDistance``.
+
+    :param max_candidates: The number of top ranked statements that are
+        compared with the input. Defaults to 50.
+    """
+
+    name = 'fts_search'
+
+    def __init__(self, chatbot, **kwargs):
+        from chatterbot.comparisons import LevenshteinDistance
+
+        self.chatbot = chatbot
+
+        statement_comparison_function = kwargs.get(
+            'statement_comparison_function',
+            LevenshteinDistance
+        )
+
+        self.compare_statements = get_comparator(
+            statement_comparison_function, self.chatbot.storage.tagger.language
+        )
+
+        self.max_candidates = kwargs.get('max_candidates', 50)
+
+        ensure_fts_index(self.chatbot.storage.engine)
+
+    def get_candidate_ids(self, match_expression, tags=None):
+        """
+            Gets the ids of the best ranked statements that were not said by the bot
+        """
+        sql = (
+            'SELECT statement.id FROM statement_fts '
+            'JOIN statement ON statement.id = statement_fts.rowid '
+            'WHERE statement_fts MATCH :match '
+            "AND statement.persona NOT LIKE 'bot:%' "
+        )
+        parameters = {'match': match_expression, 'limit': self.max_candidates}
+
+        if tags:
+            names = []
+            for number, tag in enumerate(tags):
+                names.append(':tag{}'.format(number))
+                parameters['tag{}'.format(number)] = tag
+
+            sql += (
+                'AND statement.id IN ('
+                'SELECT tag_association.statement_id FROM tag_association '
+                'JOIN tag ON tag.id = tag_association.tag_id '
+                'WHERE tag.name IN ({})) '
+            ).format(', '.join(names))
+
+        sql += 'ORDER BY bm25(statement_fts) LIMIT :limit'
+
+        session = self.chatbot.storage.Session()
+        try:
+            return [row[0] for row in session.execute(text(sql), parameters)]
+        finally:
+            session.close()
+
+    def get_statements(self, statement_ids):
+        """
+            Gets the statements with the given ids in the same order
+        """
+        StatementModel = self.chatbot.storage.get_model('statement')
+
+        session = self.chatbot.storage.Session()
+        try:
+            models = session.query(StatementModel).filter(StatementModel.id.in_(statement_ids))
+            statements = {
+                model.id: self.chatbot.storage.model_to_object(model) for model in models
+            }
+        finally:
+            session.close()
+
+        return [statements[statement_id] for statement_id in statement_ids if statement_id in statements]
+
+    def search(self, input_statement, **additional_parameters):
+        """
+        Search for close matches to the input. Confidence scores for
+        subsequent results will order of increasing value.
+
+        :param input_statement: A statement.
+        :type input_statement: chatterbot.conversation.Statement
+
+        :param **additional_parameters: Statement attributes the results must
+            match, ``tags`` matches statements with any of the given tags.
+
+        :rtype: Generator yielding one closest matching statement at a time.
+        """
+        input_search_text = input_statement.search_text
+
+        if not input_search_text:
+            input_search_text = self.chatbot.storage.tagger.get_bigram_pair_string(
+                input_statement.text
+            )
+
+        match_expression = get_match_expression(input_search_text, input_statement.text)
+
+        if not match_expression:
+            return
+
+        tags = additional_parameters.pop('tags', None)
+        if isinstance(tags, str):
+            tags = [tags]
+
+        candidate_ids = self.get_candidate_ids(match_expression, tags)
+
+        closest_match = Statement(text='')
+        closest_match.confidence = 0
+
+        for statement in self.get_statements(candidate_ids):
+            if any(getattr(statement, name) != value for name, value in additional_parameters.items()):
+                continue
+
+            confidence = self.compare_statements(input_statement, statement)
+
+            if confidence > closest_match.confidence:
+                statement.confidence = confidence
+                closest_match = statement
+
+                yield closest_match
@@ -0,0 +1,132 @@
+"""
+A fast first-stage classifier that predicts which corpus category an input
+belongs to, so ``SearchMatch`` only has to search that category's statements.
+
+The model is a softmax regression over hashed word and character n-grams,
+trained from the ``categories`` of the YAML files in ``training_data/``.
+"""
+import re
+import zlib
+import io
+import yaml
+import numpy as np
+from chatterbot.corpus import list_corpus_files
+
+
+WORD_PATTERN = re.compile(r"[a-z0-9']+")
+
+
+def get_ngrams(text):
+    """
+        Word unigrams, word bigrams and character trigrams of the text
+    """
+    words = WORD_PATTERN.findall(text.lower())
+    ngrams = ['w:' + word for word in words]
+    ngrams.extend('b:' + first + ' ' + second for first, second in zip(words, words[1:]))
+    for word in words:
+        padded = '<' + word + '>'
+        ngrams.extend('c:' + padded[index:index + 3] for index in range(len(padded) - 2))
+    return ngrams
+
+
+def hash_features(text, n_features):
+    """
+        Returns an L2 normalised feature vector of hashed n-gram counts
+    """
+    vector = np.zeros(n_features, dtype=np.float32)
+    for ngram in get_ngrams(text):
+        # crc32 is stable between processes, unlike hash()
+        vector[zlib.crc32(ngram.encode('utf-8')) % n_features] += 1
+    norm = np.linalg.norm(vector)
+    if norm:
+        vector /= norm
+    return vector
+
+
+def load_labelled_corpus(*corpus_paths):
+    """
+        Returns the text of every statement in the corpora with the first category of its file
+    """
+    texts = []
+    labels = []
+    for corpus_path in corpus_paths:
+        for file_path in list_corpus_files(corpus_path):
+            with io.open(file_path, encoding='utf-8') as data_file:
+                data = yaml.safe_load(data_file)
+            categories = data.get('categories') or []
+            if not categories:
+                continue
+            for conversation in data.get('conversations', []):
+                for text in conversation:
+                    texts.append(str(text))
+                    labels.append(categories[0])
+    return texts, labels
+
+
+class IntentRouter(object):
+    """
+    Predicts the corpus category of an input statement.
+
+    :param n_features: The number of buckets n-grams are hashed into.
+
+    :param epochs: The number of full-batch gradient descent steps used in training.
+
+    :param learning_rate: The gradient descent step size.
+
+    :param regularization: The L2 penalty applied to the weights.
+    """
+
+    def __init__(self, n_features=4096, epochs=300, learning_rate=2.0, regularization=1e-4):
+        self.n_features = n_features
+        self.epochs = epochs
+        self.learning_rate = learning_rate
+        self.regularization = regularization
+
+        self.categories = []
+        self.weights = None
+        self.bias = None
+
+    @classmethod
+    def from_corpus(cls, *corpus_paths, **kwargs):
+        router = cls(**kwargs)
+        router.train(*load_labelled_corpus(*corpus_paths))
+        return router
+
+    def train(self, texts, labels):
+        self.categories = sorted(set(labels))
+        category_index = {category: index for index, category in enumerate(self.categories)}
+
+        features = np.vstack([hash_features(text, self.n_features) for text in texts])
+        targets = np.zeros((len(texts), len(self.categories)), dtype=np.float32)
+        targets[np.arange(len(labels)), [category_index[label] for label in labels]] = 1
+
+        self.weights = np.zeros((self.n_features, len(self.categories)), dtype=np.float32)
+        self.bias = np.zeros(len(self.categories), dtype=np.float32)
+
+        for _ in range(self.epochs):
+            gradient = (self._softmax(features @ self.weights + self.bias) - targets) / len(texts)
+            self.weights -= self.learning_rate * (
+                features.T @ gradient + self.regularization * self.weights
+            )
+            self.bias -= self.learning_rate * gradient.sum(axis=0)
+
+    def predict_proba(self, text):
+        """
+        Return the probability of each category for the text.
+        """
+        scores = hash_features(text, self.n_features) @ self.weights + self.bias
+        return dict(zip(self.categories, self._softmax(scores[np.newaxis])[0]))
+
+    def predict(self, text):
+        """
+        Return the most likely category for the text and its probability.
+        """
+        probabilities = self.predict_proba(text)
+        category = max(probabilities, key=probabilities.get)
+        return category, float(probabilities[category])
+
+    @staticmethod
+    def _softmax(scores):
+        scores = scores - scores.max(axis=1, keepdims=True)
+        exponents = np.exp(scores)
+        return exponents / exponents.sum(axis=1, keepdims=True)
@@ -0,0 +1,214 @@
+import threading
+from array import array
+from collections import Counter
+from sqlalchemy import event
+from chatterbot.conversation import Statement
+from bounded_comparisons import get_comparator
+
+
+class BigramIndex(object):
+    """
+    An inverted index from each bigram token of a statement's ``search_text``
+    to a compact array of the ids of the statements containing it.
+    """
+
+    def __init__(self):
+        self.postings = {}
+        self.statements = {}
+
+    def __len__(self):
+        return len(self.statements)
+
+    def add(self, statement):
+        self.statements[statement.id] = statement
+
+        for token in set(statement.search_text.split()):
+            self.postings.setdefault(token, array('I')).append(statement.id)
+
+    def remove(self, statement_id):
+        statement = self.statements.pop(statement_id, None)
+
+        if statement is None:
+            return
+
+        for token in set(statement.search_text.split()):
+            ids = self.postings.get(token)
+            if ids is not None and statement_id in ids:
+                ids.remove(statement_id)
+
+    def candidates(self, search_text, limit=None):
+        """
+        Return the ids of statements sharing a token with the search text,
+        ordered by the number of tokens they share.
+        """
+        overlap = Counter()
+
+        for token in set(search_text.split()):
+            overlap.update(self.postings.get(token, ()))
+
+        ranked = sorted(overlap.items(), key=lambda item: (-item[1], item[0]))
+
+        return [statement_id for statement_id, _ in ranked[:limit]]
+
+
+class InvertedIndexSearch(object):
+    """
+    A search algorithm that finds candidates in an in-memory ``BigramIndex``
+    instead of querying the database with ``search_text_contains``.
+
+    The index is built from the statement table on the first search and is
+    kept up to date as statements are inserted or deleted through the ORM,
+    so the storage adapter, or the in-memory adapter's backing storage
+    adapter, must be a SQL storage adapter.
+    Unlike ``IndexedTextSearch``, which matches bigrams as substrings of
+    ``search_text``, a candidate must share a whole bigram token.
+
+    :param statement_comparison_function: The dot-notated import path
+        to a statement comparison function.
+        Defaults to ``LevenshteinDistance``.
+
+    :param max_candidates: The maximum number of candidates, by token
+        overlap, that are compared with the input. Defaults to all of them.
+    """
+
+    name = 'inverted_index_search'
+
+    index_class = BigramIndex
+
+    def __init__(self, chatbot, **kwargs):
+        from chatterbot.comparisons import LevenshteinDistance
+
+        self.chatbot = chatbot
+
+        statement_comparison_function = kwargs.get(
+            'statement_comparison_function',
+            LevenshteinDistance
+        )
+
+        self.compare_statements = get_comparator(
+            statement_comparison_function, self.chatbot.storage.tagger.language
+        )
+
+        self.max_candidates = kwargs.get('max_candidates')
+
+        self.index = None
+        self._lock = threading.Lock()
+
+        self._listen_for_changes()
+
+    def build(self):
+        """
+        Load every statement from the database into a new index.
+        """
+        index = self.index_class()
+
+        for statement in self.chatbot.storage.filter():
+            if not statement.persona.startswith('bot:'):
+                index.add(statement)
+
+        with self._lock:
+            self.index = index
+
+        self.chatbot.logger.info('Indexed {} statements'.format(len(index)))
+
+    def get_index(self):
+        if self.index is None:
+            self.build()
+        return self.index
+
+    def get_search_key(self, input_statement):
+        """
+        Return the text the index is searched with.
+        """
+        if input_statement.search_text:
+            return input_statement.search_text
+
+        return self.chatbot.storage.tagger.get_bigram_pair_string(
+            input_statement.text
+        )
+
+    def search(self, input_statement, **additional_parameters):
+        """
+        Search for close matches to the input. Confidence scores for
+        subsequent results will order of increasing value.
+
+        :param input_statement: A statement.
+        :type input_statement: chatterbot.conversation.Statement
+
+        :param **additional_parameters: Statement attributes the results must
+            match, ``tags`` matches statements with any of the given tags.
+
+        :rtype: Generator yielding one closest matching statement at a time.
+        """
+        search_key = self.get_search_key(input_statement)
+
+        index = self.get_index()
+
+        with self._lock:
+            candidates = [
+                index.statements[statement_id]
+                for statement_id in index.candidates(search_key)
+            ]
+
+        closest_match = Statement(text='')
+        closest_match.confidence = 0
+
+        compared = 0
+
+        for statement in candidates:
+            if not self._matches(statement, additional_parameters):
+                continue
+
+            if self.max_candidates is not None and compared >= self.max_candidates:
+                break
+            compared += 1
+
+            confidence = self.compare_statements(input_statement, statement)
+
+            if confidence > closest_match.confidence:
+                # Indexed statements are shared between requests, so a copy is returned
+                closest_match = Statement(**statement.serialize())
+                closest_match.confidence = confidence
+
+                yield closest_match
+
+    def _matches(self, statement, parameters):
+        for name, value in parameters.items():
+            if name == 'tags':
+                tags = [value] if isinstance(value, str) else value
+                if not set(tags).intersection(statement.get_tags()):
+                    return False
+            elif getattr(statement, name) != value:
+                return False
+        return True
+
+    def _listen_for_changes(self):
+        # The in-memory adapter writes through the SQL storage adapter behind it
+        storage = getattr(self.chatbot.storage, 'backing_storage', self.chatbot.storage)
+
+        if getattr(storage, 'engine', None) is None:
+            raise ValueError(
+                '{} follows inserts and deletes through the ORM and needs a SQL storage adapter, '
+                '{} has no database engine'.format(type(self).__name__, type(storage).__name__)
+            )
+
+        Statement = storage.get_model('statement')
+        engine = storage.engine
+
+        def after_insert(mapper, connection, target):
+            if self.index is None or connection.engine is not engine:
+                return
+            if target.persona and target.persona.startswith('bot:'):
+                return
+            statement = storage.model_to_object(target)
+            with self._lock:
+                self.index.add(statement)
+
+        def after_delete(mapper, connection, target):
+            if self.index is None or connection.engine is not engine:
+                return
+            with self._lock:
+                self.index.remove(target.id)
+
+        event.listen(Statement, 'after_insert', after_insert)
+        event.listen(Statement, 'after_delete', after_delete)
@@ -0,0 +1,181 @@
+"""
+Prebuilt knowledge-base artifacts.
+
+``compile_knowledge_base`` trains a chat bot from the YAML corpus into a new
+SQLite file offline, adds the indexes from ``schema_maintenance``, the
+``fts_search`` index and fresh planner statistics, and records the format
+and version in a ``knowledge_base`` table. The version is a digest of the
+corpus, so compiling the same corpus again gives the same file name and an
+artifact can be promoted between environments unchanged.
+
+``KnowledgeBaseStorageAdapter`` opens an artifact as an immutable, read-only
+database with the whole file memory mapped. Worker processes share the
+mapped pages through the page cache, and startup only has to open the file.
+"""
+import io
+import os
+import time
+import shutil
+import sqlite3
+import hashlib
+import tempfile
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
+from chatterbot import ChatBot
+from chatterbot.corpus import list_corpus_files
+from buffered_storage import ReadOnlySQLStorageAdapter
+from parallel_training import ParallelCorpusTrainer
+import fts_search
+import schema_maintenance
+import settings
+
+
+ARTIFACT_FORMAT = '1'
+
+
+def get_corpus_version(*corpus_paths):
+    """
+        Gets a digest of the artifact format and the content of every corpus file
+    """
+    digest = hashlib.sha256(ARTIFACT_FORMAT.encode('utf-8'))
+    for corpus_path in corpus_paths:
+        for file_path in list_corpus_files(corpus_path):
+            digest.update(os.path.basename(file_path).encode('utf-8'))
+            with io.open(file_path, 'rb') as data_file:
+                digest.update(data_file.read())
+    return digest.hexdigest()[:16]
+
+
+def read_metadata(path):
+    connection = sqlite3.connect('file:{}?mode=ro'.format(path), uri=True)
+    try:
+        return dict(connection.execute('SELECT key, value FROM knowledge_base'))
+    finally:
+        connection.close()
+
+
+def compile_knowledge_base(corpus_paths, output_directory, **kwargs):
+    """
+        Trains a new artifact from the corpora and returns its path,
+        kwargs are passed to the chat bot and the trainer
+    """
+    version = get_corpus_version(*corpus_paths)
+    path = os.path.join(output_directory, 'knowledge_base-{}.sqlite3'.format(version))
+
+    directory = tempfile.mkdtemp(dir=output_directory)
+    try:
+        database_path = os.path.join(directory, 'knowledge_base.sqlite3')
+
+        chatbot = ChatBot(
+            'DCUBuddy',
+            storage_adapter='sqlite_storage.SQLiteStorageAdapter',
+            database_uri='sqlite:///' + database_path,
+            logic_adapters=[],
+            **kwargs
+        )
+
+        ParallelCorpusTrainer(chatbot, **kwargs).train(*corpus_paths)
+
+        statement_count = chatbot.storage.count()
+
+        engine = chatbot.storage.engine
+        schema_maintenance.ensure_indexes(engine)
+        fts_search.ensure_fts_index(engine)
+
+        with engine.begin() as connection:
+            connection.execute("INSERT INTO statement_fts(statement_fts) VALUES ('optimize')")
+            connection.execute('CREATE TABLE knowledge_base (key VARCHAR PRIMARY KEY, value VARCHAR)')
+            for key, value in (
+                ('format', ARTIFACT_FORMAT),
+                ('version', version),
+                ('created_at', time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())),
+                ('statements', str(statement_count)),
+            ):
+                connection.execute('INSERT INTO knowledge_base (key, value) VALUES (?, ?)', (key, value))
+
+        schema_maintenance.analyze(engine)
+
+        chatbot.storage.engine.dispose()
+        chatbot.storage.read_engine.dispose()
+
+        # An immutable database is read without its WAL, so everything has to be in the main file
+        connection = sqlite3.connect(database_path, isolation_level=None)
+        try:
+            connection.execute('PRAGMA journal_mode=DELETE')
+            connection.execute('VACUUM')
+        finally:
+            connection.close()
+
+        os.replace(database_path, path)
+    finally:
+        shutil.rmtree(directory)
+
+    return path
+
+
+class KnowledgeBaseStorageAdapter(ReadOnlySQLStorageAdapter):
+    """
+    A read-only storage adapter for a knowledge base compiled with
+    ``compile_knowledge_base``.
+
+    The file is opened with ``immutable=1``, so SQLite takes no locks and
+    never checks it for changes, and ``mmap_size`` covers the whole file.
+
+    :keyword knowledge_base_path: The path of the compiled artifact.
+        Defaults to ``settings.KNOWLEDGE_BASE_PATH``.
+    :type knowledge_base_path: str
+
+    :keyword reader_pool_size: The number of pooled connections.
+        Defaults to ``settings.SQLITE_READER_POOL_SIZE``.
+    :type reader_pool_size: int
+    """
+
+    def __init__(self, **kwargs):
+        self.knowledge_base_path = os.path.abspath(
+            kwargs.get('knowledge_base_path', settings.KNOWLEDGE_BASE_PATH)
+        )
+
+        self.metadata = read_metadata(self.knowledge_base_path)
+
+        if self.metadata.get('format') != ARTIFACT_FORMAT:
+            raise ValueError('{} is a format {} knowledge base, expected format {}'.format(
+                self.knowledge_base_path, self.metadata.get('format'), ARTIFACT_FORMAT
+            ))
+
+        # The chatterbot tables are created in a throwaway in-memory database
+        kwargs['database_uri'] = 'sqlite://'
+        super().__init__(**kwargs)
+
+        self.engine.dispose()
+
+        self.engine = create_engine(
+            'sqlite://',
+            creator=self.connect,
+            poolclass=QueuePool,
+            pool_size=kwargs.get('reader_pool_size', settings.SQLITE_READER_POOL_SIZE),
+            max_overflow=0
+        )
+
+        mmap_size = os.path.getsize(self.knowledge_base_path)
+
+        @event.listens_for(self.engine, 'connect')
+        def set_sqlite_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            cursor.execute('PRAGMA mmap_size={}'.format(mmap_size))
+            cursor.execute('PRAGMA query_only=ON')
+            cursor.execute('PRAGMA temp_store=MEMORY')
+            cursor.close()
+
+        self.Session = sessionmaker(bind=self.engine, expire_on_commit=True)
+
+    @property
+    def version(self):
+        return self.metadata['version']
+
+    def connect(self):
+        return sqlite3.connect(
+            'file:{}?mode=ro&immutable=1'.format(self.knowledge_base_path),
+            uri=True,
+            check_same_thread=False
+        )
@@ -0,0 +1,296 @@
+"""
+A storage adapter that serves the knowledge base from memory.
+
+Every statement is loaded from a backing storage adapter at startup into
+column lists with dictionary indexes on the fields ``SearchMatch`` and the
+chat bot look statements up by, so answering a message runs no SQL at all.
+"""
+import sys
+import random
+import threading
+from array import array
+from chatterbot import utils
+from chatterbot.conversation import Statement
+from chatterbot.storage import StorageAdapter
+
+
+class StatementTable(object):
+    """
+    Statements stored as one list per field. Rows are only ever appended,
+    so readers can use the rows that existed when they started while a
+    writer adds more.
+    """
+
+    fields = (
+        'text', 'search_text', 'conversation', 'persona',
+        'in_response_to', 'search_in_response_to', 'created_at',
+    )
+
+    # Fields with a dictionary from each value to the rows that have it, ids are indexed too
+    indexed_fields = ('text', 'conversation', 'in_response_to', 'search_in_response_to')
+
+    # Fields with few distinct values, interned so each value is stored once
+    interned_fields = ('conversation', 'persona')
+
+    def __init__(self):
+        self.ids = array('q')
+        self.columns = {field: [] for field in self.fields}
+        self.tags = []
+        self.indexes = {field: {} for field in self.indexed_fields + ('id',)}
+        self.tag_index = {}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def append(self, statement):
+        row = len(self.ids)
+
+        for field in self.fields:
+            value = getattr(statement, field)
+            if field in self.interned_fields and value is not None:
+                value = sys.intern(value)
+            self.columns[field].append(value)
+
+            if field in self.indexes:
+                self.indexes[field].setdefault(value, []).append(row)
+
+        tags = tuple(sys.intern(tag) for tag in statement.get_tags())
+        self.tags.append(tags)
+        for tag in tags:
+            self.tag_index.setdefault(tag, []).append(row)
+
+        self.indexes['id'].setdefault(statement.id or 0, []).append(row)
+
+        # The id is added last, it is what makes the row visible to readers
+        self.ids.append(statement.id or 0)
+
+        return row
+
+    def get(self, row):
+        statement = Statement(
+            id=self.ids[row],
+            tags=list(self.tags[row]),
+            **{field: self.columns[field][row] for field in self.fields}
+        )
+        return statement
+
+    def get_rows(self, equal, tags):
+        """
+            Gets the rows that can match the filters, using the most selective index
+        """
+        candidates = [
+            self.indexes[field].get(value, []) for field, value in equal.items()
+            if field in self.indexes
+        ]
+        if tags:
+            candidates.append(sorted(set(
+                row for tag in tags for row in self.tag_index.get(tag, [])
+            )))
+
+        if candidates:
+            return min(candidates, key=len)
+        return range(len(self.ids))
+
+
+class InMemoryStorageAdapter(StorageAdapter):
+    """
+    A storage adapter that keeps every statement in memory and answers
+    ``filter``, ``count`` and ``get_random`` without a database.
+
+    Statements are loaded from the backing storage adapter when the adapter
+    is created. Writes are sent to the backing storage adapter and added to
+    memory. When ``in_memory_writes`` is False, ``create`` returns the
+    statement without saving it, so nothing is learned, ``update``,
+    ``remove`` and ``drop`` do nothing, and ``create_many`` raises
+    ``WritesDisabledException`` so training is not silently lost.
+
+    ``InvertedIndexSearch`` and ``TrigramSearch`` follow the writes through
+    the backing storage adapter, which must be a SQL storage adapter. Search
+    algorithms that query the database directly, such as ``FTSSearch``,
+    need a SQL storage adapter instead.
+
+    :keyword backing_storage_adapter: The dot-notated import path of the
+        storage adapter statements are loaded from and written to. It is
+        created with the same keyword arguments as this adapter.
+        Defaults to ``sqlite_storage.SQLiteStorageAdapter``.
+    :type backing_storage_adapter: str
+
+    :keyword in_memory_writes: Send writes to the backing storage adapter.
+        Defaults to True.
+    :type in_memory_writes: bool
+    """
+
+    class WritesDisabledException(Exception):
+
+        def __init__(self, message=None):
+            default = 'Writes to the in-memory storage adapter are disabled, statements can not be created. Train the backing storage adapter\'s database instead.'
+            super().__init__(message or default)
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+
+        self.backing_storage = utils.initialize_class(
+            kwargs.get('backing_storage_adapter', 'sqlite_storage.SQLiteStorageAdapter'),
+            **kwargs
+        )
+
+        self.writes_enabled = kwargs.get('in_memory_writes', True)
+
+        self._lock = threading.Lock()
+
+        self.load()
+
+    def get_statement_object(self):
+        return Statement
+
+    def load(self):
+        """
+            Replaces the statements in memory with those in the backing storage
+        """
+        table = StatementTable()
+
+        for statement in self.backing_storage.filter():
+            table.append(statement)
+
+        with self._lock:
+            self.table = table
+
+        self.logger.info('Loaded {} statements into memory'.format(len(table)))
+
+    def count(self):
+        return len(self.table)
+
+    def filter(self, **kwargs):
+        """
+        Returns a list of objects from the database.
+        The kwargs parameter can contain any number
+        of attributes. Only objects which contain all
+        listed attributes and in which all values match
+        for all listed attributes will be returned.
+        """
+        table = self.table
+        visible_rows = len(table)
+
+        kwargs.pop('page_size', None)
+        order_by = kwargs.pop('order_by', None)
+        tags = kwargs.pop('tags', [])
+        exclude_text = kwargs.pop('exclude_text', None)
+        exclude_text_words = kwargs.pop('exclude_text_words', None) or []
+        persona_not_startswith = kwargs.pop('persona_not_startswith', None)
+        search_text_contains = kwargs.pop('search_text_contains', None)
+
+        # Convert a single sting into a list if only one tag is provided
+        if type(tags) == str:
+            tags = [tags]
+
+        exclude_text_words = [word.lower() for word in exclude_text_words]
+        search_words = search_text_contains.split(' ') if search_text_contains else []
+
+        rows = []
+
+        for row in table.get_rows(kwargs, tags):
+            if row >= visible_rows:
+                break
+
+            if 'id' in kwargs and table.ids[row] != kwargs['id']:
+                continue
+
+            if any(table.columns[field][row] != value for field, value in kwargs.items() if field != 'id'):
+                continue
+
+            text = table.columns['text'][row]
+
+            if exclude_text and text in exclude_text:
+                continue
+
+            if exclude_text_words:
+                lower_text = text.lower()
+                if any(word in lower_text for word in exclude_text_words):
+                    continue
+
+            # Matches the SQL adapter, which only excludes the bot: prefix
+            if persona_not_startswith and (table.columns['persona'][row] or '').startswith('bot:'):
+                continue
+
+            if search_words:
+                search_text = table.columns['search_text'][row] or ''
+                if not any(word in search_text for word in search_words):
+                    continue
+
+            rows.append(row)
+
+        if order_by:
+            def sort_key(row):
+                return tuple(
+                    table.ids[row] if field == 'id' else table.columns[field][row]
+                    for field in order_by
+                )
+            rows.sort(key=sort_key)
+
+        for row in rows:
+            yield table.get(row)
+
+    def get_random(self):
+        """
+        Returns a random statement from the database.
+        """
+        table = self.table
+
+        if len(table) < 1:
+            raise self.EmptyDatabaseException()
+
+        return table.get(random.randrange(0, len(table)))
+
+    def create(self, **kwargs):
+        """
+        Creates a new statement matching the keyword arguments specified.
+        Returns the created statement.
+        """
+        if not self.writes_enabled:
+            tags = kwargs.pop('tags', [])
+            statement = Statement(**kwargs)
+            statement.add_tags(*tags)
+            return statement
+
+        statement = self.backing_storage.create(**kwargs)
+
+        with self._lock:
+            self.table.append(statement)
+
+        return statement
+
+    def create_many(self, statements):
+        """
+        Creates multiple statement entries.
+        """
+        if not self.writes_enabled:
+            raise self.WritesDisabledException()
+
+        self.backing_storage.create_many(statements)
+        # The backing storage does not return the ids it gave the statements
+        self.load()
+
+    def update(self, statement):
+        """
+        Modifies an entry in the database.
+        Creates an entry if one does not exist.
+        """
+        if self.writes_enabled:
+            self.backing_storage.update(statement)
+            self.load()
+
+    def remove(self, statement_text):
+        """
+        Removes the statement that matches the input text.
+        """
+        if self.writes_enabled:
+            self.backing_storage.remove(statement_text)
+            self.load()
+
+    def drop(self):
+        """
+        Remove all existing statements from the backing storage and memory.
+        """
+        if self.writes_enabled:
+            self.backing_storage.drop()
+            self.load()
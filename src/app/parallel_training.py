@@ -0,0 +1,264 @@
+"""
+Trains a chat bot from YAML corpus files with the tagging spread over a pool
+of processes.
+
+``ChatterBotCorpusTrainer`` tags one statement at a time in the web process
+and inserts one file at a time. ``ParallelCorpusTrainer`` streams the
+conversations of every file, sends them to the pool in batches, and inserts
+the results with ``create_many`` in large transactions.
+
+The search_text it produces is always what the storage adapter's tagger
+gives, since inputs are tagged with that tagger when they are searched.
+When the tagger is spaCy-based, like chatterbot's ``PosLemmaTagger``, the
+batches are tagged with ``nlp.pipe``. Any other tagger, such as the NLTK
+``PosHypernymTagger`` of chatterbot 1.0, is created again in each worker
+process and tags one statement at a time.
+"""
+import io
+import os
+import time
+import string
+import logging
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import yaml
+from chatterbot.conversation import Statement
+from chatterbot.corpus import list_corpus_files
+from chatterbot.trainers import Trainer
+
+
+PUNCTUATION_TABLE = str.maketrans(dict.fromkeys(string.punctuation))
+
+# The spaCy pipeline of each worker process, loaded by initialize_worker
+nlp = None
+
+# The tagger of each worker process when the chat bot's tagger is not spaCy-based
+tagger = None
+
+logger = logging.getLogger(__name__)
+
+
+def prepare_text(text):
+    """
+        Very short texts are tagged without their punctuation, like PosLemmaTagger does
+    """
+    if len(text) <= 2:
+        text_without_punctuation = text.translate(PUNCTUATION_TABLE)
+        if len(text_without_punctuation) >= 1:
+            return text_without_punctuation
+    return text
+
+
+def get_bigram_pair_string(document):
+    """
+        Gets the search_text of a parsed text, the same way as PosLemmaTagger
+    """
+    bigram_pairs = []
+
+    if len(document.text) <= 2:
+        bigram_pairs = [token.lemma_.lower() for token in document]
+    else:
+        tokens = [token for token in document if token.is_alpha and not token.is_stop]
+
+        if len(tokens) < 2:
+            tokens = [token for token in document if token.is_alpha]
+
+        for index in range(1, len(tokens)):
+            bigram_pairs.append('{}:{}'.format(
+                tokens[index - 1].pos_,
+                tokens[index].lemma_.lower()
+            ))
+
+    if not bigram_pairs:
+        bigram_pairs = [token.lemma_.lower() for token in document]
+
+    return ' '.join(bigram_pairs)
+
+
+def get_spacy_model(storage_tagger, spacy_model=None):
+    """
+        Gets the spaCy model that tags like the storage adapter's tagger, or
+        None when the tagger does not use spaCy
+    """
+    if getattr(storage_tagger, 'nlp', None) is None:
+        return None
+    return spacy_model or storage_tagger.language.ISO_639_1.lower()
+
+
+def initialize_worker(spacy_model, tagger_class=None, language=None):
+    global nlp, tagger
+
+    if spacy_model is None:
+        nlp = None
+        tagger = tagger_class(language=language)
+        return
+
+    import spacy
+
+    # Only part of speech tags and lemmas are used
+    nlp = spacy.load(spacy_model, exclude=['parser', 'ner'])
+
+
+def tag_texts(texts):
+    if nlp is None:
+        return [tagger.get_bigram_pair_string(text) for text in texts]
+
+    return [
+        get_bigram_pair_string(document)
+        for document in nlp.pipe(prepare_text(text) for text in texts)
+    ]
+
+
+def iter_conversations(*corpus_paths):
+    """
+        Yields each conversation in the corpora with the categories of its file
+    """
+    for corpus_path in corpus_paths:
+        for file_path in list_corpus_files(corpus_path):
+            with io.open(file_path, encoding='utf-8') as data_file:
+                data = yaml.safe_load(data_file) or {}
+
+            categories = data.get('categories') or []
+
+            for conversation in data.get('conversations') or []:
+                yield [str(text) for text in conversation], categories
+
+
+class ParallelCorpusTrainer(Trainer):
+    """
+    Allows the chat bot to be trained using data from the ChatterBot dialog
+    corpus, tagging the statements in parallel.
+
+    :param workers: The number of tagging processes. With 1 the statements
+        are tagged in the current process. Defaults to the number of CPUs.
+
+    :param batch_size: The number of statements sent to a worker at a time.
+        Defaults to 1000.
+
+    :param transaction_size: The number of statements inserted by each
+        ``create_many`` call. Defaults to 10000.
+
+    :param spacy_model: The spaCy model used for tagging when the storage
+        adapter's tagger is spaCy-based. Defaults to the model of the
+        tagger's language. Other taggers are used as they are.
+    """
+
+    def __init__(self, chatbot, **kwargs):
+        super().__init__(chatbot, **kwargs)
+
+        self.workers = kwargs.get('workers') or os.cpu_count() or 1
+        self.batch_size = kwargs.get('batch_size', 1000)
+        self.transaction_size = kwargs.get('transaction_size', 10000)
+
+        self.spacy_model = get_spacy_model(self.chatbot.storage.tagger, kwargs.get('spacy_model'))
+
+    def iter_batches(self, *corpus_paths):
+        """
+            Groups whole conversations into batches of at least batch_size statements
+        """
+        batch = []
+        statement_count = 0
+
+        for conversation, categories in iter_conversations(*corpus_paths):
+            batch.append((conversation, categories))
+            statement_count += len(conversation)
+
+            if statement_count >= self.batch_size:
+                yield batch
+                batch = []
+                statement_count = 0
+
+        if batch:
+            yield batch
+
+    def iter_tagged_batches(self, *corpus_paths):
+        """
+            Yields each batch with the search_text of its statements, in corpus order
+        """
+        def get_texts(batch):
+            return [text for conversation, _ in batch for text in conversation]
+
+        storage_tagger = self.chatbot.storage.tagger
+
+        if self.workers == 1:
+            if self.spacy_model is None:
+                for batch in self.iter_batches(*corpus_paths):
+                    yield batch, [storage_tagger.get_bigram_pair_string(text) for text in get_texts(batch)]
+                return
+
+            initialize_worker(self.spacy_model)
+            for batch in self.iter_batches(*corpus_paths):
+                yield batch, tag_texts(get_texts(batch))
+            return
+
+        with ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=initialize_worker,
+            initargs=(self.spacy_model, type(storage_tagger), storage_tagger.language)
+        ) as executor:
+            # A couple of batches per worker are queued so no worker waits,
+            # without reading the whole corpus into memory
+            pending = deque()
+
+            for batch in self.iter_batches(*corpus_paths):
+                pending.append((batch, executor.submit(tag_texts, get_texts(batch))))
+
+                if len(pending) >= self.workers * 2:
+                    batch, future = pending.popleft()
+                    yield batch, future.result()
+
+            while pending:
+                batch, future = pending.popleft()
+                yield batch, future.result()
+
+    def train(self, *corpus_paths):
+        start = time.perf_counter()
+        statement_count = 0
+        statements_to_create = []
+
+        for batch, search_texts in self.iter_tagged_batches(*corpus_paths):
+            search_texts = iter(search_texts)
+
+            for conversation, categories in batch:
+                previous_statement_text = None
+                previous_statement_search_text = ''
+
+                for text in conversation:
+                    statement_search_text = next(search_texts)
+
+                    statement = Statement(
+                        text=text,
+                        search_text=statement_search_text,
+                        in_response_to=previous_statement_text,
+                        search_in_response_to=previous_statement_search_text,
+                        conversation='training'
+                    )
+
+                    statement.add_tags(*categories)
+
+                    statement = self.get_preprocessed_statement(statement)
+
+                    previous_statement_text = statement.text
+                    previous_statement_search_text = statement_search_text
+
+                    statements_to_create.append(statement)
+
+            if len(statements_to_create) >= self.transaction_size:
+                self.chatbot.storage.create_many(statements_to_create)
+                statement_count += len(statements_to_create)
+                statements_to_create = []
+
+        if statements_to_create:
+            self.chatbot.storage.create_many(statements_to_create)
+            statement_count += len(statements_to_create)
+
+        # Lets caches of the chat bot's responses notice that they are out of date
+        self.chatbot.knowledge_base_generation = getattr(self.chatbot, 'knowledge_base_generation', 0) + 1
+
+        duration = time.perf_counter() - start
+
+        logger.info('Trained {} statements in {:.1f}s ({:.0f} statements/second) with {} workers'.format(
+            statement_count, duration, statement_count / duration if duration else 0, self.workers
+        ))
+
+        return statement_count
@@ -0,0 +1,332 @@
+"""
+Opt-in profiling of live chat requests.
+
+Two kinds of profile are written for the profiled routes:
+
+    cprofile   a fraction of requests, PROFILE_SAMPLE_RATE, run under cProfile
+               and are saved as gzipped pstats data
+    sampled    the other requests have the stack of their thread sampled every
+               PROFILE_SAMPLE_INTERVAL seconds by one shared thread, and the
+               samples are saved as gzipped collapsed stacks (the input of
+               flamegraph.pl and speedscope) when the request took longer
+               than PROFILE_SLOW_THRESHOLD
+
+File names carry the route, the category of the input and the duration:
+
+    20220301T120000-get-timetable-sampled-2315ms-3f2a9c.collapsed.gz
+
+``init_app`` adds the hooks and, when ``PROFILE_ADMIN_TOKEN`` is set, the
+/admin/profiles endpoints to list and download profiles. Requests to other
+routes, or when profiling is off, only pay for a membership test.
+"""
+import os
+import re
+import sys
+import gzip
+import hmac
+import time
+import uuid
+import logging
+import marshal
+import random
+import cProfile
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+import settings
+
+
+enabled = settings.PROFILING_ENABLED
+
+logger = logging.getLogger(__name__)
+
+# The category of the input being answered, used to tag its profile
+current_category = contextvars.ContextVar('current_category', default='unknown')
+
+NAME_PATTERN = re.compile(
+    r'^(?P<created_at>\d{8}T\d{6})-(?P<route>\w+)-(?P<category>\w+)-(?P<kind>cprofile|sampled)-'
+    r'(?P<duration>\d+)ms-\w+\.(?:prof|collapsed)\.gz$'
+)
+
+UNSAFE_CHARACTERS = re.compile(r'\W+')
+
+
+def set_category(category):
+    """
+        Tags the profile of the current request with the category of its input
+    """
+    if enabled:
+        current_category.set(category)
+
+
+def get_safe_name(value):
+    return UNSAFE_CHARACTERS.sub('_', value).strip('_').lower() or 'none'
+
+
+def get_stack(frame):
+    """
+        Formats the stack of a frame as collapsed stack, outermost call first
+    """
+    calls = []
+    while frame is not None:
+        code = frame.f_code
+        calls.append('{}:{}'.format(os.path.basename(code.co_filename), code.co_name))
+        frame = frame.f_back
+    return ';'.join(reversed(calls))
+
+
+class StackSampler(object):
+    """
+    Samples the stacks of registered threads from one background thread,
+    which waits without waking up while no thread is registered.
+
+    :param interval: Seconds between samples.
+    """
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.threads = {}
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._thread = None
+        self._closed = None
+
+    def start(self, thread_id):
+        samples = {}
+        with self._lock:
+            self.threads[thread_id] = samples
+            if self._thread is None:
+                # Each thread has its own flag, so one that is closing never sees a newer one's
+                self._closed = threading.Event()
+                self._thread = threading.Thread(
+                    target=self.run, args=(self._closed,), name='stack-sampler', daemon=True
+                )
+                self._thread.start()
+            self._changed.notify_all()
+        return samples
+
+    def stop(self, thread_id):
+        with self._lock:
+            return self.threads.pop(thread_id, {})
+
+    def sample(self):
+        frames = sys._current_frames()
+        with self._lock:
+            for thread_id, samples in self.threads.items():
+                frame = frames.get(thread_id)
+                if frame is not None:
+                    stack = get_stack(frame)
+                    samples[stack] = samples.get(stack, 0) + 1
+
+    def run(self, closed):
+        while True:
+            with self._changed:
+                while not self.threads and not closed.is_set():
+                    self._changed.wait()
+                if not closed.is_set():
+                    self._changed.wait(self.interval)
+                if closed.is_set():
+                    return
+            self.sample()
+
+    def close(self):
+        """
+            Stops the background thread, the next start starts another one
+        """
+        with self._lock:
+            thread = self._thread
+            if thread is not None:
+                self._closed.set()
+                self._thread = None
+                self._changed.notify_all()
+
+        if thread is not None:
+            thread.join()
+
+
+class Profiler(object):
+    """
+    Decides which requests are profiled and writes their profiles from a
+    background thread, so requests do not wait for them to be compressed
+    and saved.
+
+    :param directory: Where profiles are written.
+    :param sample_rate: The fraction of requests profiled with cProfile.
+    :param slow_threshold: Seconds after which a request's sampled stacks
+        are saved, 0 does not sample stacks.
+    :param sample_interval: Seconds between stack samples.
+    :param retention: The number of profiles kept, the oldest are deleted.
+    """
+
+    def __init__(self, directory, sample_rate=0.01, slow_threshold=0,
+                 sample_interval=0.005, retention=500):
+        self.directory = directory
+        self.sample_rate = sample_rate
+        self.slow_threshold = slow_threshold
+        self.retention = retention
+        self.sampler = StackSampler(sample_interval)
+        self.writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='profile-writer')
+
+        os.makedirs(directory, exist_ok=True)
+
+    def begin(self):
+        """
+            Starts profiling the current request, returning what end needs
+        """
+        if self.sample_rate and random.random() < self.sample_rate:
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError:
+                # Another profiler is already running on this thread
+                return None
+            return ('cprofile', profile, time.perf_counter())
+
+        if self.slow_threshold:
+            thread_id = threading.get_ident()
+            self.sampler.start(thread_id)
+            return ('sampled', thread_id, time.perf_counter())
+
+        return None
+
+    def end(self, state, route, category):
+        """
+            Stops profiling the current request and hands its profile to the writer thread
+        """
+        kind, profiler, start = state
+        duration = time.perf_counter() - start
+
+        if kind == 'cprofile':
+            profiler.disable()
+            profiler.create_stats()
+            self.write_later(route, category, kind, duration, 'prof', lambda: marshal.dumps(profiler.stats))
+            return
+
+        samples = self.sampler.stop(profiler)
+        if duration >= self.slow_threshold and samples:
+            self.write_later(route, category, kind, duration, 'collapsed', lambda: ''.join(
+                '{} {}\n'.format(stack, count) for stack, count in sorted(samples.items())
+            ).encode('utf-8'))
+
+    def write_later(self, route, category, kind, duration, extension, get_data):
+        """
+            Writes a profile on the writer thread, get_data is called there
+            to serialize it
+        """
+        def write():
+            try:
+                self.write(route, category, kind, duration, extension, get_data())
+            except Exception:
+                logger.exception('Unable to write a %s profile of %s', kind, route)
+
+        self.writer.submit(write)
+
+    def flush(self):
+        """
+            Waits for every profile handed to the writer thread to be written
+        """
+        self.writer.submit(lambda: None).result()
+
+    def close(self):
+        """
+            Stops the sampler and writer threads once every profile is written
+        """
+        self.sampler.close()
+        self.writer.shutdown()
+
+    def write(self, route, category, kind, duration, extension, data):
+        name = '{}-{}-{}-{}-{}ms-{}.{}.gz'.format(
+            time.strftime('%Y%m%dT%H%M%S', time.gmtime()),
+            get_safe_name(route), get_safe_name(category), kind,
+            int(duration * 1000), uuid.uuid4().hex[:6], extension
+        )
+        path = os.path.join(self.directory, name)
+
+        # Written under a temporary name so a listed profile is always complete
+        with gzip.open(path + '.tmp', 'wb') as profile_file:
+            profile_file.write(data)
+        os.replace(path + '.tmp', path)
+
+        self.delete_old_profiles()
+
+    def list(self):
+        """
+            Gets the tags of every profile, newest first
+        """
+        profiles = []
+        for name in os.listdir(self.directory):
+            match = NAME_PATTERN.match(name)
+            if match:
+                profile = match.groupdict()
+                profile['name'] = name
+                profile['duration'] = int(profile['duration'])
+                profile['size'] = os.path.getsize(os.path.join(self.directory, name))
+                profiles.append(profile)
+        profiles.sort(key=lambda profile: profile['name'], reverse=True)
+        return profiles
+
+    def delete_old_profiles(self):
+        if not self.retention:
+            return
+        names = sorted(name for name in os.listdir(self.directory) if NAME_PATTERN.match(name))
+        for name in names[:-self.retention]:
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+
+
+def init_app(app, routes=('/get',), profiler=None):
+    """
+        Profiles requests to the routes of a Flask app and adds the
+        /admin/profiles endpoints
+    """
+    if not enabled:
+        return None
+
+    from flask import abort, g, jsonify, request, send_from_directory
+
+    profiler = profiler or Profiler(
+        settings.PROFILE_DIRECTORY,
+        sample_rate=settings.PROFILE_SAMPLE_RATE,
+        slow_threshold=settings.PROFILE_SLOW_THRESHOLD,
+        sample_interval=settings.PROFILE_SAMPLE_INTERVAL,
+        retention=settings.PROFILE_RETENTION
+    )
+    routes = frozenset(routes)
+
+    @app.before_request
+    def begin_profile():
+        if request.path in routes:
+            current_category.set('unknown')
+            g.profile_state = profiler.begin()
+
+    @app.teardown_request
+    def end_profile(exception=None):
+        state = g.pop('profile_state', None)
+        if state is not None:
+            profiler.end(state, request.path, current_category.get())
+
+    if settings.PROFILE_ADMIN_TOKEN:
+        def check_token():
+            token = request.headers.get('Authorization', '')
+            expected = 'Bearer ' + settings.PROFILE_ADMIN_TOKEN
+            if not hmac.compare_digest(token.encode('utf-8'), expected.encode('utf-8')):
+                abort(403)
+
+        @app.route('/admin/profiles')
+        def list_profiles():
+            check_token()
+            return jsonify(profiles=profiler.list())
+
+        @app.route('/admin/profiles/<name>')
+        def download_profile(name):
+            check_token()
+            if not NAME_PATTERN.match(name):
+                abort(404)
+            return send_from_directory(
+                os.path.abspath(profiler.directory), name,
+                as_attachment=True, mimetype='application/gzip'
+            )
+
+    return profiler
@@ -0,0 +1,149 @@
+"""
+Caches of what /get answered, so inputs that were already answered are not
+searched again.
+
+Inputs are normalized the way the chat bot sees them: the preprocessors
+collapse whitespace and the comparison functions ignore case. Every cache
+belongs to one version of the knowledge base and is emptied as soon as it is
+used with another, so answers from before the chat bot was retrained are
+never served.
+
+Caches count their hits, misses and evictions, and ``render_cache_metrics``
+formats the counts as Prometheus counters.
+"""
+import re
+import time
+import threading
+from collections import OrderedDict
+
+
+WHITESPACE_PATTERN = re.compile(r'\s+')
+
+
+def normalize_input(text):
+    return WHITESPACE_PATTERN.sub(' ', text).strip().lower()
+
+
+def get_knowledge_base_version(chatbot):
+    """
+        Gets a value that changes whenever the chat bot's knowledge base is
+        trained or replaced by another compiled knowledge base
+    """
+    return (
+        getattr(chatbot.storage, 'version', None),
+        getattr(chatbot, 'knowledge_base_generation', 0)
+    )
+
+
+class ResponseCache(object):
+    """
+    A thread-safe mapping with at most ``maximum_size`` entries that evicts
+    the least recently used entry first.
+
+    :param maximum_size: The number of entries kept. A size of 0 keeps nothing.
+
+    :param ttl: Seconds an entry is kept for. Defaults to keeping entries
+        until they are evicted.
+
+    :param clock: The function giving the current time in seconds.
+        Defaults to ``time.monotonic``.
+
+    :param name: The name the cache's metrics are labelled with.
+    """
+
+    def __init__(self, maximum_size, ttl=None, clock=time.monotonic, name='response'):
+        self.maximum_size = maximum_size
+        self.ttl = ttl
+        self.clock = clock
+        self.name = name
+
+        self.version = None
+        self.entries = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def _use_version(self, version):
+        if version != self.version:
+            self.evictions += len(self.entries)
+            self.entries.clear()
+            self.version = version
+
+    def get(self, key, version, default=None):
+        """
+        Return the value cached for the key with this knowledge base
+        version, or the default.
+        """
+        with self._lock:
+            self._use_version(version)
+
+            entry = self.entries.get(key)
+
+            if entry is None:
+                self.misses += 1
+                return default
+
+            value, expires_at = entry
+
+            if expires_at is not None and expires_at <= self.clock():
+                del self.entries[key]
+                self.misses += 1
+                self.evictions += 1
+                return default
+
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, version):
+        if not self.maximum_size:
+            return
+
+        expires_at = self.clock() + self.ttl if self.ttl else None
+
+        with self._lock:
+            self._use_version(version)
+
+            self.entries[key] = (value, expires_at)
+            self.entries.move_to_end(key)
+
+            while len(self.entries) > self.maximum_size:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self.evictions += len(self.entries)
+            self.entries.clear()
+
+    def get_hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0
+
+
+def render_cache_metrics(*caches):
+    """
+        Formats the counts of the caches as lines of Prometheus metrics
+    """
+    lines = []
+    for metric, kind, description, get_value in (
+        ('dcubuddy_response_cache_hits_total', 'counter', 'Lookups answered from the cache',
+         lambda cache: cache.hits),
+        ('dcubuddy_response_cache_misses_total', 'counter', 'Lookups not answered from the cache',
+         lambda cache: cache.misses),
+        ('dcubuddy_response_cache_evictions_total', 'counter', 'Entries evicted, expired or invalidated',
+         lambda cache: cache.evictions),
+        ('dcubuddy_response_cache_hit_ratio', 'gauge', 'Hits per lookup since the process started',
+         lambda cache: round(cache.get_hit_rate(), 4)),
+        ('dcubuddy_response_cache_entries', 'gauge', 'Entries in the cache', len),
+    ):
+        lines.append('# HELP {} {}'.format(metric, description))
+        lines.append('# TYPE {} {}'.format(metric, kind))
+        for cache in caches:
+            lines.append('{}{{cache="{}"}} {}'.format(metric, cache.name, get_value(cache)))
+    return lines
@@ -0,0 +1,152 @@
+"""
+Indexes and housekeeping for the chatterbot statement schema in
+database.sqlite3.
+
+The indexes cover the exact queries chatterbot's SQLStorageAdapter issues
+for ``SearchMatch``:
+
+* ``filter(search_in_response_to=...)`` selects every statement column
+  where ``search_in_response_to`` matches, so the index holds every
+  column and SQLite never has to visit the table.
+* converting each result to a Statement lazy-loads its tags through
+  ``tag_association``, which has no index on ``statement_id`` at all.
+* ``ChatBot.get_latest_response`` filters on ``conversation`` ordered
+  by ``id`` for every message that is learned.
+
+``IndexedTextSearch`` uses ``search_text LIKE '%...%'``, which no b-tree
+index can serve, so it is not covered here.
+"""
+import logging
+import threading
+import settings
+
+
+INDEXES = {
+    'ix_statement_search_in_response_to_covering': (
+        'CREATE INDEX IF NOT EXISTS ix_statement_search_in_response_to_covering '
+        'ON statement (search_in_response_to, id, text, search_text, conversation, '
+        'created_at, in_response_to, persona)'
+    ),
+    'ix_tag_association_statement_id': (
+        'CREATE INDEX IF NOT EXISTS ix_tag_association_statement_id '
+        'ON tag_association (statement_id, tag_id)'
+    ),
+    'ix_statement_conversation_id': (
+        'CREATE INDEX IF NOT EXISTS ix_statement_conversation_id '
+        'ON statement (conversation, id)'
+    ),
+}
+
+
+logger = logging.getLogger(__name__)
+
+
+def ensure_indexes(engine):
+    """
+        Creates any of the indexes that do not exist yet
+    """
+    with engine.begin() as connection:
+        for sql in INDEXES.values():
+            connection.execute(sql)
+
+
+def analyze(engine):
+    """
+        Refreshes the statistics the query planner uses to pick indexes
+    """
+    with engine.begin() as connection:
+        connection.execute('ANALYZE')
+
+
+def optimize(engine):
+    with engine.begin() as connection:
+        connection.execute('PRAGMA optimize')
+
+
+def vacuum(engine):
+    """
+        Rebuilds the database file, VACUUM cannot run inside a transaction
+    """
+    connection = engine.raw_connection()
+    isolation_level = connection.connection.isolation_level
+    try:
+        connection.connection.isolation_level = None
+        connection.execute('VACUUM')
+    finally:
+        connection.connection.isolation_level = isolation_level
+        connection.close()
+
+
+def explain_query_plan(engine, sql, parameters=()):
+    """
+        Returns the detail column of EXPLAIN QUERY PLAN for a query
+    """
+    with engine.connect() as connection:
+        rows = connection.execute('EXPLAIN QUERY PLAN ' + sql, *parameters)
+        return [row[-1] for row in rows]
+
+
+def prepare(engine):
+    """
+        Creates the indexes and analyzes the database, safe to run at every startup
+    """
+    ensure_indexes(engine)
+    analyze(engine)
+
+
+class MaintenanceScheduler(object):
+    """
+    Runs ``PRAGMA optimize`` and ``VACUUM`` on a database from a background
+    thread at fixed intervals.
+
+    :param optimize_interval: Seconds between optimize runs. An interval of 0
+        runs no maintenance at all.
+
+    :param vacuum_interval: Seconds between vacuum runs. An interval of 0
+        never vacuums.
+    """
+
+    def __init__(self, engine, optimize_interval=None, vacuum_interval=None):
+        self.engine = engine
+
+        if optimize_interval is None:
+            optimize_interval = settings.SCHEMA_OPTIMIZE_INTERVAL
+        if vacuum_interval is None:
+            vacuum_interval = settings.SCHEMA_VACUUM_INTERVAL
+
+        self.optimize_interval = optimize_interval
+        self.vacuum_interval = vacuum_interval
+
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run,
+            name='schema-maintenance',
+            daemon=True
+        )
+
+    def start(self):
+        if self.optimize_interval:
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread.is_alive():
+            self._thread.join()
+
+    def _run(self):
+        since_vacuum = 0
+
+        while not self._stopped.wait(self.optimize_interval):
+            since_vacuum += self.optimize_interval
+
+            try:
+                if self.vacuum_interval and since_vacuum >= self.vacuum_interval:
+                    since_vacuum = 0
+                    vacuum(self.engine)
+                    logger.info('Vacuumed %s', self.engine.url)
+
+                optimize(self.engine)
+                logger.debug('Optimized %s', self.engine.url)
+            except Exception:
+                logger.exception('Scheduled maintenance of %s failed', self.engine.url)
@@ -1,5 +1,12 @@
 from chatterbot.logic import LogicAdapter
 from chatterbot import filters
+from chatterbot import utils
+from chatterbot.conversation import Statement
+import tracing
+import profiling
+from chatterbot.comparisons import LevenshteinDistance
+from bounded_comparisons import BoundedLevenshteinDistance, get_comparator
+from sqlite_storage import get_read_engine
 
 
 class SearchMatch(LogicAdapter):
@@ -13,22 +20,130 @@ class SearchMatch(LogicAdapter):
 
         self.excluded_words = kwargs.get('excluded_words')
 
+        # Search algorithms that chatterbot does not create itself are given as an import path
+        search_algorithm = kwargs.get('search_algorithm')
+
+        if search_algorithm:
+            self.search_algorithm = utils.initialize_class(search_algorithm, chatbot, **kwargs)
+            self.search_algorithm_name = self.search_algorithm.name
+            self.chatbot.search_algorithms[self.search_algorithm_name] = self.search_algorithm
+
+        # With the opt-in bounded comparison, comparisons that cannot reach the threshold are
+        # given up on as soon as that is known. They score 0, so a different candidate under the
+        # threshold can end up as the answer
+        compare_statements = getattr(self.search_algorithm, 'compare_statements', None)
+        if isinstance(compare_statements, BoundedLevenshteinDistance):
+            compare_statements.minimum_similarity = self.maximum_similarity_threshold
+
+        # Replies to a prompt are compared like the search algorithm compares candidates, or with the
+        # adapter's statement comparison function when the algorithm does not compare texts, like EmbeddingSearch
+        self.compare_statements = compare_statements or get_comparator(
+            kwargs.get('statement_comparison_function', LevenshteinDistance), chatbot.storage.tagger.language
+        )
+
+        # Optional IntentRouter used to only search the statements of one category
+        self.intent_router = kwargs.get('intent_router')
+
+        self.intent_confidence_threshold = kwargs.get('intent_confidence_threshold', 0.7)
+
+    def get_replies(self, input_statement):
+        """
+            Gets the text and search text of each reply the corpus has to the
+            prompt the input is in response to
+        """
+        storage = self.chatbot.storage
+        engine = get_read_engine(storage)
+
+        # Every conversation in the corpus adds its own copy of a reply, so each text is read once
+        if engine is None:
+            statements = storage.filter(
+                search_in_response_to=input_statement.search_in_response_to,
+                in_response_to=input_statement.in_response_to,
+                persona_not_startswith='bot:'
+            )
+            return list(dict.fromkeys((statement.text, statement.search_text) for statement in statements))
+
+        # Only the columns the response is selected with are loaded, not the tags of every row
+        with engine.connect() as connection:
+            return connection.execute(
+                "SELECT DISTINCT text, search_text FROM statement "
+                "WHERE search_in_response_to = ? AND in_response_to = ? AND persona NOT LIKE 'bot:%'",
+                (input_statement.search_in_response_to, input_statement.in_response_to)
+            ).fetchall()
+
+    def get_follow_up_match(self, input_statement):
+        """
+        Return the closest of the replies the corpus has to the prompt the
+        input is in response to, when it is at least as similar as the
+        maximum similarity threshold.
+        """
+        if not input_statement.in_response_to or not input_statement.search_in_response_to:
+            return None
+
+        closest_match = None
+
+        for text, search_text in self.get_replies(input_statement):
+            reply = Statement(
+                text=text,
+                search_text=search_text,
+                in_response_to=input_statement.in_response_to
+            )
+            reply.confidence = self.compare_statements(input_statement, reply)
+
+            if reply.confidence >= self.maximum_similarity_threshold:
+                if closest_match is None or reply.confidence > closest_match.confidence:
+                    closest_match = reply
+
+        return closest_match
+
+    def get_search_results(self, input_statement):
+        """
+        Search only the statements tagged with the category predicted by the
+        intent router, falling back to every statement when the prediction
+        is not confident enough or no statement in the category is as similar
+        as the maximum similarity threshold.
+        """
+        if self.intent_router:
+            category, confidence = self.intent_router.predict(input_statement.text)
+
+            if confidence >= self.intent_confidence_threshold:
+                profiling.set_category(category)
+
+                # A weak match in a wrongly predicted category must not hide a good one in another
+                results = list(self.search_algorithm.search(input_statement, tags=[category]))
+
+                if any(result.confidence >= self.maximum_similarity_threshold for result in results):
+                    yield from results
+                    return
+
+                self.chatbot.logger.info('No close matches in the %s category. Searching all statements.', category)
+
+        yield from self.search_algorithm.search(input_statement)
+
     def process(self, input_statement, additional_response_selection_parameters=None):
-        search_results = self.search_algorithm.search(input_statement)
+        with tracing.span('search'):
+            # Answers to the bot's previous prompt are only compared with the replies to it
+            closest_match = self.get_follow_up_match(input_statement)
+
+            if closest_match is not None:
+                profiling.set_category('follow_up')
+            else:
+                search_results = self.get_search_results(input_statement)
 
-        # Use the input statement as the closest match if no other results are found
-        closest_match = next(search_results, input_statement)
+                # Use the input statement as the closest match if no other results are found
+                closest_match = next(search_results, input_statement)
 
-        # Search for the closest match to the input statement
-        for result in search_results:
-            closest_match = result
+                # Search for the closest match to the input statement
+                for result in search_results:
+                    closest_match = result
 
-            if result.confidence >= self.maximum_similarity_threshold and result.confidence > closest_match.confidence:
-                closest_match = result
+                    if result.confidence >= self.maximum_similarity_threshold and result.confidence > closest_match.confidence:
+                        closest_match = result
 
-        self.chatbot.logger.info('Using "{}" as a close match to "{}" with a confidence of {}'.format(
+        self.chatbot.logger.info(
+            'Using "%s" as a close match to "%s" with a confidence of %s',
             closest_match.text, input_statement.text, closest_match.confidence
-        ))
+        )
 
         response_selection_parameters = {
             'search_in_response_to': closest_match.search_text,
@@ -43,48 +158,46 @@ class SearchMatch(LogicAdapter):
         }
 
         # Get all statements that are in response to the closest match
-        response_list = list(self.chatbot.storage.filter(**response_selection_parameters))
+        with tracing.span('filter'):
+            response_list = list(self.chatbot.storage.filter(**response_selection_parameters))
 
         alternate_response_list = []
 
         if not response_list:
             self.chatbot.logger.info('No responses found. Generating alternate response list.')
-            alternate_response_list = list(self.chatbot.storage.filter(**alternate_response_selection_parameters))
+            with tracing.span('filter'):
+                alternate_response_list = list(self.chatbot.storage.filter(**alternate_response_selection_parameters))
 
 
         if response_list:
-            self.chatbot.logger.info(
-                'Selecting response from {} optimal responses.'.format(
-                    len(response_list)
-                )
-            )
+            self.chatbot.logger.info('Selecting response from %d optimal responses.', len(response_list))
 
-            response = self.select_response(
-                input_statement,
-                response_list,
-                self.chatbot.storage
-            )
+            with tracing.span('select_response'):
+                response = self.select_response(
+                    input_statement,
+                    response_list,
+                    self.chatbot.storage
+                )
 
             response.confidence = closest_match.confidence
-            self.chatbot.logger.info('Response selected. Using "{}"'.format(response.text))
+            self.chatbot.logger.info('Response selected. Using "%s"', response.text)
         elif alternate_response_list:
             '''
             The case where there was no responses returned for the selected match
             but a value exists for the statement the match is in response to.
             '''
             self.chatbot.logger.info(
-                'Selecting response from {} optimal alternate responses.'.format(
-                    len(alternate_response_list)
-                )
-            )
-            response = self.select_response(
-                input_statement,
-                alternate_response_list,
-                self.chatbot.storage
+                'Selecting response from %d optimal alternate responses.', len(alternate_response_list)
             )
+            with tracing.span('select_response'):
+                response = self.select_response(
+                    input_statement,
+                    alternate_response_list,
+                    self.chatbot.storage
+                )
 
             response.confidence = closest_match.confidence
-            self.chatbot.logger.info('Alternate response selected. Using "{}"'.format(response.text))
+            self.chatbot.logger.info('Alternate response selected. Using "%s"', response.text)
         else:
             response = self.get_default_response(input_statement)
 
@@ -0,0 +1,151 @@
+"""
+Deployment settings for DCUBuddy.
+
+Values are read from environment variables so the same code can be deployed
+to nodes that learn from conversations and to nodes that only serve answers.
+"""
+import os
+
+# How statements learned from conversations are written to the knowledge base:
+#   'sync'             - written on the request path (the chatterbot default)
+#   'write_behind'     - queued in memory and flushed in batches by a background thread
+#   'read_only'        - never written, the knowledge base is only searched
+#   'conversation_log' - queued like 'write_behind' but appended to a compressed
+#                        conversation log instead of the statement table
+#   'prebuilt'         - never written, answers come from a knowledge base compiled
+#                        offline with tools/compile_knowledge_base.py
+#   'in_memory'        - every statement is loaded into memory at startup and searched
+#                        there, writes go to IN_MEMORY_BACKING_STORE
+KNOWLEDGE_BASE_MODE = os.environ.get('DCUBUDDY_KB_MODE', 'sync')
+
+# A write-behind flush happens when this many statements are queued...
+WRITE_BEHIND_BATCH_SIZE = int(os.environ.get('DCUBUDDY_WRITE_BEHIND_BATCH_SIZE', 100))
+
+# ...or when this many seconds have passed since the last flush
+WRITE_BEHIND_INTERVAL = float(os.environ.get('DCUBUDDY_WRITE_BEHIND_INTERVAL', 5))
+
+# Pragmas applied to every connection opened to the SQLite databases
+SQLITE_SYNCHRONOUS = os.environ.get('DCUBUDDY_SQLITE_SYNCHRONOUS', 'NORMAL')
+SQLITE_MMAP_SIZE = int(os.environ.get('DCUBUDDY_SQLITE_MMAP_SIZE', 256 * 1024 * 1024))
+SQLITE_CACHE_SIZE = int(os.environ.get('DCUBUDDY_SQLITE_CACHE_SIZE', -16000))
+SQLITE_BUSY_TIMEOUT = int(os.environ.get('DCUBUDDY_SQLITE_BUSY_TIMEOUT', 5000))
+
+# Number of pooled connections used to read from the knowledge base
+SQLITE_READER_POOL_SIZE = int(os.environ.get('DCUBUDDY_SQLITE_READER_POOL_SIZE', 8))
+
+# Seconds between runs of PRAGMA optimize and VACUUM on the knowledge base, 0 is off
+SCHEMA_OPTIMIZE_INTERVAL = float(os.environ.get('DCUBUDDY_SCHEMA_OPTIMIZE_INTERVAL', 60 * 60))
+SCHEMA_VACUUM_INTERVAL = float(os.environ.get('DCUBUDDY_SCHEMA_VACUUM_INTERVAL', 7 * 24 * 60 * 60))
+
+# Where the 'conversation_log' mode keeps conversation history instead of
+# adding it to the searchable statement table
+CONVERSATION_LOG_DIRECTORY = os.environ.get('DCUBUDDY_CONVERSATION_LOG_DIRECTORY', 'conversation_logs')
+
+# A new compressed log segment is started once the current one is this big or this old
+CONVERSATION_LOG_MAX_BYTES = int(os.environ.get('DCUBUDDY_CONVERSATION_LOG_MAX_BYTES', 16 * 1024 * 1024))
+CONVERSATION_LOG_MAX_AGE = float(os.environ.get('DCUBUDDY_CONVERSATION_LOG_MAX_AGE', 24 * 60 * 60))
+
+# Number of log segments to keep, 0 keeps every segment
+CONVERSATION_LOG_RETENTION = int(os.environ.get('DCUBUDDY_CONVERSATION_LOG_RETENTION', 0))
+
+# Route each input to the corpus category it most likely belongs to and only
+# search that category, falling back to the whole knowledge base below this confidence
+INTENT_ROUTER_ENABLED = os.environ.get('DCUBUDDY_INTENT_ROUTER', '1') == '1'
+INTENT_ROUTER_THRESHOLD = float(os.environ.get('DCUBUDDY_INTENT_ROUTER_THRESHOLD', 0.7))
+
+# Import path of the search algorithm SearchMatch uses to find candidate statements,
+# empty uses chatterbot's IndexedTextSearch. bk_tree_search.BKTreeSearch is meant
+# for inputs with typos, not as the general algorithm: it only finds statements
+# spelled within the similarity threshold of the input, never a looser paraphrase.
+# While comparisons were cut off under the threshold it answered 38% of the benchmark's
+# paraphrases against IndexedTextSearch's 62%, and 77% of all queries against 81%
+SEARCH_ALGORITHM = os.environ.get('DCUBUDDY_SEARCH_ALGORITHM', '')
+
+# Used when SEARCH_ALGORITHM is embedding_search.EmbeddingSearch: a spaCy model
+# with word vectors and where the memory-mapped matrix of statement vectors is saved
+SPACY_MODEL = os.environ.get('DCUBUDDY_SPACY_MODEL', 'en_core_web_md')
+EMBEDDING_MATRIX_PATH = os.environ.get('DCUBUDDY_EMBEDDING_MATRIX_PATH', 'statement_vectors.npy')
+
+# Used when SEARCH_ALGORITHM is bk_tree_search.BKTreeSearch: where the tree of statement texts is saved
+BK_TREE_PATH = os.environ.get('DCUBUDDY_BK_TREE_PATH', 'statement_bk_tree.pickle')
+
+# Processes used to tag the corpus when training, 0 uses one per CPU
+TRAINING_WORKERS = int(os.environ.get('DCUBUDDY_TRAINING_WORKERS', 0))
+
+# The compiled knowledge base served in the 'prebuilt' mode
+KNOWLEDGE_BASE_PATH = os.environ.get('DCUBUDDY_KNOWLEDGE_BASE_PATH', 'knowledge_base.sqlite3')
+
+# The storage adapter the 'in_memory' mode loads statements from and sends writes to,
+# when DCUBUDDY_IN_MEMORY_WRITES is 0 nothing is written, so the backing store must
+# already be trained and nothing is learned
+IN_MEMORY_BACKING_STORE = os.environ.get('DCUBUDDY_IN_MEMORY_BACKING_STORE', 'sqlite_storage.SQLiteStorageAdapter')
+IN_MEMORY_WRITES = os.environ.get('DCUBUDDY_IN_MEMORY_WRITES', '1') == '1'
+
+# Base URL of the opentimetable broker, point it at tools/fake_opentimetable.py
+# to run the timetable path offline
+OPENTIMETABLE_URL = os.environ.get('DCUBUDDY_OPENTIMETABLE_URL', 'https://opentimetable.dcu.ie').rstrip('/')
+
+# Time each stage of the chat request path, send the timings in a Server-Timing
+# header and add histograms of them to /metrics, which is served either way
+TRACING_ENABLED = os.environ.get('DCUBUDDY_TRACING', '0') == '1'
+
+# Profile live requests to /get: a fraction of them under cProfile, and the stack
+# samples of any other request slower than the threshold (in seconds, 0 is off;
+# /get waits 2 seconds before answering)
+PROFILING_ENABLED = os.environ.get('DCUBUDDY_PROFILING', '0') == '1'
+PROFILE_SAMPLE_RATE = float(os.environ.get('DCUBUDDY_PROFILE_SAMPLE_RATE', 0.01))
+PROFILE_SLOW_THRESHOLD = float(os.environ.get('DCUBUDDY_PROFILE_SLOW_THRESHOLD', 3))
+PROFILE_SAMPLE_INTERVAL = float(os.environ.get('DCUBUDDY_PROFILE_SAMPLE_INTERVAL', 0.005))
+
+# Where profiles are written and how many are kept
+PROFILE_DIRECTORY = os.environ.get('DCUBUDDY_PROFILE_DIRECTORY', 'profiles')
+PROFILE_RETENTION = int(os.environ.get('DCUBUDDY_PROFILE_RETENTION', 500))
+
+# Bearer token for listing and downloading profiles at /admin/profiles,
+# the endpoints are not added when it is empty
+PROFILE_ADMIN_TOKEN = os.environ.get('DCUBUDDY_PROFILE_ADMIN_TOKEN', '')
+
+# Level and format of the log written to stderr by a background thread,
+# 'json' writes one JSON object per record and 'text' one line of text
+LOG_LEVEL = os.environ.get('DCUBUDDY_LOG_LEVEL', 'INFO').upper()
+LOG_FORMAT = os.environ.get('DCUBUDDY_LOG_FORMAT', 'json')
+
+# Compare statements with bounded_comparisons.BoundedLevenshteinDistance, which scores
+# pairs that cannot reach SearchMatch's similarity threshold as 0 without comparing them.
+# SearchMatch answers from its best candidate even when it is under the threshold, so
+# this changes answers: on the search_match benchmark 74% of queries were answered
+# correctly instead of 81%, and 38% of paraphrases instead of 62%. Off by default
+BOUNDED_COMPARISON = os.environ.get('DCUBUDDY_BOUNDED_COMPARISON', '0') == '1'
+
+# Texts are cut to this many characters before BoundedLevenshteinDistance and the
+# BK-tree search compare them, so a long pasted message cannot make every comparison slow
+COMPARISON_MAX_LENGTH = int(os.environ.get('DCUBUDDY_COMPARISON_MAX_LENGTH', 300))
+
+# Inputs that got the default response are answered with it again without being
+# searched, for this many seconds. At most this many inputs are remembered, 0 is off
+NEGATIVE_CACHE_SIZE = int(os.environ.get('DCUBUDDY_NEGATIVE_CACHE_SIZE', 10000))
+NEGATIVE_CACHE_TTL = float(os.environ.get('DCUBUDDY_NEGATIVE_CACHE_TTL', 600))
+
+# Replies that are the same for every user are cached by input and knowledge base
+# version, keeping the most recently used ones. 0 is off. Inputs answered from
+# the cache are still learned from, on a background thread
+RESPONSE_CACHE_SIZE = int(os.environ.get('DCUBUDDY_RESPONSE_CACHE_SIZE', 1000))
+
+# The last prompt the chat bot gave each user, such as "Sure, what campus?", is kept
+# this many seconds so the answer to it is only compared with the corpus's replies
+# to that prompt. At most this many users are remembered, 0 is off
+CONVERSATION_STATE_SIZE = int(os.environ.get('DCUBUDDY_CONVERSATION_STATE_SIZE', 10000))
+CONVERSATION_STATE_TTL = float(os.environ.get('DCUBUDDY_CONVERSATION_STATE_TTL', 600))
+
+# Each user, or address when nobody is logged in, can send this many messages to /get
+# a second with bursts of up to RATE_LIMIT_BURST. Faster messages are answered with
+# a 429 straight away, 0 is off
+RATE_LIMIT = float(os.environ.get('DCUBUDDY_RATE_LIMIT', 1))
+RATE_LIMIT_BURST = int(os.environ.get('DCUBUDDY_RATE_LIMIT_BURST', 5))
+
+# At most this many requests search the knowledge base, and fetch timetables from
+# opentimetable, at once. Others wait up to ADMISSION_QUEUE_TIMEOUT seconds for a
+# turn and are then answered with a 503, 0 is no limit
+NLP_CONCURRENCY = int(os.environ.get('DCUBUDDY_NLP_CONCURRENCY', 4))
+UPSTREAM_CONCURRENCY = int(os.environ.get('DCUBUDDY_UPSTREAM_CONCURRENCY', 8))
+ADMISSION_QUEUE_TIMEOUT = float(os.environ.get('DCUBUDDY_ADMISSION_QUEUE_TIMEOUT', 1))
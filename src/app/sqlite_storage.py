@@ -0,0 +1,126 @@
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import QueuePool
+from sqlalchemy.sql.dml import UpdateBase
+from chatterbot.storage import SQLStorageAdapter
+import settings
+
+
+def get_sqlite_pragmas(read_only=False):
+    """
+        Pragmas applied to each new SQLite connection
+    """
+    pragmas = [
+        ('journal_mode', 'WAL'),
+        ('synchronous', settings.SQLITE_SYNCHRONOUS),
+        ('mmap_size', settings.SQLITE_MMAP_SIZE),
+        ('cache_size', settings.SQLITE_CACHE_SIZE),
+        ('busy_timeout', settings.SQLITE_BUSY_TIMEOUT),
+        ('temp_store', 'MEMORY'),
+    ]
+    if read_only:
+        pragmas.append(('query_only', 'ON'))
+    return pragmas
+
+
+def apply_sqlite_pragmas(engine, read_only=False):
+    """
+        Run the tuning pragmas on every connection the engine opens
+    """
+    pragmas = get_sqlite_pragmas(read_only)
+
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas:
+            cursor.execute('PRAGMA {}={}'.format(name, value))
+        cursor.close()
+
+    return engine
+
+
+def get_read_engine(storage):
+    """
+        Gets the engine to read a storage adapter's statements through, its
+        pool of read connections when it has one, or None when the adapter
+        does not keep its statements in a SQL database
+    """
+    return getattr(storage, 'read_engine', getattr(storage, 'engine', None))
+
+
+def is_sqlite_file_uri(database_uri):
+    return database_uri.startswith('sqlite:///') and database_uri != 'sqlite:///:memory:'
+
+
+class RoutingSession(Session):
+    """
+    A session that reads through the reader engine until it has to write.
+    Once anything has been flushed the rest of the session uses the writer
+    engine, so rows written by the session are visible to it.
+    """
+
+    def __init__(self, writer, reader, **kwargs):
+        super().__init__(**kwargs)
+        self.writer = writer
+        self.reader = reader
+        self.has_written = False
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if self._flushing or isinstance(clause, UpdateBase):
+            self.has_written = True
+
+        if self.has_written:
+            return self.writer
+        return self.reader
+
+
+class SQLiteStorageAdapter(SQLStorageAdapter):
+    """
+    A SQLStorageAdapter tuned for a SQLite file database that is read by
+    many Flask threads at once.
+
+    Connections are opened in WAL mode with the pragmas from ``settings``.
+    Reads are served from a pool of read-only connections while writes go
+    through a single writer connection, so readers never wait behind a
+    write and writers queue in the pool instead of failing with
+    ``database is locked``.
+
+    Other databases are used exactly as with ``SQLStorageAdapter``.
+
+    :keyword reader_pool_size: The number of pooled read connections.
+        Defaults to ``settings.SQLITE_READER_POOL_SIZE``.
+    :type reader_pool_size: int
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+
+        if not is_sqlite_file_uri(self.database_uri):
+            return
+
+        reader_pool_size = kwargs.get('reader_pool_size', settings.SQLITE_READER_POOL_SIZE)
+
+        self.engine.dispose()
+
+        self.engine = apply_sqlite_pragmas(create_engine(
+            self.database_uri,
+            poolclass=QueuePool,
+            pool_size=1,
+            max_overflow=0,
+            connect_args={'check_same_thread': False}
+        ))
+
+        self.read_engine = apply_sqlite_pragmas(create_engine(
+            self.database_uri,
+            poolclass=QueuePool,
+            pool_size=reader_pool_size,
+            max_overflow=0,
+            connect_args={'check_same_thread': False}
+        ), read_only=True)
+
+        self.Session = sessionmaker(
+            class_=RoutingSession,
+            writer=self.engine,
+            reader=self.read_engine,
+            expire_on_commit=True
+        )
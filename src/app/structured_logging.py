@@ -0,0 +1,162 @@
+"""
+Logging that keeps formatting and writing off the request threads.
+
+``configure`` gives the root logger a ``DeferredQueueHandler``. It only
+stamps each record with the id of the request that logged it and puts the
+record on a queue. A ``QueueListener`` thread then merges the message
+arguments, formats the record as one line of JSON (or as plain text) and
+writes it to stderr.
+
+``init_app`` gives every Flask request an id. It uses the ``X-Request-ID``
+header of the request when there is one, and returns the id in the
+response's ``X-Request-ID`` header.
+"""
+import re
+import sys
+import json
+import uuid
+import queue
+import atexit
+import logging
+import contextvars
+from logging.handlers import QueueHandler, QueueListener
+import settings
+
+
+# The id of the request being handled, added to every record logged while handling it
+current_request_id = contextvars.ContextVar('current_request_id', default=None)
+
+TEXT_FORMAT = '%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s'
+
+# Request ids sent by clients are only used when they cannot break a log line
+REQUEST_ID_PATTERN = re.compile(r'^[\w.-]{1,64}$')
+
+listener = None
+queue_handler = None
+
+
+class DeferredQueueHandler(QueueHandler):
+    """
+    A queue handler that leaves formatting to the listener thread.
+
+    ``QueueHandler`` formats every record before queueing it, so that the
+    record can be pickled. Records here never leave the process, so they are
+    queued as they are and only stamped with the request id. Arguments are
+    merged into the message later, so log values rather than objects that
+    the request goes on to change, such as ORM instances.
+    """
+
+    def prepare(self, record):
+        record.request_id = current_request_id.get()
+        return record
+
+
+class JSONFormatter(logging.Formatter):
+    """
+    Formats a record as a JSON object on one line.
+    """
+
+    def format(self, record):
+        data = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'request_id': getattr(record, 'request_id', None),
+            'thread': record.threadName,
+        }
+        if record.exc_info:
+            data['exception'] = self.formatException(record.exc_info)
+        return json.dumps(data, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """
+    Formats a record as one line of text that includes the request id.
+    """
+
+    def __init__(self):
+        super().__init__(TEXT_FORMAT)
+
+    def formatMessage(self, record):
+        # Records that did not come through the queue have no request id
+        if not hasattr(record, 'request_id'):
+            record.request_id = None
+        return super().formatMessage(record)
+
+
+def get_formatter(log_format):
+    if log_format == 'json':
+        return JSONFormatter()
+    return TextFormatter()
+
+
+def configure(level=None, log_format=None, stream=None):
+    """
+        Sends every record of the root logger through a queue to a
+        background thread that writes them, returning its listener
+    """
+    global listener, queue_handler
+
+    if listener is not None:
+        return listener
+
+    writer = logging.StreamHandler(stream or sys.stderr)
+    writer.setFormatter(get_formatter(log_format or settings.LOG_FORMAT))
+
+    records = queue.SimpleQueue()
+
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    queue_handler = DeferredQueueHandler(records)
+    root.addHandler(queue_handler)
+    root.setLevel(level or settings.LOG_LEVEL)
+
+    listener = QueueListener(records, writer)
+    listener.start()
+
+    # Records still on the queue are written before the process exits
+    atexit.register(stop)
+
+    return listener
+
+
+def stop():
+    """
+        Writes the queued records and removes the queue from the root logger
+    """
+    global listener, queue_handler
+
+    if listener is not None:
+        logging.getLogger().removeHandler(queue_handler)
+        listener.stop()
+        listener = None
+        queue_handler = None
+
+
+def init_app(app):
+    """
+        Gives every request of a Flask app an id
+    """
+    from flask import g, request
+
+    @app.before_request
+    def begin_request_id():
+        request_id = request.headers.get('X-Request-ID', '')
+        if not REQUEST_ID_PATTERN.match(request_id):
+            request_id = uuid.uuid4().hex
+        g.request_id = request_id
+        g.request_id_token = current_request_id.set(request_id)
+
+    @app.after_request
+    def add_request_id(response):
+        if 'request_id' in g:
+            response.headers['X-Request-ID'] = g.request_id
+        return response
+
+    @app.teardown_request
+    def end_request_id(exception=None):
+        token = g.pop('request_id_token', None)
+        if token is not None:
+            current_request_id.reset(token)
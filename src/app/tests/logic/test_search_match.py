@@ -0,0 +1,168 @@
+from unittest import mock
+from chatterbot.conversation import Statement
+from bounded_comparisons import BoundedLevenshteinDistance
+from search_all_adapter import SearchMatch
+from tests.base_case import ChatBotTestCase
+
+
+class FixedIntentRouter(object):
+
+    def __init__(self, category, confidence):
+        self.category = category
+        self.confidence = confidence
+
+    def predict(self, text):
+        return self.category, self.confidence
+
+
+class NoComparisonSearch(object):
+    """
+    A search algorithm that does not compare texts, like EmbeddingSearch.
+    """
+
+    name = 'no_comparison_search'
+
+    def __init__(self, chatbot, **kwargs):
+        self.chatbot = chatbot
+
+    def search(self, input_statement, **additional_parameters):
+        return iter([])
+
+
+class SearchMatchIntentRouterTests(ChatBotTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.chatbot.storage.create_many([
+            Statement(text='show me the map', search_text='VB:map', tags=['map']),
+            Statement(text='show me the timetable', search_text='VB:timetable', tags=['timetable']),
+        ])
+        self.statement = Statement(text='show me the map', search_text='VB:map VB:timetable')
+
+    def get_search_texts(self, router):
+        adapter = SearchMatch(self.chatbot, intent_router=router)
+        return [result.text for result in adapter.get_search_results(self.statement)]
+
+    def test_without_router_searches_everything(self):
+        results = self.get_search_texts(None)
+
+        self.assertEqual(results[-1], 'show me the map')
+
+    def test_confident_prediction_searches_category(self):
+        self.statement = Statement(text='show me the timetable', search_text='VB:map VB:timetable')
+
+        results = self.get_search_texts(FixedIntentRouter('timetable', 0.9))
+
+        self.assertEqual(results, ['show me the timetable'])
+
+    def test_weak_match_in_category_searches_everything(self):
+        results = self.get_search_texts(FixedIntentRouter('timetable', 0.9))
+
+        self.assertEqual(results[-1], 'show me the map')
+
+    def test_low_confidence_searches_everything(self):
+        results = self.get_search_texts(FixedIntentRouter('timetable', 0.1))
+
+        self.assertEqual(results[-1], 'show me the map')
+
+    def test_empty_category_searches_everything(self):
+        results = self.get_search_texts(FixedIntentRouter('food', 0.9))
+
+        self.assertEqual(results[-1], 'show me the map')
+
+
+class SearchMatchComparisonTests(ChatBotTestCase):
+
+    def test_comparisons_are_cut_off_at_the_threshold(self):
+        adapter = SearchMatch(
+            self.chatbot,
+            search_algorithm='inverted_index_search.InvertedIndexSearch',
+            statement_comparison_function=BoundedLevenshteinDistance,
+            maximum_similarity_threshold=0.9
+        )
+
+        self.assertEqual(adapter.search_algorithm.compare_statements.minimum_similarity, 0.9)
+
+
+class SearchMatchFollowUpTests(ChatBotTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.chatbot.storage.create_many([
+            Statement(text='map', search_text='NN:map'),
+            Statement(
+                text='Sure, what campus?', search_text='what:campus',
+                in_response_to='map', search_in_response_to='NN:map'
+            ),
+            Statement(
+                text='glasnevin', search_text='NN:glasnevin',
+                in_response_to='Sure, what campus?', search_in_response_to='what:campus'
+            ),
+            Statement(
+                text='glasnevin', search_text='NN:glasnevin',
+                in_response_to='Which campus is your class on?', search_in_response_to='what:campus'
+            ),
+            Statement(
+                text='pats', search_text='NN:pats',
+                in_response_to='Sure, what campus?', search_in_response_to='what:campus'
+            ),
+            Statement(
+                text='Here is the map of Glasnevin', search_text='map:glasnevin',
+                in_response_to='glasnevin', search_in_response_to='NN:glasnevin'
+            ),
+        ])
+        self.adapter = SearchMatch(self.chatbot, maximum_similarity_threshold=0.9)
+
+    def get_statement(self, text, prompt='Sure, what campus?'):
+        return Statement(
+            text=text, search_text='NN:' + text,
+            in_response_to=prompt, search_in_response_to='what:campus'
+        )
+
+    def test_follow_up_match(self):
+        match = self.adapter.get_follow_up_match(self.get_statement('glasnevn'))
+
+        self.assertEqual(match.text, 'glasnevin')
+        self.assertEqual(match.in_response_to, 'Sure, what campus?')
+        self.assertGreaterEqual(match.confidence, 0.9)
+
+    def test_search_algorithm_without_comparison(self):
+        adapter = SearchMatch(
+            self.chatbot,
+            search_algorithm='tests.logic.test_search_match.NoComparisonSearch',
+            maximum_similarity_threshold=0.9
+        )
+
+        match = adapter.get_follow_up_match(self.get_statement('glasnevn'))
+
+        self.assertEqual(match.text, 'glasnevin')
+
+    def test_only_replies_to_the_prompt(self):
+        match = self.adapter.get_follow_up_match(self.get_statement('pats', prompt='Which campus is your class on?'))
+
+        self.assertIsNone(match)
+
+    def test_no_prompt(self):
+        self.assertIsNone(self.adapter.get_follow_up_match(Statement(text='glasnevin', search_text='NN:glasnevin')))
+
+    def test_unrelated_answer(self):
+        self.assertIsNone(self.adapter.get_follow_up_match(self.get_statement('where is the library?')))
+
+    def test_process_answers_follow_up(self):
+        with mock.patch.object(self.chatbot.storage.tagger, 'get_bigram_pair_string', return_value='NN:glasnevn'):
+            response = self.adapter.process(self.get_statement('glasnevn'))
+
+        self.assertEqual(response.text, 'Here is the map of Glasnevin')
+
+
+class SearchMatchFollowUpInMemoryTests(SearchMatchFollowUpTests):
+    """
+    The same tests with the statements kept in memory, where there is no
+    database to query.
+    """
+
+    def get_kwargs(self):
+        kwargs = super().get_kwargs()
+        kwargs['storage_adapter'] = 'memory_storage.InMemoryStorageAdapter'
+        kwargs['backing_storage_adapter'] = 'chatterbot.storage.SQLStorageAdapter'
+        return kwargs
@@ -0,0 +1,115 @@
+import os
+import time
+import tempfile
+from unittest import TestCase
+from chatterbot.conversation import Statement
+from buffered_storage import (
+    StatementWriteBuffer, WriteBehindSQLStorageAdapter, ReadOnlySQLStorageAdapter
+)
+
+
+class StatementWriteBufferTests(TestCase):
+
+    def setUp(self):
+        self.batches = []
+
+    def tearDown(self):
+        self.buffer.close()
+
+    def test_flush_on_batch_size(self):
+        self.buffer = StatementWriteBuffer(self.batches.append, batch_size=2, flush_interval=60)
+
+        self.buffer.add('A')
+        self.buffer.add('B')
+
+        for _ in range(100):
+            if self.batches:
+                break
+            time.sleep(0.01)
+
+        self.assertEqual(self.batches, [['A', 'B']])
+
+    def test_flush_on_interval(self):
+        self.buffer = StatementWriteBuffer(self.batches.append, batch_size=100, flush_interval=0.05)
+
+        self.buffer.add('A')
+        time.sleep(0.3)
+
+        self.assertEqual(self.batches, [['A']])
+
+    def test_close_flushes_pending(self):
+        self.buffer = StatementWriteBuffer(self.batches.append, batch_size=100, flush_interval=60)
+
+        self.buffer.add('A')
+        self.buffer.close()
+
+        self.assertEqual(self.batches, [['A']])
+        self.assertEqual(len(self.buffer), 0)
+
+    def test_add_after_close_writes_immediately(self):
+        self.buffer = StatementWriteBuffer(self.batches.append, batch_size=100, flush_interval=60)
+        self.buffer.close()
+
+        self.buffer.add('A')
+
+        self.assertEqual(self.batches, [['A']])
+
+
+class WriteBehindSQLStorageAdapterTests(TestCase):
+
+    def setUp(self):
+        # A file database is used because each thread gets its own in-memory sqlite database
+        self.directory = tempfile.TemporaryDirectory()
+        self.adapter = WriteBehindSQLStorageAdapter(
+            database_uri='sqlite:///' + os.path.join(self.directory.name, 'test.sqlite3'),
+            write_behind_batch_size=100,
+            write_behind_interval=60
+        )
+
+    def tearDown(self):
+        self.adapter.close()
+        self.adapter.engine.dispose()
+        self.directory.cleanup()
+
+    def test_create_is_deferred_until_flush(self):
+        statement = self.adapter.create(text='Hello', search_text='hello', tags=['greetings'])
+
+        self.assertEqual(statement.text, 'Hello')
+        self.assertEqual(self.adapter.count(), 0)
+
+        self.adapter.flush()
+
+        self.assertEqual(self.adapter.count(), 1)
+        results = list(self.adapter.filter(text='Hello'))
+        self.assertEqual(results[0].get_tags(), ['greetings'])
+
+    def test_close_flushes(self):
+        self.adapter.create(text='Hello', search_text='hello')
+        self.adapter.create(text='Hi', search_text='hi')
+        self.adapter.close()
+
+        self.assertEqual(self.adapter.count(), 2)
+
+    def test_drop_discards_pending(self):
+        self.adapter.create(text='Hello', search_text='hello')
+        self.adapter.drop()
+        self.adapter.flush()
+
+        self.assertEqual(self.adapter.count(), 0)
+
+
+class ReadOnlySQLStorageAdapterTests(TestCase):
+
+    def setUp(self):
+        self.adapter = ReadOnlySQLStorageAdapter(database_uri=None)
+
+    def test_create_does_not_write(self):
+        statement = self.adapter.create(text='Hello', search_text='hello')
+
+        self.assertEqual(statement.text, 'Hello')
+        self.assertEqual(self.adapter.count(), 0)
+
+    def test_create_many_does_not_write(self):
+        self.adapter.create_many([Statement(text='Hello', search_text='hello')])
+
+        self.assertEqual(self.adapter.count(), 0)
@@ -0,0 +1,136 @@
+import os
+import tempfile
+from unittest import TestCase, mock
+from chatterbot.conversation import Statement
+from chatterbot.storage import SQLStorageAdapter
+from conversation_log import (
+    ConversationLog, ConversationLogStorageAdapter,
+    archive_learned_statements, promote_statements, PROMOTED_CONVERSATION
+)
+
+
+class ConversationLogTestCase(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+
+class ConversationLogTests(ConversationLogTestCase):
+
+    def test_append_and_read(self):
+        log = ConversationLog(directory=self.directory.name)
+
+        log.append([Statement(text='Hello', search_text='hello')])
+        log.append([Statement(text='Hi', in_response_to='Hello')])
+
+        records = list(log.read())
+
+        self.assertEqual([record['text'] for record in records], ['Hello', 'Hi'])
+        self.assertEqual(records[1]['in_response_to'], 'Hello')
+        self.assertEqual(len(log.get_segments()), 1)
+
+    def test_rotates_on_size(self):
+        log = ConversationLog(directory=self.directory.name, max_bytes=1)
+
+        log.append([Statement(text='Hello')])
+        log.append([Statement(text='Hi')])
+
+        self.assertEqual(len(log.get_segments()), 2)
+        self.assertEqual(len(list(log.read())), 2)
+
+    def test_rotates_on_every_append_without_a_maximum_age(self):
+        log = ConversationLog(directory=self.directory.name, max_age=0)
+
+        log.append([Statement(text='Hello')])
+        log.append([Statement(text='Hi')])
+
+        self.assertEqual(len(log.get_segments()), 2)
+
+    def test_retention(self):
+        log = ConversationLog(directory=self.directory.name, max_bytes=1, retention=2)
+
+        for text in ('A', 'B', 'C'):
+            log.append([Statement(text=text)])
+
+        self.assertEqual(len(log.get_segments()), 2)
+        self.assertEqual([record['text'] for record in log.read()], ['B', 'C'])
+
+
+class ConversationLogStorageAdapterTests(ConversationLogTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.adapter = ConversationLogStorageAdapter(
+            database_uri='sqlite:///' + os.path.join(self.directory.name, 'test.sqlite3'),
+            conversation_log_directory=os.path.join(self.directory.name, 'log'),
+            write_behind_interval=60
+        )
+
+    def tearDown(self):
+        self.adapter.close()
+        self.adapter.engine.dispose()
+        self.adapter.read_engine.dispose()
+        super().tearDown()
+
+    def test_learned_statements_are_logged(self):
+        self.adapter.create(text='Hello', search_text='hello')
+        self.adapter.flush()
+
+        self.assertEqual(self.adapter.count(), 0)
+        self.assertEqual(
+            [record['text'] for record in self.adapter.conversation_log.read()], ['Hello']
+        )
+
+    def test_training_statements_are_stored(self):
+        self.adapter.create_many([
+            Statement(text='Hello', search_text='hello', conversation='training')
+        ])
+
+        self.assertEqual(self.adapter.count(), 1)
+
+
+class ArchiveAndPromoteTests(ConversationLogTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.storage = SQLStorageAdapter(database_uri=None)
+        self.log = ConversationLog(directory=self.directory.name)
+
+    def test_archive_learned_statements(self):
+        self.storage.create_many([
+            Statement(text='Hello', search_text='hello', conversation='training', tags=['greetings']),
+            Statement(text='Hi there', search_text='there', conversation=''),
+        ])
+
+        archived = archive_learned_statements(self.storage, self.log)
+
+        self.assertEqual(archived, 1)
+        self.assertEqual([statement.text for statement in self.storage.filter()], ['Hello'])
+        self.assertEqual([record['text'] for record in self.log.read()], ['Hi there'])
+
+    def test_statements_learned_while_archiving_are_kept(self):
+        self.storage.create(text='Hi there', search_text='there', conversation='')
+        append = self.log.append
+
+        def learn_while_appending(statements):
+            append(statements)
+            self.storage.create(text='Bye', search_text='bye', conversation='')
+
+        with mock.patch.object(self.log, 'append', side_effect=learn_while_appending):
+            archived = archive_learned_statements(self.storage, self.log)
+
+        self.assertEqual(archived, 1)
+        self.assertEqual([statement.text for statement in self.storage.filter()], ['Bye'])
+        self.assertEqual([record['text'] for record in self.log.read()], ['Hi there'])
+
+    def test_promote_statements(self):
+        self.log.append([Statement(text='Library hours?', search_text='library:hours')])
+
+        promote_statements(self.storage, self.log.read())
+
+        results = list(self.storage.filter(conversation=PROMOTED_CONVERSATION))
+        self.assertEqual(len(results), 1)
+        self.assertEqual(results[0].search_text, 'library:hours')
@@ -0,0 +1,127 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+from unittest import TestCase
+import spacy
+from spacy.language import Language
+from knowledge_base import (
+    ARTIFACT_FORMAT, KnowledgeBaseStorageAdapter, compile_knowledge_base,
+    get_corpus_version, read_metadata
+)
+
+
+@Language.component('test_knowledge_base_lemmas')
+def lowercase_lemmas(document):
+    for token in document:
+        token.lemma_ = token.lower_
+    return document
+
+
+class KnowledgeBaseTestCase(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.mkdtemp()
+
+        cls.spacy_model = os.path.join(cls.directory, 'model')
+        nlp = spacy.blank('en')
+        nlp.add_pipe('test_knowledge_base_lemmas')
+        nlp.to_disk(cls.spacy_model)
+
+        cls.corpus = os.path.join(cls.directory, 'corpus')
+        os.mkdir(cls.corpus)
+        with open(os.path.join(cls.corpus, 'map.yml'), 'w') as corpus_file:
+            corpus_file.write(
+                'categories:\n- map\n'
+                'conversations:\n'
+                '- - where is the campus map\n  - Here is the map\n'
+                '- - where is the library\n  - Beside the Henry Grattan building\n'
+            )
+
+        cls.output = os.path.join(cls.directory, 'output')
+        os.mkdir(cls.output)
+
+        cls.path = compile_knowledge_base(
+            [cls.corpus], cls.output, spacy_model=cls.spacy_model, workers=1, initialize=False
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.directory)
+
+
+class CompileKnowledgeBaseTests(KnowledgeBaseTestCase):
+
+    def test_file_is_named_by_version(self):
+        version = get_corpus_version(self.corpus)
+
+        self.assertEqual(os.path.basename(self.path), 'knowledge_base-{}.sqlite3'.format(version))
+        self.assertEqual(os.listdir(self.output), [os.path.basename(self.path)])
+
+    def test_metadata(self):
+        metadata = read_metadata(self.path)
+
+        self.assertEqual(metadata['format'], ARTIFACT_FORMAT)
+        self.assertEqual(metadata['version'], get_corpus_version(self.corpus))
+        self.assertEqual(metadata['statements'], '4')
+
+    def test_artifact_is_self_contained(self):
+        self.assertFalse(os.path.exists(self.path + '-wal'))
+
+        connection = sqlite3.connect(self.path)
+        try:
+            self.assertEqual(connection.execute('PRAGMA journal_mode').fetchone()[0], 'delete')
+            tables = {row[0] for row in connection.execute("SELECT name FROM sqlite_master")}
+        finally:
+            connection.close()
+
+        self.assertIn('statement_fts', tables)
+        self.assertIn('ix_statement_search_in_response_to_covering', tables)
+        self.assertIn('sqlite_stat1', tables)
+
+    def test_version_changes_with_corpus(self):
+        version = get_corpus_version(self.corpus)
+        path = os.path.join(self.corpus, 'food.yml')
+
+        with open(path, 'w') as corpus_file:
+            corpus_file.write('categories:\n- food\nconversations:\n- - hungry\n  - eat\n')
+        try:
+            self.assertNotEqual(get_corpus_version(self.corpus), version)
+        finally:
+            os.remove(path)
+
+
+class KnowledgeBaseStorageAdapterTests(KnowledgeBaseTestCase):
+
+    def setUp(self):
+        self.adapter = KnowledgeBaseStorageAdapter(knowledge_base_path=self.path)
+
+    def tearDown(self):
+        self.adapter.engine.dispose()
+
+    def test_reads(self):
+        self.assertEqual(self.adapter.count(), 4)
+        self.assertEqual(self.adapter.version, get_corpus_version(self.corpus))
+
+        results = list(self.adapter.filter(in_response_to='where is the library'))
+
+        self.assertEqual([result.text for result in results], ['Beside the Henry Grattan building'])
+        self.assertEqual(results[0].get_tags(), ['map'])
+
+    def test_writes_are_ignored(self):
+        self.adapter.create(text='new statement')
+        self.adapter.remove('Here is the map')
+
+        self.assertEqual(self.adapter.count(), 4)
+
+    def test_unknown_format(self):
+        path = os.path.join(self.directory, 'old.sqlite3')
+        shutil.copy(self.path, path)
+        connection = sqlite3.connect(path)
+        connection.execute("UPDATE knowledge_base SET value = '0' WHERE key = 'format'")
+        connection.commit()
+        connection.close()
+
+        with self.assertRaises(ValueError):
+            KnowledgeBaseStorageAdapter(knowledge_base_path=path)
@@ -0,0 +1,134 @@
+import os
+import tempfile
+from unittest import TestCase
+from chatterbot.conversation import Statement
+from memory_storage import InMemoryStorageAdapter
+from sqlite_storage import SQLiteStorageAdapter
+
+
+class InMemoryStorageAdapterTestCase(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.database_uri = 'sqlite:///' + os.path.join(self.directory.name, 'test.sqlite3')
+        self.backing_storage = SQLiteStorageAdapter(database_uri=self.database_uri)
+        self.backing_storage.create_many([
+            Statement(text='where is the library', search_text='VB:library', conversation='training', tags=['map']),
+            Statement(
+                text='Beside the Henry Grattan building', search_text='NN:building', conversation='training',
+                in_response_to='where is the library', search_in_response_to='VB:library', tags=['map']
+            ),
+            Statement(text='Hello', search_text='hello', conversation='training', persona='bot:DCUBuddy'),
+        ])
+        self.adapter = self.get_adapter()
+
+    def tearDown(self):
+        for adapter in (self.backing_storage, self.adapter.backing_storage):
+            if adapter is not None:
+                adapter.engine.dispose()
+                adapter.read_engine.dispose()
+        self.directory.cleanup()
+
+    def get_adapter(self, **kwargs):
+        return InMemoryStorageAdapter(database_uri=self.database_uri, **kwargs)
+
+
+class InMemoryStorageAdapterReadTests(InMemoryStorageAdapterTestCase):
+
+    def setUp(self):
+        super().setUp()
+        # Reads must not need the database
+        backing_storage = self.adapter.backing_storage
+        backing_storage.engine.dispose()
+        backing_storage.read_engine.dispose()
+        self.adapter.backing_storage = None
+
+    def test_count(self):
+        self.assertEqual(self.adapter.count(), 3)
+
+    def test_filter_by_field(self):
+        results = list(self.adapter.filter(search_in_response_to='VB:library'))
+
+        self.assertEqual([result.text for result in results], ['Beside the Henry Grattan building'])
+        self.assertEqual(results[0].in_response_to, 'where is the library')
+        self.assertEqual(results[0].get_tags(), ['map'])
+        self.assertIsNotNone(results[0].id)
+
+    def test_filter_by_id(self):
+        statement_id = list(self.adapter.filter(text='where is the library'))[0].id
+
+        results = list(self.adapter.filter(id=statement_id))
+
+        self.assertEqual([result.text for result in results], ['where is the library'])
+        self.assertEqual(len(self.adapter.table.get_rows({'id': statement_id}, [])), 1)
+
+    def test_filter_search_text_contains(self):
+        results = list(self.adapter.filter(
+            search_text_contains='NN:building hello', persona_not_startswith='bot:'
+        ))
+
+        self.assertEqual([result.text for result in results], ['Beside the Henry Grattan building'])
+
+    def test_filter_exclude_text_words(self):
+        results = list(self.adapter.filter(conversation='training', exclude_text_words=['GRATTAN', 'hello']))
+
+        self.assertEqual([result.text for result in results], ['where is the library'])
+
+    def test_filter_tags(self):
+        self.assertEqual(len(list(self.adapter.filter(tags='map'))), 2)
+        self.assertEqual(list(self.adapter.filter(tags=['food'])), [])
+
+    def test_filter_order_by(self):
+        results = list(self.adapter.filter(order_by=['text']))
+
+        self.assertEqual([result.text for result in results], [
+            'Beside the Henry Grattan building', 'Hello', 'where is the library'
+        ])
+
+    def test_get_random(self):
+        self.assertIn(self.adapter.get_random().text, [
+            'where is the library', 'Beside the Henry Grattan building', 'Hello'
+        ])
+
+
+class InMemoryStorageAdapterWriteTests(InMemoryStorageAdapterTestCase):
+
+    def test_create_writes_through(self):
+        statement = self.adapter.create(text='Hi', search_text='hi', conversation='user')
+
+        self.assertEqual(list(self.adapter.filter(conversation='user'))[0].id, statement.id)
+        self.assertEqual(self.backing_storage.count(), 4)
+
+    def test_remove(self):
+        self.adapter.remove('Hello')
+
+        self.assertEqual(self.adapter.count(), 2)
+        self.assertEqual(self.backing_storage.count(), 2)
+
+    def test_writes_disabled(self):
+        self.adapter.backing_storage.engine.dispose()
+        self.adapter.backing_storage.read_engine.dispose()
+        self.adapter = adapter = self.get_adapter(in_memory_writes=False)
+
+        statement = adapter.create(text='Hi', search_text='hi', tags=['greetings'])
+        adapter.remove('Hello')
+
+        self.assertEqual(statement.get_tags(), ['greetings'])
+        self.assertEqual(adapter.count(), 3)
+        self.assertEqual(self.backing_storage.count(), 3)
+
+    def test_writes_disabled_create_many(self):
+        self.adapter.backing_storage.engine.dispose()
+        self.adapter.backing_storage.read_engine.dispose()
+        self.adapter = adapter = self.get_adapter(in_memory_writes=False)
+
+        with self.assertRaises(adapter.WritesDisabledException):
+            adapter.create_many([Statement(text='Hey', search_text='hey')])
+
+        self.assertEqual(self.backing_storage.count(), 3)
+
+    def test_empty_get_random(self):
+        self.adapter.drop()
+
+        with self.assertRaises(InMemoryStorageAdapter.EmptyDatabaseException):
+            self.adapter.get_random()
@@ -0,0 +1,122 @@
+import os
+import tempfile
+from unittest import TestCase
+from chatterbot.conversation import Statement
+from chatterbot.storage import SQLStorageAdapter
+import schema_maintenance
+
+
+class SchemaMaintenanceTestCase(TestCase):
+
+    def setUp(self):
+        self.adapter = SQLStorageAdapter(database_uri=None)
+        self.adapter.create_many([
+            Statement(
+                text='Sure, what campus?',
+                search_text='what:campus',
+                in_response_to='can you show me the map?',
+                search_in_response_to='show:map',
+                tags=['map']
+            ),
+            Statement(text='can you show me the map?', search_text='show:map', tags=['map']),
+        ])
+        schema_maintenance.prepare(self.adapter.engine)
+
+    def get_query_plan(self, query):
+        compiled = query.statement.compile(
+            self.adapter.engine, compile_kwargs={'literal_binds': True}
+        )
+        return ' '.join(schema_maintenance.explain_query_plan(self.adapter.engine, str(compiled)))
+
+
+class SchemaMaintenanceTests(SchemaMaintenanceTestCase):
+
+    def test_indexes_created(self):
+        with self.adapter.engine.connect() as connection:
+            names = {
+                row[0] for row in connection.execute(
+                    "SELECT name FROM sqlite_master WHERE type = 'index'"
+                )
+            }
+
+        self.assertTrue(set(schema_maintenance.INDEXES).issubset(names))
+
+    def test_ensure_indexes_is_repeatable(self):
+        schema_maintenance.prepare(self.adapter.engine)
+
+    def test_analyze_collects_statistics(self):
+        with self.adapter.engine.connect() as connection:
+            count = connection.execute('SELECT count(*) FROM sqlite_stat1').scalar()
+
+        self.assertGreater(count, 0)
+
+    def test_search_in_response_to_uses_covering_index(self):
+        """
+        The query issued by storage.filter(search_in_response_to=...) in SearchMatch.process.
+        """
+        Statement = self.adapter.get_model('statement')
+        session = self.adapter.Session()
+
+        query = session.query(Statement).filter_by(
+            search_in_response_to='show:map'
+        ).slice(0, 1000)
+
+        self.assertIn(
+            'USING COVERING INDEX ix_statement_search_in_response_to_covering',
+            self.get_query_plan(query)
+        )
+        session.close()
+
+    def test_tag_lazy_load_uses_index(self):
+        Statement = self.adapter.get_model('statement')
+        Tag = self.adapter.get_model('tag')
+        session = self.adapter.Session()
+
+        query = session.query(Tag).join(Statement.tags).filter(Statement.id == 1)
+
+        self.assertIn('ix_tag_association_statement_id', self.get_query_plan(query))
+        session.close()
+
+    def test_filter_results_unchanged(self):
+        results = list(self.adapter.filter(search_in_response_to='show:map'))
+
+        self.assertEqual(len(results), 1)
+        self.assertEqual(results[0].text, 'Sure, what campus?')
+        self.assertEqual(results[0].get_tags(), ['map'])
+
+
+class VacuumTests(TestCase):
+
+    def test_vacuum_and_optimize(self):
+        with tempfile.TemporaryDirectory() as directory:
+            adapter = SQLStorageAdapter(
+                database_uri='sqlite:///' + os.path.join(directory, 'test.sqlite3')
+            )
+            adapter.create_many([Statement(text='Hello', search_text='hello')])
+
+            schema_maintenance.vacuum(adapter.engine)
+            schema_maintenance.optimize(adapter.engine)
+
+            self.assertEqual(adapter.count(), 1)
+            adapter.engine.dispose()
+
+    def test_scheduler_stops(self):
+        adapter = SQLStorageAdapter(database_uri=None)
+        scheduler = schema_maintenance.MaintenanceScheduler(
+            adapter.engine, optimize_interval=0.01, vacuum_interval=0.02
+        ).start()
+
+        scheduler.stop()
+
+        self.assertFalse(scheduler._thread.is_alive())
+
+    def test_interval_of_zero_is_off(self):
+        adapter = SQLStorageAdapter(database_uri=None)
+        scheduler = schema_maintenance.MaintenanceScheduler(
+            adapter.engine, optimize_interval=0, vacuum_interval=0
+        ).start()
+
+        self.assertEqual((scheduler.optimize_interval, scheduler.vacuum_interval), (0, 0))
+        self.assertFalse(scheduler._thread.is_alive())
+
+        scheduler.stop()
@@ -0,0 +1,71 @@
+import os
+import tempfile
+from unittest import TestCase
+from sqlalchemy import create_engine
+from sqlite_storage import SQLiteStorageAdapter, RoutingSession, apply_sqlite_pragmas
+
+
+class ApplySqlitePragmasTests(TestCase):
+
+    def test_pragmas_applied_on_connect(self):
+        with tempfile.TemporaryDirectory() as directory:
+            engine = apply_sqlite_pragmas(create_engine(
+                'sqlite:///' + os.path.join(directory, 'test.db')
+            ))
+            connection = engine.connect()
+
+            self.assertEqual(connection.execute('PRAGMA journal_mode').scalar(), 'wal')
+            self.assertGreater(connection.execute('PRAGMA mmap_size').scalar(), 0)
+
+            connection.close()
+            engine.dispose()
+
+
+class SQLiteStorageAdapterTests(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.adapter = SQLiteStorageAdapter(
+            database_uri='sqlite:///' + os.path.join(self.directory.name, 'test.sqlite3')
+        )
+
+    def tearDown(self):
+        self.adapter.engine.dispose()
+        self.adapter.read_engine.dispose()
+        self.directory.cleanup()
+
+    def test_sessions_are_routed(self):
+        session = self.adapter.Session()
+
+        self.assertIsInstance(session, RoutingSession)
+        self.assertIs(session.get_bind(), self.adapter.read_engine)
+
+        session.close()
+
+    def test_read_connections_are_query_only(self):
+        connection = self.adapter.read_engine.connect()
+
+        self.assertEqual(connection.execute('PRAGMA query_only').scalar(), 1)
+
+        connection.close()
+
+    def test_create_and_filter(self):
+        statement = self.adapter.create(text='Hello', search_text='hello', tags=['greetings'])
+
+        self.assertIsNotNone(statement.id)
+
+        results = list(self.adapter.filter(search_text='hello'))
+
+        self.assertEqual(len(results), 1)
+        self.assertEqual(results[0].get_tags(), ['greetings'])
+
+    def test_remove(self):
+        self.adapter.create(text='Hello', search_text='hello')
+        self.adapter.remove('Hello')
+
+        self.assertEqual(self.adapter.count(), 0)
+
+    def test_memory_database_uses_single_engine(self):
+        adapter = SQLiteStorageAdapter(database_uri=None)
+
+        self.assertFalse(hasattr(adapter, 'read_engine'))
@@ -0,0 +1,183 @@
+import threading
+from unittest import TestCase
+from flask import Flask
+from flask_login import LoginManager
+from admission_control import (
+    RateLimiter, ConcurrencyLimit, Rejected, render_admission_metrics, init_app
+)
+
+
+class FakeClock(object):
+
+    def __init__(self):
+        self.time = 0
+
+    def __call__(self):
+        return self.time
+
+
+class RateLimiterTests(TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.rate_limiter = RateLimiter(0.5, 2, maximum_keys=2, clock=self.clock)
+
+    def test_burst_then_rejected(self):
+        self.rate_limiter.acquire('user:1')
+        self.rate_limiter.acquire('user:1')
+
+        with self.assertRaises(Rejected) as context:
+            self.rate_limiter.acquire('user:1')
+
+        self.assertEqual(context.exception.reason, 'rate_limit')
+        self.assertEqual(context.exception.status, 429)
+        self.assertEqual(context.exception.retry_after, 2)
+        self.assertEqual((self.rate_limiter.admitted, self.rate_limiter.rejected), (2, 1))
+
+    def test_bucket_refills(self):
+        self.rate_limiter.acquire('user:1')
+        self.rate_limiter.acquire('user:1')
+        self.clock.time = 2
+
+        self.rate_limiter.acquire('user:1')
+
+        with self.assertRaises(Rejected):
+            self.rate_limiter.acquire('user:1')
+
+    def test_keys_have_their_own_bucket(self):
+        self.rate_limiter.acquire('user:1')
+        self.rate_limiter.acquire('user:1')
+
+        self.rate_limiter.acquire('user:2')
+
+    def test_least_recently_used_bucket_is_dropped(self):
+        self.rate_limiter.acquire('user:1')
+        self.rate_limiter.acquire('user:2')
+        self.rate_limiter.acquire('user:3')
+
+        self.assertEqual(list(self.rate_limiter.buckets), ['user:2', 'user:3'])
+
+    def test_rate_of_zero_admits_everything(self):
+        rate_limiter = RateLimiter(0, 1, clock=self.clock)
+
+        for _ in range(10):
+            rate_limiter.acquire('user:1')
+
+        self.assertEqual(len(rate_limiter), 0)
+
+
+class ConcurrencyLimitTests(TestCase):
+
+    def test_rejected_straight_away_without_timeout(self):
+        limit = ConcurrencyLimit('nlp', 1, 0)
+        limit.acquire()
+
+        with self.assertRaises(Rejected) as context:
+            limit.acquire()
+
+        self.assertEqual(context.exception.reason, 'nlp')
+        self.assertEqual(context.exception.status, 503)
+        self.assertEqual((limit.in_flight, limit.admitted, limit.rejected), (1, 1, 1))
+
+    def test_waits_for_a_turn(self):
+        limit = ConcurrencyLimit('nlp', 1, 5)
+        limit.acquire()
+
+        waiter = threading.Thread(target=limit.acquire)
+        waiter.start()
+        while not limit.waiting:
+            pass
+        limit.release()
+        waiter.join()
+
+        self.assertEqual((limit.in_flight, limit.waiting, limit.admitted), (1, 0, 2))
+        self.assertEqual(limit.wait_histogram.snapshot()[1], 2)
+
+    def test_check_does_not_take_a_turn(self):
+        limit = ConcurrencyLimit('nlp', 1, 5)
+        limit.check()
+        limit.acquire()
+
+        with self.assertRaises(Rejected) as context:
+            limit.check()
+
+        self.assertEqual(context.exception.status, 503)
+        self.assertEqual((limit.in_flight, limit.waiting, limit.admitted, limit.rejected), (1, 0, 1, 1))
+
+    def test_slot_is_released_after_an_error(self):
+        limit = ConcurrencyLimit('upstream', 1, 0)
+
+        with self.assertRaises(ValueError):
+            with limit.slot():
+                raise ValueError()
+
+        with limit.slot():
+            self.assertEqual(limit.in_flight, 1)
+
+    def test_limit_of_zero_lets_everything_in(self):
+        limit = ConcurrencyLimit('nlp', 0, 0)
+
+        for _ in range(10):
+            limit.acquire()
+
+        self.assertEqual(limit.in_flight, 0)
+
+    def test_render_metrics(self):
+        rate_limiter = RateLimiter(1, 1)
+        limit = ConcurrencyLimit('nlp', 1, 0)
+        rate_limiter.acquire('user:1')
+        limit.acquire()
+        with self.assertRaises(Rejected):
+            limit.acquire()
+
+        lines = render_admission_metrics(rate_limiter, limit)
+
+        self.assertIn('dcubuddy_admission_admitted_total{limit="rate_limit"} 1', lines)
+        self.assertIn('dcubuddy_admission_rejected_total{limit="nlp"} 1', lines)
+        self.assertIn('dcubuddy_admission_in_flight{limit="nlp"} 1', lines)
+        self.assertIn('dcubuddy_admission_queue_wait_seconds_count{limit="nlp"} 2', lines)
+
+
+class AdmissionControlAppTestCase(TestCase):
+
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.config['SECRET_KEY'] = 'test'
+        LoginManager(self.app).user_loader(lambda user_id: None)
+
+        self.rate_limiter = RateLimiter(0.001, 2)
+        self.limit = ConcurrencyLimit('nlp', 1, 0)
+        init_app(self.app, self.rate_limiter)
+
+        @self.app.route('/get')
+        def get():
+            with self.limit.slot():
+                return 'Hello'
+
+        @self.app.route('/other')
+        def other():
+            return 'Other'
+
+        self.client = self.app.test_client()
+
+    def test_too_many_requests(self):
+        self.assertEqual(self.client.get('/get').status_code, 200)
+        self.assertEqual(self.client.get('/get').status_code, 200)
+
+        response = self.client.get('/get')
+
+        self.assertEqual(response.status_code, 429)
+        self.assertIn(b'too quickly', response.data)
+        self.assertIn('Retry-After', response.headers)
+
+    def test_only_routes_are_rate_limited(self):
+        for _ in range(5):
+            self.assertEqual(self.client.get('/other').status_code, 200)
+
+    def test_busy(self):
+        self.limit.acquire()
+
+        response = self.client.get('/get')
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.headers['Retry-After'], '1')
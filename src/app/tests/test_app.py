@@ -0,0 +1,159 @@
+import os
+import sys
+import types
+import tempfile
+from unittest import TestCase, mock
+from chatterbot import ChatBot
+from admission_control import ConcurrencyLimit
+
+
+def tag(text):
+    return text.lower()
+
+
+def create_chatbot(database_uri=None):
+    """
+        Creates a chat bot with one prompt and its follow-up, instead of the
+        one chatbot.py trains on the whole corpus
+    """
+    chatbot = ChatBot(
+        'Test Bot',
+        database_uri=database_uri,
+        initialize=False,
+        read_only=True,
+        logic_adapters=[{
+            'import_path': 'search_all_adapter.SearchMatch',
+            'default_response': 'Sorry, I do not understand.',
+            'maximum_similarity_threshold': 0.9,
+        }]
+    )
+
+    conversation = ['can you show me the map', 'Sure, what campus?', 'glasnevin', 'Here is the map of Glasnevin']
+    previous = None
+    for text in conversation:
+        chatbot.storage.create(
+            text=text,
+            search_text=tag(text),
+            conversation='training',
+            in_response_to=previous,
+            search_in_response_to=tag(previous) if previous else None
+        )
+        previous = text
+
+    return chatbot
+
+
+def import_app(chatbot):
+    """
+        Imports app.py with the given chat bot as the one it answers with
+    """
+    module = types.ModuleType('chatbot')
+    module.chatbot = chatbot
+
+    with mock.patch.dict(sys.modules, {'chatbot': module}):
+        import app
+
+    return app
+
+
+class GetBotResponseTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = import_app(create_chatbot())
+
+    def setUp(self):
+        self.app.response_cache.clear()
+        self.app.negative_cache.clear()
+        self.app.conversation_states.clear()
+
+        # Each test has a knowledge base of its own, in a file so that it can be learned from on another thread
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.chatbot = create_chatbot('sqlite:///' + os.path.join(directory.name, 'db.sqlite3'))
+        self.addCleanup(self.chatbot.storage.engine.dispose)
+
+        user = mock.Mock(**{'get_id.return_value': '1'})
+        for patcher in (
+            mock.patch.object(self.app, 'chatbot', self.chatbot),
+            mock.patch.object(self.app.conversation_states, 'chatbot', self.chatbot),
+            mock.patch.object(self.app, 'current_user', user),
+            mock.patch.object(self.app, 'nlp_limit', ConcurrencyLimit('nlp', 1, 0)),
+            mock.patch.object(self.app.rate_limiter, 'rate', 0),
+            mock.patch.object(self.chatbot.storage.tagger, 'get_bigram_pair_string', side_effect=tag),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        sleep_patcher = mock.patch.object(self.app.time, 'sleep')
+        self.sleep = sleep_patcher.start()
+        self.addCleanup(sleep_patcher.stop)
+
+        self.client = self.app.app.test_client()
+
+    def get(self, text):
+        return self.client.get('/get', query_string={'msg': text}).get_data(as_text=True)
+
+    def get_prompt(self):
+        version = self.app.get_knowledge_base_version(self.chatbot)
+        return self.app.conversation_states.pop_prompt('1', version)
+
+    def test_follow_up_answers_prompt(self):
+        self.assertEqual(self.get('can you show me the map'), 'Sure, what campus?')
+
+        self.assertEqual(self.get('glasnevn'), 'Here is the map of Glasnevin')
+
+        version = self.app.get_knowledge_base_version(self.chatbot)
+        self.assertIsNone(self.get_prompt())
+        self.assertIsNone(self.app.response_cache.get('glasnevn', version))
+        self.assertIsNone(self.app.negative_cache.get('glasnevn', version))
+
+    def test_prompt_only_applies_to_the_next_message(self):
+        self.get('can you show me the map')
+        self.get('hello')
+
+        self.assertEqual(self.get('glasnevn'), 'Sorry, I do not understand.')
+
+    def test_first_message_is_cached(self):
+        self.get('can you show me the map')
+
+        version = self.app.get_knowledge_base_version(self.chatbot)
+        self.assertEqual(self.app.response_cache.get('can you show me the map', version), 'Sure, what campus?')
+        self.assertEqual(self.get_prompt(), ('Sure, what campus?', 'sure, what campus?'))
+
+    def test_cached_response_is_learned(self):
+        self.get('can you show me the map')
+        self.get('hello')
+
+        with mock.patch.object(self.chatbot, 'read_only', False):
+            self.assertEqual(self.get('Can you show me the map '), 'Sure, what campus?')
+            self.app.learning_executor.submit(lambda: None).result()
+
+        learned = list(self.chatbot.storage.filter(conversation='user:1', order_by=['id']))
+        self.assertEqual(
+            [(statement.text, statement.in_response_to) for statement in learned],
+            [('Can you show me the map', None), ('Sure, what campus?', 'Can you show me the map')]
+        )
+        self.assertEqual(learned[0].search_text, 'can you show me the map')
+        self.assertEqual(learned[1].persona, 'bot:Test Bot')
+
+    def test_busy_search_keeps_the_prompt(self):
+        self.get('can you show me the map')
+        self.sleep.reset_mock()
+
+        with self.app.nlp_limit.slot():
+            response = self.client.get('/get', query_string={'msg': 'glasnevn'})
+
+        self.assertEqual(response.status_code, 503)
+        self.sleep.assert_not_called()
+        self.assertEqual(self.get('glasnevn'), 'Here is the map of Glasnevin')
+
+    def test_cached_response_is_served_while_search_is_busy(self):
+        self.get('can you show me the map')
+        self.get('hello')
+
+        with self.app.nlp_limit.slot():
+            response = self.client.get('/get', query_string={'msg': 'can you show me the map'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_data(as_text=True), 'Sure, what campus?')
@@ -0,0 +1,159 @@
+import os
+import random
+import shutil
+import tempfile
+from unittest import TestCase
+from rapidfuzz.distance import Indel
+from chatterbot.conversation import Statement
+from bk_tree_search import BKTree, BKTreeSearch, get_search_radius
+from bounded_comparisons import BoundedLevenshteinDistance
+from memory_storage import InMemoryStorageAdapter
+from search_all_adapter import SearchMatch
+from tests.base_case import ChatBotTestCase
+
+
+class BKTreeTests(TestCase):
+
+    def setUp(self):
+        randomness = random.Random(0)
+        self.texts = list({
+            ''.join(randomness.choice('abcde ') for _ in range(randomness.randint(1, 12)))
+            for _ in range(500)
+        })
+        self.tree = BKTree()
+        for statement_id, text in enumerate(self.texts):
+            self.tree.add(text, statement_id)
+
+    def test_search_finds_every_text_within_radius(self):
+        for text in ('abc', 'aaaa bbbb', 'edcba edcba'):
+            for radius in (0, 2, 5):
+                expected = {
+                    other_text: Indel.distance(text, other_text)
+                    for other_text in self.texts
+                    if Indel.distance(text, other_text) <= radius
+                }
+
+                matches = {
+                    self.tree.texts[node]: distance for node, distance in self.tree.search(text, radius)
+                }
+
+                self.assertEqual(matches, expected)
+
+    def test_same_text_is_one_node(self):
+        self.tree.add(self.texts[0], 1000)
+
+        self.assertEqual(len(self.tree), len(self.texts))
+        self.assertEqual(self.tree.ids[0], [0, 1000])
+
+    def test_empty_tree(self):
+        self.assertEqual(BKTree().search('abc', 3), [])
+
+    def test_save_and_load(self):
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, 'tree.pickle')
+            self.tree.save(path, (500, 500), 300)
+
+            loaded = BKTree.load(path, (500, 500), 300)
+
+            self.assertEqual(loaded.search('abc', 2), self.tree.search('abc', 2))
+            self.assertIsNone(BKTree.load(path, (501, 501), 300))
+            self.assertIsNone(BKTree.load(path, (500, 500), 100))
+        finally:
+            shutil.rmtree(directory)
+
+    def test_search_radius(self):
+        # A 20 character text can be 0.90 alike a text 4 edits away (1 - 4 / 44), but not 5 (1 - 5 / 45)
+        self.assertEqual(get_search_radius(20, 0.9), 4)
+        self.assertEqual(get_search_radius(20, 1), 0)
+        self.assertEqual(get_search_radius(20, 0), float('inf'))
+
+
+class BKTreeSearchTests(ChatBotTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.directory = tempfile.mkdtemp()
+        self.tree_path = os.path.join(self.directory, 'tree.pickle')
+        self.search_algorithm = BKTreeSearch(
+            self.chatbot, bk_tree_path=self.tree_path, maximum_similarity_threshold=0.8
+        )
+        self.chatbot.storage.create_many([
+            Statement(text='Where is the library?', search_text='library', tags=['map']),
+            Statement(text='Where is the lab?', search_text='lab', tags=['map']),
+            Statement(text='What is my timetable?', search_text='timetable', tags=['timetable']),
+            Statement(text='Where is the library?', search_text='library', persona='bot:DCUBuddy'),
+        ])
+
+    def tearDown(self):
+        super().tearDown()
+        shutil.rmtree(self.directory)
+
+    def test_search_returns_closest_match(self):
+        results = list(self.search_algorithm.search(Statement(text='where is teh libary')))
+
+        self.assertEqual(results[-1].text, 'Where is the library?')
+        self.assertGreaterEqual(results[-1].confidence, 0.8)
+
+    def test_distant_statements_are_not_returned(self):
+        results = list(self.search_algorithm.search(Statement(text='how do i print in the library')))
+
+        self.assertEqual(results, [])
+
+    def test_bot_statements_are_not_searched(self):
+        tree = self.search_algorithm.get_tree()
+
+        self.assertEqual(sum(len(ids) for ids in tree.ids), 3)
+
+    def test_search_tags(self):
+        results = list(self.search_algorithm.search(Statement(text='where is the lab'), tags=['timetable']))
+
+        self.assertEqual(results, [])
+
+    def test_saved_tree_is_reused(self):
+        list(self.search_algorithm.search(Statement(text='where is the lab')))
+        modified = os.path.getmtime(self.tree_path)
+
+        other = BKTreeSearch(self.chatbot, bk_tree_path=self.tree_path, maximum_similarity_threshold=0.8)
+        other.build = None
+        results = list(other.search(Statement(text='where is the lab')))
+
+        self.assertEqual(results[-1].text, 'Where is the lab?')
+        self.assertEqual(os.path.getmtime(self.tree_path), modified)
+
+    def test_new_statements_rebuild_tree(self):
+        list(self.search_algorithm.search(Statement(text='where is the lab')))
+        self.chatbot.storage.create(text='Where is the lake?', search_text='lake')
+
+        other = BKTreeSearch(self.chatbot, bk_tree_path=self.tree_path, maximum_similarity_threshold=0.8)
+        results = list(other.search(Statement(text='where is the lake')))
+
+        self.assertEqual(results[-1].text, 'Where is the lake?')
+
+    def test_search_match_uses_search_algorithm(self):
+        adapter = SearchMatch(
+            self.chatbot,
+            search_algorithm='bk_tree_search.BKTreeSearch',
+            statement_comparison_function=BoundedLevenshteinDistance,
+            bk_tree_path=self.tree_path
+        )
+
+        self.assertIsInstance(adapter.search_algorithm, BKTreeSearch)
+        self.assertEqual(adapter.search_algorithm.minimum_similarity, adapter.maximum_similarity_threshold)
+
+
+class BKTreeSearchInMemoryTests(BKTreeSearchTests):
+    """
+    The same tests with the statements kept in memory, where there is no
+    database to query.
+    """
+
+    def get_kwargs(self):
+        kwargs = super().get_kwargs()
+        kwargs['storage_adapter'] = 'memory_storage.InMemoryStorageAdapter'
+        kwargs['backing_storage_adapter'] = 'chatterbot.storage.SQLStorageAdapter'
+        return kwargs
+
+    def test_storage_has_no_engine(self):
+        self.assertIsInstance(self.chatbot.storage, InMemoryStorageAdapter)
+        self.assertFalse(hasattr(self.chatbot.storage, 'engine'))
@@ -0,0 +1,158 @@
+import random
+from unittest import TestCase, mock
+from chatterbot.conversation import Statement
+from chatterbot import comparisons
+from chatterbot import languages
+import bounded_comparisons
+
+
+WORDS = (
+    'where', 'is', 'the', 'library', 'map', 'campus', 'can', 'i', 'have',
+    'timetable', 'for', 'today', 'friday', 'food', 'exam', 'papers', 'registry',
+)
+
+
+def get_similar_texts(count, seed=0):
+    """
+        Pairs of texts that differ by a few dropped, doubled or swapped characters
+    """
+    randomness = random.Random(seed)
+    pairs = []
+    for _ in range(count):
+        text = ' '.join(randomness.choice(WORDS) for _ in range(randomness.randint(1, 8)))
+        other_text = list(text)
+        for _ in range(randomness.randint(0, 6)):
+            position = randomness.randrange(len(other_text))
+            edit = randomness.choice(('drop', 'double', 'swap'))
+            if edit == 'drop' and len(other_text) > 1:
+                del other_text[position]
+            elif edit == 'double':
+                other_text.insert(position, other_text[position])
+            else:
+                other_text[position] = randomness.choice('aeiourst ')
+        pairs.append((text, ''.join(other_text)))
+    return pairs
+
+
+class BoundedLevenshteinDistanceTestCase(TestCase):
+
+    def setUp(self):
+        super().setUp()
+
+        self.levenshtein_distance = bounded_comparisons.get_comparator(
+            comparisons.LevenshteinDistance, languages.ENG
+        )
+
+        self.compare = bounded_comparisons.BoundedLevenshteinDistance(
+            language=languages.ENG,
+            minimum_similarity=0.9,
+            maximum_length=300
+        )
+
+    def test_statement_false(self):
+        value = self.compare(Statement(text=''), Statement(text='Hello'))
+
+        self.assertEqual(value, 0)
+
+    def test_exact_match(self):
+        value = self.compare(Statement(text='where is the library?'), Statement(text='Where is the library?'))
+
+        self.assertEqual(value, 1)
+
+    def test_same_as_levenshtein_distance_over_minimum_similarity(self):
+        for minimum_similarity in (0.9, 0.7, 0.5):
+            self.compare.minimum_similarity = minimum_similarity
+
+            for text, other_text in get_similar_texts(2000):
+                statement, other_statement = Statement(text=text), Statement(text=other_text)
+                expected = self.levenshtein_distance(statement, other_statement)
+
+                if expected >= minimum_similarity:
+                    self.assertEqual(self.compare(statement, other_statement), expected, (text, other_text))
+                else:
+                    self.assertEqual(self.compare(statement, other_statement), 0, (text, other_text))
+
+    def test_same_as_levenshtein_distance_without_rapidfuzz(self):
+        with mock.patch.object(bounded_comparisons, 'Indel', None):
+            for text, other_text in get_similar_texts(500, seed=1):
+                statement, other_statement = Statement(text=text), Statement(text=other_text)
+                expected = self.levenshtein_distance(statement, other_statement)
+
+                if expected >= 0.9:
+                    self.assertEqual(self.compare(statement, other_statement), expected)
+
+    def test_length_is_checked_first(self):
+        with mock.patch.object(bounded_comparisons, 'SequenceMatcher') as sequence_matcher:
+            with mock.patch.object(bounded_comparisons, 'exceeds_distance') as exceeds_distance:
+                value = self.compare(Statement(text='map'), Statement(text='can i have the map of the campus?'))
+
+        self.assertEqual(value, 0)
+        exceeds_distance.assert_not_called()
+        sequence_matcher.assert_not_called()
+
+    def test_distant_text_is_not_scored(self):
+        with mock.patch.object(bounded_comparisons, 'SequenceMatcher') as sequence_matcher:
+            value = self.compare(Statement(text='where is the library?'), Statement(text='what societies exist?'))
+
+        self.assertEqual(value, 0)
+        sequence_matcher.assert_not_called()
+
+    def test_long_text_is_cut(self):
+        text = 'where is the library? ' * 1000
+
+        value = self.compare(Statement(text=text), Statement(text=text[:300] + 'x' * 5000))
+
+        self.assertEqual(value, 1)
+
+    def test_defaults(self):
+        with mock.patch('settings.COMPARISON_MAX_LENGTH', 50):
+            compare = bounded_comparisons.BoundedLevenshteinDistance(language=languages.ENG)
+
+        self.assertEqual(compare.language, languages.ENG)
+        self.assertEqual(compare.minimum_similarity, 0.95)
+        self.assertEqual(compare.maximum_length, 50)
+
+
+class ComparatorTestCase(TestCase):
+
+    def test_comparator_from_class(self):
+        for comparator_class in (comparisons.LevenshteinDistance, bounded_comparisons.BoundedLevenshteinDistance):
+            compare = bounded_comparisons.get_comparator(comparator_class, languages.ENG)
+
+            self.assertIsInstance(compare, comparator_class)
+            self.assertEqual(compare(Statement(text='Hello'), Statement(text='hello')), 1)
+
+    def test_comparator_is_used_as_it_is(self):
+        compare = bounded_comparisons.BoundedLevenshteinDistance(language=languages.ENG)
+
+        self.assertIs(bounded_comparisons.get_comparator(compare, languages.ENG), compare)
+
+    def test_comparison_function_for_installed_chatterbot(self):
+        comparison_function = bounded_comparisons.get_comparison_function(
+            bounded_comparisons.BoundedLevenshteinDistance
+        )
+
+        if bounded_comparisons.COMPARATORS_TAKE_LANGUAGE:
+            self.assertIs(comparison_function, bounded_comparisons.BoundedLevenshteinDistance)
+        else:
+            self.assertIsInstance(comparison_function, bounded_comparisons.BoundedLevenshteinDistance)
+
+
+class DistanceBoundTestCase(TestCase):
+
+    def test_maximum_distance_allows_rounding_up(self):
+        # 2 * 89.5 / 200 rounds up to 0.90
+        self.assertEqual(bounded_comparisons.get_maximum_distance(200, 0.9), 21)
+        self.assertEqual(bounded_comparisons.get_maximum_distance(20, 0.9), 2)
+
+    def test_bag_distance_is_a_lower_bound(self):
+        self.assertEqual(bounded_comparisons.get_bag_distance('kitten', 'sitting'), 5)
+        self.assertEqual(bounded_comparisons.get_bag_distance('abc', 'cba'), 0)
+
+    def test_exceeds_distance(self):
+        self.assertFalse(bounded_comparisons.exceeds_distance('kitten', 'sitting', 5))
+        self.assertTrue(bounded_comparisons.exceeds_distance('kitten', 'sitting', 4))
+
+        with mock.patch.object(bounded_comparisons, 'Indel', None):
+            self.assertFalse(bounded_comparisons.exceeds_distance('kitten', 'sitting', 5))
+            self.assertTrue(bounded_comparisons.exceeds_distance('kitten', 'sitting', 4))
@@ -0,0 +1,94 @@
+from chatterbot.conversation import Statement
+from conversation_state import ConversationStateStore, get_prompts
+from tests.base_case import ChatBotTestCase
+
+
+class FakeClock(object):
+
+    def __init__(self):
+        self.time = 0
+
+    def __call__(self):
+        return self.time
+
+
+class ConversationStateStoreTests(ChatBotTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.chatbot.storage.create_many([
+            Statement(text='map', search_text='NN:map', conversation='training'),
+            Statement(
+                text='Sure, what campus?', search_text='what:campus', conversation='training',
+                in_response_to='map', search_in_response_to='NN:map'
+            ),
+            Statement(
+                text='glasnevin', search_text='NN:glasnevin', conversation='training',
+                in_response_to='Sure, what campus?', search_in_response_to='what:campus'
+            ),
+            Statement(
+                text='Here is the map of Glasnevin', search_text='map:glasnevin', conversation='training',
+                in_response_to='glasnevin', search_in_response_to='NN:glasnevin'
+            ),
+            Statement(
+                text='thanks', search_text='NN:thanks', conversation='user:1',
+                in_response_to='Here is the map of Glasnevin', search_in_response_to='map:glasnevin'
+            ),
+        ])
+        self.clock = FakeClock()
+        self.store = ConversationStateStore(self.chatbot, 10, ttl=60, clock=self.clock)
+
+    def test_prompts_are_trained_statements_with_replies(self):
+        self.assertEqual(get_prompts(self.chatbot.storage), {
+            'map': 'NN:map',
+            'Sure, what campus?': 'what:campus',
+            'glasnevin': 'NN:glasnevin',
+        })
+
+    def test_prompt_is_used_once(self):
+        self.store.set_prompt('1', 'Sure, what campus?', 1)
+
+        self.assertEqual(self.store.pop_prompt('1', 1), ('Sure, what campus?', 'what:campus'))
+        self.assertIsNone(self.store.pop_prompt('1', 1))
+
+    def test_has_prompt_does_not_use_it_up(self):
+        self.store.set_prompt('1', 'Sure, what campus?', 1)
+
+        self.assertTrue(self.store.has_prompt('1', 1))
+        self.assertFalse(self.store.has_prompt('2', 1))
+        self.assertEqual((self.store.hits, self.store.misses), (0, 0))
+        self.assertEqual(self.store.pop_prompt('1', 1), ('Sure, what campus?', 'what:campus'))
+
+        self.store.set_prompt('1', 'Sure, what campus?', 1)
+        self.clock.time = 60
+        self.assertFalse(self.store.has_prompt('1', 1))
+
+    def test_prompts_are_per_user(self):
+        self.store.set_prompt('1', 'Sure, what campus?', 1)
+
+        self.assertIsNone(self.store.pop_prompt('2', 1))
+
+    def test_answers_without_replies_are_not_prompts(self):
+        self.store.set_prompt('1', 'Here is the map of Glasnevin', 1)
+
+        self.assertIsNone(self.store.pop_prompt('1', 1))
+
+    def test_prompts_expire(self):
+        self.store.set_prompt('1', 'Sure, what campus?', 1)
+        self.clock.time = 60
+
+        self.assertIsNone(self.store.pop_prompt('1', 1))
+
+    def test_prompts_are_reloaded_for_a_new_version(self):
+        self.store.set_prompt('1', 'Sure, what campus?', 1)
+        self.chatbot.storage.create(
+            text='st. patrick', search_text='NN:patrick', conversation='training',
+            in_response_to='Which campus?', search_in_response_to='which:campus'
+        )
+
+        self.store.set_prompt('2', 'Which campus?', 1)
+        self.assertIsNone(self.store.pop_prompt('2', 1))
+
+        self.store.set_prompt('2', 'Which campus?', 2)
+        self.assertEqual(self.store.pop_prompt('2', 2), ('Which campus?', 'which:campus'))
+        self.assertIsNone(self.store.pop_prompt('1', 2))
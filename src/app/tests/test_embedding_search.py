@@ -0,0 +1,130 @@
+import os
+import shutil
+import tempfile
+from unittest import mock
+import numpy
+import spacy
+from chatterbot.conversation import Statement
+from embedding_search import EmbeddingSearch
+from search_all_adapter import SearchMatch
+from tests.base_case import ChatBotTestCase
+
+
+VECTORS = {
+    'timetable': [1, 0, 0],
+    'schedule': [0.9, 0.1, 0],
+    'tomorrow': [0, 1, 0],
+    'map': [0, 0, 1],
+    'campus': [0.1, 0, 0.9],
+}
+
+
+def get_nlp():
+    nlp = spacy.blank('en')
+    for word, vector in VECTORS.items():
+        nlp.vocab.set_vector(word, numpy.array(vector, dtype=numpy.float32))
+    return nlp
+
+
+class EmbeddingSearchTests(ChatBotTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.directory = tempfile.mkdtemp()
+        self.matrix_path = os.path.join(self.directory, 'vectors.npy')
+        self.search_algorithm = EmbeddingSearch(
+            self.chatbot, nlp=get_nlp(), embedding_matrix_path=self.matrix_path
+        )
+        self.chatbot.storage.create_many([
+            Statement(text='timetable tomorrow', search_text='timetable:tomorrow', tags=['timetable']),
+            Statement(text='campus map', search_text='campus:map', tags=['map']),
+            Statement(text='schedule tomorrow', search_text='schedule:tomorrow', persona='bot:DCUBuddy'),
+        ])
+
+    def tearDown(self):
+        super().tearDown()
+        shutil.rmtree(self.directory)
+
+    def test_search_returns_closest_match(self):
+        results = list(self.search_algorithm.search(Statement(text='my schedule tomorrow')))
+
+        self.assertEqual([result.text for result in results], ['campus map', 'timetable tomorrow'])
+        self.assertGreater(results[-1].confidence, 0.9)
+
+    def test_search_tags(self):
+        results = list(self.search_algorithm.search(Statement(text='schedule'), tags=['map']))
+
+        self.assertEqual([result.text for result in results], ['campus map'])
+
+    def test_search_tags_before_taking_candidates(self):
+        search_algorithm = EmbeddingSearch(
+            self.chatbot, nlp=get_nlp(), embedding_matrix_path=self.matrix_path, max_candidates=1
+        )
+
+        results = list(search_algorithm.search(Statement(text='schedule'), tags=['map']))
+
+        self.assertEqual([result.text for result in results], ['campus map'])
+        self.assertEqual(list(search_algorithm.search(Statement(text='schedule'), tags=['food'])), [])
+
+    def test_unknown_words(self):
+        self.assertEqual(list(self.search_algorithm.search(Statement(text='hello'))), [])
+
+    def test_matrix_is_memory_mapped(self):
+        list(self.search_algorithm.search(Statement(text='map')))
+
+        self.assertIsInstance(self.search_algorithm.matrix, numpy.memmap)
+        self.assertEqual(self.search_algorithm.matrix.shape, (2, 3))
+        self.assertTrue(os.path.exists(os.path.join(self.directory, 'vectors.ids.npy')))
+
+    def test_each_build_writes_its_own_temporary_files(self):
+        with mock.patch('embedding_search.os.replace', wraps=os.replace) as replace:
+            self.search_algorithm.build()
+            self.search_algorithm.build()
+
+        temporary_paths = [call[0][0] for call in replace.call_args_list]
+
+        self.assertEqual(len(set(temporary_paths)), 4)
+        self.assertEqual({os.path.dirname(path) for path in temporary_paths}, {self.directory})
+        self.assertEqual(sorted(os.listdir(self.directory)), ['vectors.ids.npy', 'vectors.npy'])
+
+    def test_saved_matrix_is_reused(self):
+        list(self.search_algorithm.search(Statement(text='map')))
+        modified = os.path.getmtime(self.matrix_path)
+
+        other = EmbeddingSearch(self.chatbot, nlp=get_nlp(), embedding_matrix_path=self.matrix_path)
+        other.build = None
+        list(other.search(Statement(text='map')))
+
+        self.assertEqual(os.path.getmtime(self.matrix_path), modified)
+
+    def test_new_statements_rebuild_matrix(self):
+        list(self.search_algorithm.search(Statement(text='map')))
+        self.chatbot.storage.create(text='map', search_text='map')
+
+        other = EmbeddingSearch(self.chatbot, nlp=get_nlp(), embedding_matrix_path=self.matrix_path)
+        results = list(other.search(Statement(text='map')))
+
+        self.assertEqual(results[-1].text, 'map')
+
+    def test_search_match_uses_search_algorithm(self):
+        adapter = SearchMatch(
+            self.chatbot,
+            search_algorithm='embedding_search.EmbeddingSearch',
+            nlp=get_nlp(),
+            embedding_matrix_path=self.matrix_path
+        )
+
+        self.assertIsInstance(adapter.search_algorithm, EmbeddingSearch)
+
+
+class EmbeddingSearchInMemoryTests(EmbeddingSearchTests):
+    """
+    The same tests with the statements kept in memory, where there is no
+    database to query.
+    """
+
+    def get_kwargs(self):
+        kwargs = super().get_kwargs()
+        kwargs['storage_adapter'] = 'memory_storage.InMemoryStorageAdapter'
+        kwargs['backing_storage_adapter'] = 'chatterbot.storage.SQLStorageAdapter'
+        return kwargs
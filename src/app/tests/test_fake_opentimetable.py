@@ -0,0 +1,111 @@
+import os
+import shutil
+import datetime
+import tempfile
+import threading
+from unittest import TestCase, mock
+from werkzeug.serving import make_server
+import timetable
+from tools.fake_opentimetable import create_app, generate_view_options
+
+
+EVENTS_PATH = '/broker/api/categoryTypes/241e4d36-60e0-49f8-b27e-99416745d98d/categories/events/filter'
+CATEGORIES_PATH = '/broker/api/CategoryTypes/241e4d36-60e0-49f8-b27e-99416745d98d/Categories/Filter'
+
+
+def get_events_request(identity='320e3c4f-24e3-b86f-2010-b1b88640dc08', day=2):
+    return {
+        'CategoryIdentities': [identity],
+        'ViewOptions': {'Days': [{'DayOfWeek': day}]}
+    }
+
+
+class FakeOpentimetableTests(TestCase):
+
+    def setUp(self):
+        self.client = create_app().test_client()
+
+    def test_view_options_include_this_week(self):
+        monday = datetime.date.today() - datetime.timedelta(days=datetime.date.today().weekday())
+
+        weeks = self.client.get('/broker/api/viewOptions').get_json()['Weeks']
+
+        self.assertIn(monday.isoformat() + 'T00:00:00.000Z', [week['FirstDayInWeek'] for week in weeks])
+
+    def test_events_default_fixture(self):
+        response = self.client.post(EVENTS_PATH, json=get_events_request())
+
+        events = response.get_json()[0]['CategoryEvents']
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(events), 4)
+
+    def test_categories_are_paginated(self):
+        first = self.client.post(CATEGORIES_PATH + '?pageNumber=1', json={}).get_json()
+        last = self.client.post(
+            CATEGORIES_PATH + '?pageNumber={}'.format(first['TotalPages']), json={}
+        ).get_json()
+
+        self.assertEqual(len(first['Results']), 20)
+        self.assertGreater(len(last['Results']), 0)
+        self.assertEqual(set(first['Results'][0]), {'Name', 'Identity'})
+
+    def test_error_rate(self):
+        client = create_app(error_rate=1).test_client()
+
+        self.assertEqual(client.get('/broker/api/viewOptions').status_code, 503)
+
+    def test_payload_scale(self):
+        client = create_app(payload_scale=3).test_client()
+
+        response = client.post(EVENTS_PATH, json=get_events_request())
+
+        self.assertEqual(len(response.get_json()[0]['CategoryEvents']), 12)
+
+    def test_latency(self):
+        client = create_app(latency=0.1).test_client()
+
+        start = datetime.datetime.now()
+        client.get('/broker/api/viewOptions')
+
+        self.assertGreaterEqual((datetime.datetime.now() - start).total_seconds(), 0.1)
+
+
+class FakeOpentimetableServerTests(TestCase):
+
+    def setUp(self):
+        self.server = make_server('127.0.0.1', 0, create_app(), threaded=True)
+        self.url = 'http://127.0.0.1:{}'.format(self.server.server_port)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def tearDown(self):
+        self.server.shutdown()
+
+    def test_get_timetable(self):
+        with mock.patch.object(timetable, 'BROKER_URL', self.url + '/broker/api'):
+            result = timetable.get_timetable('CASE3', 2, 1)
+
+        self.assertTrue(result.startswith('CA314 Computer Graphics<br>Lecture<br>GLA.L114<br>Start:09:00'))
+        self.assertIn('CA341 Comparative Programming Languages<br>Tutorial<br>Start:16:00', result)
+
+    def test_record(self):
+        directory = tempfile.mkdtemp()
+        try:
+            client = create_app(fixture_directory=directory, record_from=self.url).test_client()
+
+            client.get('/broker/api/viewOptions')
+            client.post(EVENTS_PATH, json=get_events_request(day=3))
+            client.post(CATEGORIES_PATH + '?pageNumber=2', json={})
+
+            self.assertEqual(sorted(os.listdir(directory)), ['categories', 'events', 'viewOptions.json'])
+            self.assertEqual(os.listdir(os.path.join(directory, 'events')), [
+                '320e3c4f-24e3-b86f-2010-b1b88640dc08-3.json'
+            ])
+            self.assertEqual(os.listdir(os.path.join(directory, 'categories')), ['page-2.json'])
+
+            replay = create_app(fixture_directory=directory).test_client()
+            self.assertEqual(
+                replay.get('/broker/api/viewOptions').get_json(), generate_view_options()
+            )
+        finally:
+            shutil.rmtree(directory)
@@ -0,0 +1,71 @@
+from unittest import TestCase
+from chatterbot.conversation import Statement
+from fts_search import FTSSearch, get_match_expression
+from search_all_adapter import SearchMatch
+from tests.base_case import ChatBotTestCase
+
+
+class MatchExpressionTests(TestCase):
+
+    def test_search_text_and_words(self):
+        self.assertEqual(
+            get_match_expression('VB:show VB:map', 'Show the map'),
+            'search_text : ("VB:map" OR "VB:show") OR text : ("map" OR "show" OR "the")'
+        )
+
+    def test_quotes_are_escaped(self):
+        self.assertEqual(get_match_expression('a"b'), 'search_text : ("a""b")')
+
+    def test_empty(self):
+        self.assertEqual(get_match_expression('', '?'), '')
+
+
+class FTSSearchTests(ChatBotTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.search_algorithm = FTSSearch(self.chatbot)
+        self.chatbot.storage.create_many([
+            Statement(text='can you show me the map?', search_text='VB:show VB:map', tags=['map']),
+            Statement(text='Sure, what campus?', search_text='what:campus', persona='bot:DCUBuddy'),
+            Statement(text='timetable for monday', search_text='NN:timetable IN:monday', tags=['timetable']),
+        ])
+
+    def test_search_returns_closest_match(self):
+        statement = Statement(text='can you show me the map', search_text='VB:show VB:map')
+
+        results = list(self.search_algorithm.search(statement))
+
+        self.assertEqual(results[-1].text, 'can you show me the map?')
+        self.assertGreater(results[-1].confidence, 0.9)
+
+    def test_search_excludes_bot_statements(self):
+        statement = Statement(text='Sure, what campus?', search_text='what:campus')
+
+        self.assertEqual(list(self.search_algorithm.search(statement)), [])
+
+    def test_search_tags(self):
+        statement = Statement(text='show me the map for monday', search_text='VB:map IN:monday')
+
+        results = list(self.search_algorithm.search(statement, tags=['timetable']))
+
+        self.assertEqual([result.text for result in results], ['timetable for monday'])
+
+    def test_index_follows_updates_and_deletes(self):
+        with self.chatbot.storage.engine.begin() as connection:
+            connection.execute(
+                "UPDATE statement SET text = 'where is the library', search_text = 'NN:library' "
+                "WHERE text = 'can you show me the map?'"
+            )
+        self.chatbot.storage.remove('timetable for monday')
+
+        results = list(self.search_algorithm.search(
+            Statement(text='library timetable', search_text='NN:library NN:timetable')
+        ))
+
+        self.assertEqual([result.text for result in results], ['where is the library'])
+
+    def test_search_match_uses_search_algorithm(self):
+        adapter = SearchMatch(self.chatbot, search_algorithm='fts_search.FTSSearch')
+
+        self.assertIsInstance(adapter.search_algorithm, FTSSearch)
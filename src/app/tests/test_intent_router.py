@@ -0,0 +1,60 @@
+from unittest import TestCase
+from intent_router import IntentRouter, hash_features, load_labelled_corpus
+
+
+class HashFeaturesTests(TestCase):
+
+    def test_features_are_normalized(self):
+        vector = hash_features('Here is your timetable', 256)
+
+        self.assertEqual(vector.shape, (256, ))
+        self.assertAlmostEqual(float((vector ** 2).sum()), 1.0, places=5)
+
+    def test_empty_text(self):
+        vector = hash_features('', 256)
+
+        self.assertEqual(float(vector.sum()), 0)
+
+
+class IntentRouterTests(TestCase):
+
+    def setUp(self):
+        self.router = IntentRouter(n_features=512)
+        self.router.train(
+            ['show me the map', 'map of the campus', 'timetable for monday', 'my timetable today'],
+            ['map', 'map', 'timetable', 'timetable']
+        )
+
+    def test_categories(self):
+        self.assertEqual(self.router.categories, ['map', 'timetable'])
+
+    def test_predict(self):
+        category, confidence = self.router.predict('can I see the campus map')
+
+        self.assertEqual(category, 'map')
+        self.assertGreater(confidence, 0.5)
+
+    def test_predict_proba_sums_to_one(self):
+        probabilities = self.router.predict_proba('timetable for tuesday')
+
+        self.assertAlmostEqual(sum(probabilities.values()), 1.0, places=5)
+        self.assertGreater(probabilities['timetable'], probabilities['map'])
+
+
+class DCUBuddyCorpusIntentRouterTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.router = IntentRouter.from_corpus('../training_data/')
+
+    def test_labels_loaded_from_categories(self):
+        texts, labels = load_labelled_corpus('../training_data/')
+
+        self.assertEqual(len(texts), len(labels))
+        self.assertIn('timetable', labels)
+        self.assertIn('map', labels)
+
+    def test_predicts_corpus_categories(self):
+        self.assertEqual(self.router.predict('what is my timetable for tomorrow')[0], 'timetable')
+        self.assertEqual(self.router.predict('can you show me the map')[0], 'map')
+        self.assertEqual(self.router.predict('how can i delete assignments')[0], 'commands')
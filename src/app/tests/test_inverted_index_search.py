@@ -0,0 +1,99 @@
+from unittest import TestCase, mock
+from chatterbot.conversation import Statement
+from inverted_index_search import BigramIndex, InvertedIndexSearch
+from search_all_adapter import SearchMatch
+from tests.base_case import ChatBotTestCase
+
+
+class BigramIndexTests(TestCase):
+
+    def setUp(self):
+        self.index = BigramIndex()
+        self.index.add(Statement(id=1, text='show me the map', search_text='VB:show VB:map'))
+        self.index.add(Statement(id=2, text='map please', search_text='VB:map'))
+        self.index.add(Statement(id=3, text='hello', search_text='hello'))
+
+    def test_candidates_ranked_by_overlap(self):
+        self.assertEqual(self.index.candidates('VB:show VB:map'), [1, 2])
+
+    def test_candidates_limit(self):
+        self.assertEqual(self.index.candidates('VB:show VB:map', limit=1), [1])
+
+    def test_no_candidates(self):
+        self.assertEqual(self.index.candidates('NN:exam'), [])
+
+    def test_remove(self):
+        self.index.remove(1)
+
+        self.assertEqual(self.index.candidates('VB:show VB:map'), [2])
+        self.assertEqual(len(self.index), 2)
+
+
+class InvertedIndexSearchTests(ChatBotTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.search_algorithm = InvertedIndexSearch(self.chatbot)
+        self.chatbot.storage.create_many([
+            Statement(text='can you show me the map?', search_text='VB:show VB:map', tags=['map']),
+            Statement(text='Sure, what campus?', search_text='what:campus', persona='bot:DCUBuddy'),
+            Statement(text='timetable for monday', search_text='NN:timetable IN:monday', tags=['timetable']),
+        ])
+
+    def test_search_returns_closest_match(self):
+        statement = Statement(text='can you show me the map', search_text='VB:show VB:map')
+
+        results = list(self.search_algorithm.search(statement))
+
+        self.assertEqual(results[-1].text, 'can you show me the map?')
+        self.assertGreater(results[-1].confidence, 0.9)
+
+    def test_search_excludes_bot_statements(self):
+        statement = Statement(text='Sure, what campus?', search_text='what:campus')
+
+        self.assertEqual(list(self.search_algorithm.search(statement)), [])
+
+    def test_search_additional_parameters(self):
+        statement = Statement(text='show me the map for monday', search_text='VB:map IN:monday')
+
+        results = list(self.search_algorithm.search(statement, tags=['timetable']))
+
+        self.assertEqual([result.text for result in results], ['timetable for monday'])
+
+    def test_new_statements_are_indexed(self):
+        self.search_algorithm.build()
+        self.chatbot.storage.create(text='where is the library', search_text='NN:library')
+
+        results = list(self.search_algorithm.search(
+            Statement(text='where is the library', search_text='NN:library')
+        ))
+
+        self.assertEqual(results[-1].text, 'where is the library')
+
+    def test_search_match_uses_search_algorithm(self):
+        adapter = SearchMatch(
+            self.chatbot,
+            search_algorithm='inverted_index_search.InvertedIndexSearch'
+        )
+
+        self.assertIsInstance(adapter.search_algorithm, InvertedIndexSearch)
+        self.assertIn(InvertedIndexSearch.name, self.chatbot.search_algorithms)
+
+    def test_storage_without_engine(self):
+        chatbot = mock.Mock(storage=mock.Mock(spec=['tagger']))
+
+        with self.assertRaises(ValueError):
+            InvertedIndexSearch(chatbot)
+
+
+class InvertedIndexSearchInMemoryTests(InvertedIndexSearchTests):
+    """
+    The same tests with the statements kept in memory, where changes are
+    followed through the backing storage adapter.
+    """
+
+    def get_kwargs(self):
+        kwargs = super().get_kwargs()
+        kwargs['storage_adapter'] = 'memory_storage.InMemoryStorageAdapter'
+        kwargs['backing_storage_adapter'] = 'chatterbot.storage.SQLStorageAdapter'
+        return kwargs
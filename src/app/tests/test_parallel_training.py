@@ -0,0 +1,174 @@
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+import spacy
+from spacy.language import Language
+from spacy.tokens import Doc
+from chatterbot import languages
+from parallel_training import ParallelCorpusTrainer, get_bigram_pair_string, prepare_text
+from response_cache import get_knowledge_base_version
+from tests.base_case import ChatBotTestCase
+
+
+CORPUS = {
+    'map.yml': (
+        'categories:\n- map\n'
+        'conversations:\n'
+        '- - where is the map\n  - Here is the map\n'
+        '- - show me the campus\n  - Which campus?\n  - glasnevin\n'
+    ),
+    'food.yml': (
+        'categories:\n- food\n'
+        'conversations:\n'
+        '- - where can I eat\n  - Try the canteen\n'
+    ),
+}
+
+
+@Language.component('test_lowercase_lemmas')
+def lowercase_lemmas(document):
+    for token in document:
+        token.lemma_ = token.lower_
+    return document
+
+
+class SpacyTagger(object):
+    """
+    Tags like chatterbot's PosLemmaTagger, with the test's spaCy model.
+    """
+
+    def __init__(self, spacy_model):
+        self.language = languages.ENG
+        self.nlp = spacy.load(spacy_model)
+
+    def get_bigram_pair_string(self, text):
+        return get_bigram_pair_string(self.nlp(prepare_text(text)))
+
+
+class LowercaseTagger(object):
+    """
+    A tagger that does not use spaCy, like the NLTK PosHypernymTagger of chatterbot 1.0.
+    """
+
+    def __init__(self, language=None):
+        self.language = language
+
+    def get_bigram_pair_string(self, text):
+        return 'lower:' + text.lower()
+
+
+class BigramPairStringTests(TestCase):
+
+    def setUp(self):
+        self.vocab = spacy.blank('en').vocab
+
+    def test_pairs_skip_stop_words(self):
+        document = Doc(
+            self.vocab,
+            words=['where', 'are', 'the', 'exams', 'held'],
+            pos=['ADV', 'AUX', 'DET', 'NOUN', 'VERB'],
+            lemmas=['where', 'be', 'the', 'exam', 'hold']
+        )
+
+        self.assertEqual(get_bigram_pair_string(document), 'NOUN:hold')
+
+    def test_single_word(self):
+        document = Doc(self.vocab, words=['Hello'], pos=['INTJ'], lemmas=['hello'])
+
+        self.assertEqual(get_bigram_pair_string(document), 'hello')
+
+    def test_short_text_punctuation(self):
+        self.assertEqual(prepare_text('hi!'), 'hi!')
+        self.assertEqual(prepare_text('a.'), 'a')
+        self.assertEqual(prepare_text('?'), '?')
+
+
+class ParallelCorpusTrainerTests(ChatBotTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.mkdtemp()
+
+        cls.spacy_model = os.path.join(cls.directory, 'model')
+        nlp = spacy.blank('en')
+        nlp.add_pipe('test_lowercase_lemmas')
+        nlp.to_disk(cls.spacy_model)
+
+        cls.corpus = os.path.join(cls.directory, 'corpus')
+        os.mkdir(cls.corpus)
+        for name, data in CORPUS.items():
+            with open(os.path.join(cls.corpus, name), 'w') as corpus_file:
+                corpus_file.write(data)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.directory)
+
+    def setUp(self):
+        super().setUp()
+        self.chatbot.storage.tagger = SpacyTagger(self.spacy_model)
+
+    def get_trainer(self, **kwargs):
+        return ParallelCorpusTrainer(
+            self.chatbot, spacy_model=self.spacy_model, batch_size=2, transaction_size=3, **kwargs
+        )
+
+    def get_statements(self):
+        return sorted(
+            (statement.text, statement.in_response_to, statement.search_text,
+             statement.search_in_response_to, tuple(statement.get_tags()))
+            for statement in self.chatbot.storage.filter()
+        )
+
+    def test_train(self):
+        count = self.get_trainer(workers=1).train(self.corpus)
+
+        self.assertEqual(count, 7)
+        self.assertEqual(self.chatbot.storage.count(), 7)
+
+        statement = list(self.chatbot.storage.filter(text='glasnevin'))[0]
+        self.assertEqual(statement.in_response_to, 'Which campus?')
+        self.assertEqual(statement.get_tags(), ['map'])
+        self.assertEqual(statement.conversation, 'training')
+
+    def test_train_changes_knowledge_base_version(self):
+        version = get_knowledge_base_version(self.chatbot)
+
+        self.get_trainer(workers=1).train(self.corpus)
+
+        self.assertNotEqual(get_knowledge_base_version(self.chatbot), version)
+
+    def test_batches_keep_conversations_whole(self):
+        batches = list(self.get_trainer(workers=1).iter_batches(self.corpus))
+
+        self.assertEqual([len(batch) for batch in batches], [1, 1, 1])
+
+    def test_workers_produce_the_same_statements(self):
+        self.get_trainer(workers=1).train(self.corpus)
+        expected = self.get_statements()
+        self.chatbot.storage.drop()
+
+        self.get_trainer(workers=2).train(self.corpus)
+
+        self.assertEqual(self.get_statements(), expected)
+
+    def test_search_text_is_the_storage_taggers(self):
+        self.get_trainer(workers=1).train(self.corpus)
+
+        for statement in self.chatbot.storage.filter():
+            self.assertEqual(statement.search_text, self.chatbot.storage.tagger.get_bigram_pair_string(statement.text))
+
+    def test_tagger_without_spacy_is_used_as_it_is(self):
+        self.chatbot.storage.tagger = LowercaseTagger(languages.ENG)
+
+        ParallelCorpusTrainer(self.chatbot, workers=1).train(self.corpus)
+        expected = self.get_statements()
+        self.chatbot.storage.drop()
+
+        self.get_trainer(workers=2).train(self.corpus)
+
+        self.assertEqual(self.get_statements(), expected)
+        statement = list(self.chatbot.storage.filter(text='glasnevin'))[0]
+        self.assertEqual(statement.search_text, 'lower:glasnevin')
+        self.assertEqual(statement.search_in_response_to, 'lower:which campus?')
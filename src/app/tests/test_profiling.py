@@ -0,0 +1,202 @@
+import os
+import gzip
+import time
+import marshal
+import shutil
+import tempfile
+import threading
+from unittest import TestCase, mock
+from flask import Flask
+import profiling
+
+
+class ProfilerTestCase(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def test_cprofile(self):
+        profiler = profiling.Profiler(self.directory, sample_rate=1)
+
+        state = profiler.begin()
+        sorted(range(1000))
+        profiler.end(state, '/get', 'map')
+        profiler.flush()
+
+        profiles = profiler.list()
+        self.assertEqual(len(profiles), 1)
+        self.assertEqual(profiles[0]['route'], 'get')
+        self.assertEqual(profiles[0]['category'], 'map')
+        self.assertEqual(profiles[0]['kind'], 'cprofile')
+
+        with gzip.open(os.path.join(self.directory, profiles[0]['name']), 'rb') as profile_file:
+            stats = marshal.loads(profile_file.read())
+        self.assertTrue(any(function[2] == '<built-in method builtins.sorted>' for function in stats))
+
+    def test_slow_request_is_sampled(self):
+        profiler = profiling.Profiler(self.directory, sample_rate=0, slow_threshold=0.05, sample_interval=0.001)
+
+        state = profiler.begin()
+        time.sleep(0.1)
+        profiler.end(state, '/get', 'chatbot')
+        profiler.flush()
+
+        profiles = profiler.list()
+        self.assertEqual(len(profiles), 1)
+        self.assertEqual(profiles[0]['kind'], 'sampled')
+        self.assertGreaterEqual(profiles[0]['duration'], 50)
+
+        with gzip.open(os.path.join(self.directory, profiles[0]['name']), 'rt') as profile_file:
+            lines = profile_file.read().splitlines()
+        self.assertTrue(lines)
+        self.assertTrue(any('test_profiling.py:test_slow_request_is_sampled' in line for line in lines))
+
+    def test_fast_request_is_not_saved(self):
+        profiler = profiling.Profiler(self.directory, sample_rate=0, slow_threshold=10)
+
+        state = profiler.begin()
+        profiler.end(state, '/get', 'chatbot')
+        profiler.flush()
+
+        self.assertEqual(profiler.list(), [])
+        self.assertEqual(profiler.sampler.threads, {})
+
+    def test_profiles_are_written_on_another_thread(self):
+        profiler = profiling.Profiler(self.directory, sample_rate=1)
+        threads = []
+
+        with mock.patch.object(profiler, 'write', side_effect=lambda *args: threads.append(threading.get_ident())):
+            profiler.end(profiler.begin(), '/get', 'map')
+            profiler.flush()
+
+        self.assertEqual(len(threads), 1)
+        self.assertNotEqual(threads[0], threading.get_ident())
+
+    def test_write_errors_are_logged(self):
+        profiler = profiling.Profiler(self.directory, sample_rate=1)
+
+        with mock.patch.object(profiler, 'write', side_effect=OSError('No space left on device')):
+            with self.assertLogs('profiling', level='ERROR'):
+                profiler.end(profiler.begin(), '/get', 'map')
+                profiler.flush()
+
+    def test_nothing_profiled(self):
+        profiler = profiling.Profiler(self.directory, sample_rate=0, slow_threshold=0)
+
+        self.assertIsNone(profiler.begin())
+
+    def test_retention(self):
+        profiler = profiling.Profiler(self.directory, retention=2)
+
+        for category in ('a', 'b', 'c'):
+            profiler.write('/get', category, 'cprofile', 0.1, 'prof', b'')
+
+        self.assertEqual(len(profiler.list()), 2)
+
+    def test_category_names_are_made_safe(self):
+        profiler = profiling.Profiler(self.directory)
+
+        profiler.write('/get', 'St. Patrick/../x', 'cprofile', 0.1, 'prof', b'')
+
+        self.assertEqual(profiler.list()[0]['category'], 'st_patrick_x')
+
+
+class StackSamplerTestCase(TestCase):
+
+    def setUp(self):
+        self.sampler = profiling.StackSampler(interval=0.001)
+        self.addCleanup(self.sampler.close)
+
+    def test_idle_sampler_does_not_wake_up(self):
+        self.sampler.start(threading.get_ident())
+        self.sampler.stop(threading.get_ident())
+        time.sleep(0.01)
+
+        with mock.patch.object(self.sampler, 'sample') as sample:
+            time.sleep(0.05)
+
+        sample.assert_not_called()
+
+    def test_close_stops_the_thread(self):
+        thread_id = threading.get_ident()
+        self.sampler.start(thread_id)
+        thread = self.sampler._thread
+
+        self.sampler.stop(thread_id)
+        self.sampler.close()
+
+        self.assertFalse(thread.is_alive())
+
+        samples = self.sampler.start(thread_id)
+        time.sleep(0.05)
+        self.sampler.stop(thread_id)
+
+        self.assertTrue(samples)
+
+
+class ProfilingAppTestCase(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+        patchers = [
+            mock.patch.object(profiling, 'enabled', True),
+            mock.patch('settings.PROFILE_ADMIN_TOKEN', 'secret'),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.app = Flask(__name__)
+        self.profiler = profiling.init_app(
+            self.app, profiler=profiling.Profiler(self.directory, sample_rate=1)
+        )
+
+        @self.app.route('/get')
+        def get_bot_response():
+            profiling.set_category('timetable')
+            return 'Hello'
+
+        @self.app.route('/dcubuddy')
+        def dcubuddy():
+            return 'Chat'
+
+        self.client = self.app.test_client()
+
+    def test_only_routes_are_profiled(self):
+        self.client.get('/dcubuddy')
+        self.assertEqual(self.profiler.list(), [])
+
+        self.client.get('/get')
+        self.profiler.flush()
+        profiles = self.profiler.list()
+        self.assertEqual(len(profiles), 1)
+        self.assertEqual(profiles[0]['category'], 'timetable')
+
+    def test_list_and_download(self):
+        self.client.get('/get')
+        self.profiler.flush()
+        headers = {'Authorization': 'Bearer secret'}
+
+        response = self.client.get('/admin/profiles', headers=headers)
+        profiles = response.get_json()['profiles']
+        self.assertEqual(len(profiles), 1)
+
+        response = self.client.get('/admin/profiles/' + profiles[0]['name'], headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertIsInstance(marshal.loads(gzip.decompress(response.data)), dict)
+
+    def test_admin_endpoints_need_the_token(self):
+        self.assertEqual(self.client.get('/admin/profiles').status_code, 403)
+        self.assertEqual(
+            self.client.get('/admin/profiles', headers={'Authorization': 'Bearer wrong'}).status_code, 403
+        )
+        self.assertEqual(
+            self.client.get('/admin/profiles', headers={'Authorization': 'Bearer s\u00e9cret'}).status_code, 403
+        )
+
+    def test_download_only_serves_profiles(self):
+        response = self.client.get('/admin/profiles/..%2Fsettings.py', headers={'Authorization': 'Bearer secret'})
+        self.assertEqual(response.status_code, 404)
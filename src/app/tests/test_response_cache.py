@@ -0,0 +1,112 @@
+from unittest import TestCase
+from chatterbot import ChatBot
+from response_cache import ResponseCache, normalize_input, get_knowledge_base_version, render_cache_metrics
+
+
+class FakeClock(object):
+
+    def __init__(self):
+        self.time = 0
+
+    def __call__(self):
+        return self.time
+
+
+class NormalizeInputTests(TestCase):
+
+    def test_whitespace_and_case(self):
+        self.assertEqual(normalize_input('  Where is   the\tLIBRARY? '), 'where is the library?')
+
+
+class ResponseCacheTests(TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.cache = ResponseCache(2, ttl=60, clock=self.clock)
+
+    def test_get(self):
+        self.cache.set('asdf', 'Sorry', 1)
+
+        self.assertEqual(self.cache.get('asdf', 1), 'Sorry')
+        self.assertIsNone(self.cache.get('map', 1))
+
+    def test_least_recently_used_is_evicted(self):
+        self.cache.set('a', 'A', 1)
+        self.cache.set('b', 'B', 1)
+        self.cache.get('a', 1)
+        self.cache.set('c', 'C', 1)
+
+        self.assertEqual(self.cache.get('a', 1), 'A')
+        self.assertIsNone(self.cache.get('b', 1))
+        self.assertEqual(len(self.cache), 2)
+
+    def test_entries_expire(self):
+        self.cache.set('asdf', 'Sorry', 1)
+        self.clock.time = 59
+
+        self.assertEqual(self.cache.get('asdf', 1), 'Sorry')
+
+        self.clock.time = 60
+
+        self.assertIsNone(self.cache.get('asdf', 1))
+        self.assertEqual(len(self.cache), 0)
+
+    def test_new_version_empties_cache(self):
+        self.cache.set('asdf', 'Sorry', 1)
+
+        self.assertIsNone(self.cache.get('asdf', 2))
+        self.assertEqual(len(self.cache), 0)
+        self.assertIsNone(self.cache.get('asdf', 1))
+
+    def test_size_zero_keeps_nothing(self):
+        cache = ResponseCache(0)
+        cache.set('asdf', 'Sorry', 1)
+
+        self.assertIsNone(cache.get('asdf', 1))
+
+
+class KnowledgeBaseVersionTests(TestCase):
+
+    def test_version_follows_training(self):
+        chatbot = ChatBot('Test Bot', database_uri=None, initialize=False)
+        version = get_knowledge_base_version(chatbot)
+
+        chatbot.knowledge_base_generation = 1
+
+        self.assertNotEqual(get_knowledge_base_version(chatbot), version)
+
+
+class ResponseCacheMetricsTests(TestCase):
+
+    def test_counts(self):
+        cache = ResponseCache(1, name='response')
+        cache.get('map', 1)
+        cache.set('map', 'Sure, what campus?', 1)
+        cache.get('map', 1)
+        cache.set('food', 'In Glasnevin', 1)
+
+        self.assertEqual((cache.hits, cache.misses, cache.evictions), (1, 1, 1))
+        self.assertEqual(cache.get_hit_rate(), 0.5)
+
+    def test_invalidated_entries_are_evictions(self):
+        cache = ResponseCache(10)
+        cache.set('map', 'Sure, what campus?', 1)
+        cache.set('food', 'In Glasnevin', 1)
+
+        cache.get('map', 2)
+
+        self.assertEqual(cache.evictions, 2)
+
+    def test_render(self):
+        response_cache = ResponseCache(10)
+        negative_cache = ResponseCache(10, name='negative')
+        response_cache.set('map', 'Sure, what campus?', 1)
+        response_cache.get('map', 1)
+
+        lines = render_cache_metrics(response_cache, negative_cache)
+
+        self.assertIn('dcubuddy_response_cache_hits_total{cache="response"} 1', lines)
+        self.assertIn('dcubuddy_response_cache_hits_total{cache="negative"} 0', lines)
+        self.assertIn('dcubuddy_response_cache_hit_ratio{cache="response"} 1.0', lines)
+        self.assertIn('dcubuddy_response_cache_entries{cache="response"} 1', lines)
+        self.assertIn('# TYPE dcubuddy_response_cache_misses_total counter', lines)
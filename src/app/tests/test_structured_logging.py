@@ -0,0 +1,113 @@
+import io
+import json
+import logging
+from unittest import TestCase
+from flask import Flask
+import structured_logging
+
+
+class StructuredLoggingTestCase(TestCase):
+
+    def setUp(self):
+        self.root = logging.getLogger()
+        self.handlers = self.root.handlers[:]
+        self.level = self.root.level
+        self.stream = io.StringIO()
+
+    def tearDown(self):
+        structured_logging.stop()
+        for handler in self.root.handlers[:]:
+            self.root.removeHandler(handler)
+        for handler in self.handlers:
+            self.root.addHandler(handler)
+        self.root.setLevel(self.level)
+
+    def get_records(self):
+        structured_logging.stop()
+        return [json.loads(line) for line in self.stream.getvalue().splitlines()]
+
+    def test_json_records(self):
+        structured_logging.configure(level='INFO', log_format='json', stream=self.stream)
+
+        logging.getLogger('chatterbot').info('Using "%s" with a confidence of %s', 'map', 0.9)
+        logging.getLogger('chatterbot').debug('Not written')
+
+        records = self.get_records()
+        self.assertEqual(len(records), 1)
+        self.assertEqual(records[0]['message'], 'Using "map" with a confidence of 0.9')
+        self.assertEqual(records[0]['level'], 'INFO')
+        self.assertEqual(records[0]['logger'], 'chatterbot')
+        self.assertIsNone(records[0]['request_id'])
+
+    def test_exception(self):
+        structured_logging.configure(level='INFO', log_format='json', stream=self.stream)
+
+        try:
+            raise ValueError('bad')
+        except ValueError:
+            logging.getLogger('app').exception('Failed')
+
+        records = self.get_records()
+        self.assertIn('ValueError: bad', records[0]['exception'])
+
+    def test_formatting_is_left_to_the_writer(self):
+        handler = structured_logging.DeferredQueueHandler(None)
+        record = logging.LogRecord('app', logging.INFO, __file__, 1, 'Hello %s', ('there',), None)
+
+        prepared = handler.prepare(record)
+
+        self.assertIs(prepared, record)
+        self.assertEqual(prepared.msg, 'Hello %s')
+        self.assertEqual(prepared.args, ('there',))
+
+    def test_text_records(self):
+        structured_logging.configure(level='INFO', log_format='text', stream=self.stream)
+
+        token = structured_logging.current_request_id.set('abc123')
+        try:
+            logging.getLogger('app').info('Hello %s', 'there')
+        finally:
+            structured_logging.current_request_id.reset(token)
+        structured_logging.stop()
+
+        self.assertIn('INFO app [abc123] Hello there', self.stream.getvalue())
+
+    def test_configure_replaces_existing_handlers(self):
+        handler = logging.StreamHandler(io.StringIO())
+        self.root.addHandler(handler)
+
+        structured_logging.configure(stream=self.stream)
+
+        self.assertEqual(len(self.root.handlers), 1)
+        self.assertIsInstance(self.root.handlers[0], structured_logging.DeferredQueueHandler)
+
+    def test_stop_removes_the_queue(self):
+        structured_logging.configure(stream=self.stream)
+        structured_logging.stop()
+
+        self.assertEqual(self.root.handlers, [])
+
+    def test_request_ids(self):
+        structured_logging.configure(level='INFO', log_format='json', stream=self.stream)
+
+        app = Flask(__name__)
+        structured_logging.init_app(app)
+
+        @app.route('/get')
+        def get_bot_response():
+            logging.getLogger('app').info('Answering')
+            return 'Hello'
+
+        client = app.test_client()
+        generated = client.get('/get')
+        given = client.get('/get', headers={'X-Request-ID': 'load-test-1'})
+        unsafe = client.get('/get', headers={'X-Request-ID': 'x' * 65})
+
+        records = self.get_records()
+        self.assertEqual(
+            [record['request_id'] for record in records],
+            [generated.headers['X-Request-ID'], 'load-test-1', unsafe.headers['X-Request-ID']]
+        )
+        self.assertEqual(len(generated.headers['X-Request-ID']), 32)
+        self.assertEqual(len(unsafe.headers['X-Request-ID']), 32)
+        self.assertIsNone(structured_logging.current_request_id.get())
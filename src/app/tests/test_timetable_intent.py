@@ -0,0 +1,42 @@
+import datetime
+from unittest import TestCase
+from timetable_intent import match_timetable_intent, resolve_weekday, get_timetable_response
+
+
+class MatchTimetableIntentTests(TestCase):
+
+    def test_corpus_phrasings(self):
+        self.assertEqual(match_timetable_intent('timetable tomorrow'), 'tomorrow')
+        self.assertEqual(match_timetable_intent('monday timetable'), 'monday')
+        self.assertEqual(match_timetable_intent('can i have the timetable for wednesday?'), 'wednesday')
+        self.assertEqual(match_timetable_intent('May I have the timetable for Friday?'), 'friday')
+        self.assertEqual(match_timetable_intent('my classes thursday?'), 'thursday')
+        self.assertEqual(match_timetable_intent('class today'), 'today')
+
+    def test_no_day_means_today(self):
+        self.assertEqual(match_timetable_intent('what are my classes?'), 'today')
+        self.assertEqual(match_timetable_intent('whats my next class?'), 'today')
+
+    def test_other_questions_are_not_matched(self):
+        self.assertIsNone(match_timetable_intent('can you show me the map?'))
+        self.assertIsNone(match_timetable_intent('what is the timetable for the library'))
+        self.assertIsNone(match_timetable_intent('!viewassignments'))
+
+    def test_several_days_are_not_matched(self):
+        self.assertIsNone(match_timetable_intent('timetable monday tuesday'))
+
+
+class ResolveWeekdayTests(TestCase):
+
+    def test_named_days(self):
+        self.assertEqual(resolve_weekday('monday'), 1)
+        self.assertEqual(resolve_weekday('friday'), 5)
+
+    def test_relative_days_use_request_time(self):
+        wednesday = datetime.datetime(2022, 3, 2)
+
+        self.assertEqual(resolve_weekday('today', now=wednesday), 3)
+        self.assertEqual(resolve_weekday('tomorrow', now=wednesday), 4)
+
+    def test_response_matches_corpus(self):
+        self.assertEqual(get_timetable_response('monday'), 'Here is your timetable for monday :)')
@@ -0,0 +1,148 @@
+from concurrent.futures import ThreadPoolExecutor
+from unittest import TestCase, mock
+from flask import Flask
+import tracing
+
+
+class TracingDisabledTestCase(TestCase):
+
+    def setUp(self):
+        patchers = [
+            mock.patch.object(tracing, 'enabled', False),
+            mock.patch.dict(tracing.histograms, clear=True),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_span_does_nothing(self):
+        with tracing.span('search') as span:
+            pass
+
+        self.assertIs(span, tracing.NULL_SPAN)
+        self.assertEqual(tracing.histograms, {})
+
+    def test_traced_returns_the_function(self):
+        def function():
+            pass
+
+        self.assertIs(tracing.traced('stage')(function), function)
+        self.assertIs(tracing.bind(function), function)
+
+    def test_init_app_only_adds_metrics(self):
+        app = Flask(__name__)
+        app.route('/get')(lambda: 'Hello')
+        tracing.init_app(app)
+        client = app.test_client()
+
+        with mock.patch.object(tracing, 'metric_renderers', [lambda: ['dcubuddy_response_cache_size 1']]):
+            metrics = client.get('/metrics').get_data(as_text=True)
+
+        self.assertNotIn('Server-Timing', client.get('/get').headers)
+        self.assertIn('dcubuddy_response_cache_size 1', metrics)
+
+
+class TracingTestCase(TestCase):
+
+    def setUp(self):
+        patchers = [
+            mock.patch.object(tracing, 'enabled', True),
+            mock.patch.dict(tracing.histograms, clear=True),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_span_is_added_to_histogram(self):
+        with mock.patch('tracing.time.perf_counter', side_effect=[1.0, 1.003]):
+            with tracing.span('search'):
+                pass
+
+        counts, count, total = tracing.histograms['search'].snapshot()
+        self.assertEqual(count, 1)
+        self.assertAlmostEqual(total, 0.003)
+        self.assertEqual(counts[:3], [0, 0, 1])
+        self.assertEqual(counts[-1], 1)
+
+    def test_span_is_added_to_current_trace(self):
+        token = tracing.start_trace()
+        try:
+            with tracing.span('filter'):
+                pass
+            trace = tracing.current_trace.get()
+        finally:
+            tracing.current_trace.reset(token)
+
+        self.assertEqual([stage for stage, _ in trace], ['filter'])
+
+    def test_span_records_when_an_exception_is_raised(self):
+        with self.assertRaises(ValueError):
+            with tracing.span('command'):
+                raise ValueError()
+
+        self.assertEqual(tracing.histograms['command'].count, 1)
+
+    def test_traced_function(self):
+        @tracing.traced('get_weeks')
+        def get_weeks():
+            return [1, 2]
+
+        self.assertEqual(get_weeks(), [1, 2])
+        self.assertEqual(get_weeks.__name__, 'get_weeks')
+        self.assertEqual(tracing.histograms['get_weeks'].count, 1)
+
+    def test_bind_records_spans_from_another_thread(self):
+        @tracing.traced('request_events')
+        def request_events():
+            return 'events'
+
+        token = tracing.start_trace()
+        try:
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                result = executor.submit(tracing.bind(request_events)).result()
+            trace = tracing.current_trace.get()
+        finally:
+            tracing.current_trace.reset(token)
+
+        self.assertEqual(result, 'events')
+        self.assertEqual([stage for stage, _ in trace], ['request_events'])
+
+    def test_server_timing_adds_up_repeated_stages(self):
+        header = tracing.get_server_timing([('filter', 0.001), ('search', 0.0125), ('filter', 0.002)])
+
+        self.assertEqual(header, 'filter;dur=3.0, search;dur=12.5')
+
+    def test_flask_app(self):
+        app = Flask(__name__)
+        tracing.init_app(app)
+
+        @app.route('/get')
+        def get_bot_response():
+            with tracing.span('search'):
+                pass
+            return 'Hello'
+
+        client = app.test_client()
+        response = client.get('/get')
+
+        self.assertEqual(response.get_data(as_text=True), 'Hello')
+        stages = [
+            timing.split(';')[0] for timing in response.headers['Server-Timing'].split(', ')
+        ]
+        self.assertEqual(stages, ['search', 'total'])
+
+        metrics = client.get('/metrics').get_data(as_text=True)
+        self.assertIn('# TYPE dcubuddy_stage_duration_seconds histogram', metrics)
+        self.assertIn('dcubuddy_stage_duration_seconds_bucket{stage="search",le="+Inf"} 1', metrics)
+        self.assertIn('dcubuddy_stage_duration_seconds_count{stage="total"} 1', metrics)
+
+        # Spans outside a request are only added to the histograms
+        self.assertIsNone(tracing.current_trace.get())
+
+    def test_registered_metrics(self):
+        with mock.patch.object(tracing, 'metric_renderers', []):
+            tracing.register_metrics(lambda: ['dcubuddy_response_cache_hits_total{cache="response"} 3'])
+
+            metrics = tracing.render_metrics()
+
+        self.assertTrue(metrics.endswith('dcubuddy_response_cache_hits_total{cache="response"} 3\n'))
@@ -0,0 +1,104 @@
+from unittest import TestCase, mock
+from chatterbot.conversation import Statement
+from trigram_search import TrigramIndex, TrigramSearch, get_trigrams
+from search_all_adapter import SearchMatch
+from tests.base_case import ChatBotTestCase
+
+
+class TrigramTests(TestCase):
+
+    def test_trigrams_are_padded(self):
+        self.assertEqual(get_trigrams('Map!'), {' ma', 'map', 'ap '})
+
+    def test_no_trigrams(self):
+        self.assertEqual(get_trigrams('?!'), set())
+
+
+class TrigramIndexTests(TestCase):
+
+    def setUp(self):
+        self.index = TrigramIndex()
+        self.index.add(Statement(id=1, text='timetable today'))
+        self.index.add(Statement(id=2, text='can i have the timetable for today?'))
+        self.index.add(Statement(id=3, text='where is the library?'))
+
+    def test_candidates_ranked_by_jaccard(self):
+        self.assertEqual(self.index.candidates('timetabel today'), [1, 2])
+
+    def test_candidates_limit(self):
+        self.assertEqual(self.index.candidates('timetabel today', limit=1), [1])
+
+    def test_no_candidates(self):
+        self.assertEqual(self.index.candidates('xyz'), [])
+
+    def test_remove(self):
+        self.index.remove(1)
+
+        self.assertEqual(self.index.candidates('timetabel today'), [2])
+        self.assertEqual(len(self.index), 2)
+
+
+class TrigramSearchTests(ChatBotTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.search_algorithm = TrigramSearch(self.chatbot)
+        self.chatbot.storage.create_many([
+            Statement(text='food', search_text='NN:food', tags=['food']),
+            Statement(text='where can i get food?', search_text='VB:get NN:food', tags=['food']),
+            Statement(text='Sure, what campus?', search_text='what:campus', persona='bot:DCUBuddy'),
+            Statement(text='timetable for monday', search_text='NN:timetable IN:monday', tags=['timetable']),
+        ])
+
+    def test_misspelled_input(self):
+        results = list(self.search_algorithm.search(Statement(text='were can i get fud?')))
+
+        self.assertEqual(results[-1].text, 'where can i get food?')
+
+    def test_input_is_not_tagged(self):
+        with mock.patch.object(self.chatbot.storage.tagger, 'get_bigram_pair_string') as tag:
+            list(self.search_algorithm.search(Statement(text='timetabel for mondy')))
+
+        tag.assert_not_called()
+
+    def test_search_excludes_bot_statements(self):
+        results = list(self.search_algorithm.search(Statement(text='Sure, what campus?')))
+
+        self.assertNotIn('Sure, what campus?', [result.text for result in results])
+
+    def test_max_candidates(self):
+        search_algorithm = TrigramSearch(self.chatbot, max_candidates=1)
+
+        with mock.patch.object(search_algorithm, 'compare_statements', return_value=0.5) as compare:
+            list(search_algorithm.search(Statement(text='food')))
+
+        self.assertEqual(compare.call_count, 1)
+
+    def test_search_match_uses_search_algorithm(self):
+        adapter = SearchMatch(
+            self.chatbot,
+            search_algorithm='trigram_search.TrigramSearch'
+        )
+
+        self.assertIsInstance(adapter.search_algorithm, TrigramSearch)
+        self.assertEqual(adapter.search_algorithm.max_candidates, 10)
+
+
+class TrigramSearchInMemoryTests(TrigramSearchTests):
+    """
+    The same tests with the statements kept in memory.
+    """
+
+    def get_kwargs(self):
+        kwargs = super().get_kwargs()
+        kwargs['storage_adapter'] = 'memory_storage.InMemoryStorageAdapter'
+        kwargs['backing_storage_adapter'] = 'chatterbot.storage.SQLStorageAdapter'
+        return kwargs
+
+    def test_new_statements_are_indexed(self):
+        self.search_algorithm.build()
+        self.chatbot.storage.create(text='where is the library', search_text='NN:library')
+
+        results = list(self.search_algorithm.search(Statement(text='were is the libary')))
+
+        self.assertEqual(results[-1].text, 'where is the library')
@@ -2,6 +2,8 @@ import requests
 import json
 import logging
 import datetime
+import settings
+import tracing
 from resources.course_identities import identities
 
 global HEADERS
@@ -13,6 +15,8 @@ HEADERS = {
     "Origin" : "https://opentimetable.dcu.ie/"
 }
 
+BROKER_URL = settings.OPENTIMETABLE_URL + "/broker/api"
+
 
 def parse_date(date_str):
     year = int(date_str[:4])
@@ -33,11 +37,12 @@ def get_start_week(week_lis, week):
         i += 1
     return curr
 
+@tracing.traced('get_weeks')
 def get_weeks(): 
     """
         Gets the available weeks from opentimetables
     """
-    res = requests.get("https://opentimetable.dcu.ie/broker/api/viewOptions", headers=HEADERS)
+    res = requests.get(BROKER_URL + "/viewOptions", headers=HEADERS)
     weeks = json.loads(res.text)['Weeks']
     week_lis = []
     for i in range(len(weeks)):
@@ -67,11 +72,12 @@ def build_template(template, course_code, weekstart, weekday):
     template['ViewOptions']['Weeks'][0]['FirstDayInWeek'] = weekstart
     return template
 
+@tracing.traced('request_events')
 def request_events(course_code, data):
     """
         Getting a response from website
     """
-    res = requests.post("https://opentimetable.dcu.ie/broker/api/categoryTypes/241e4d36-60e0-49f8-b27e-99416745d98d/categories/events/filter", json=data, headers=HEADERS)
+    res = requests.post(BROKER_URL + "/categoryTypes/241e4d36-60e0-49f8-b27e-99416745d98d/categories/events/filter", json=data, headers=HEADERS)
     if res.status_code != 200:
         logging.critical("Unable to get request for course with code: %s", course_code)
         return("Unable to access timetable.")
@@ -107,22 +113,23 @@ def get_timetable(course, weekday, week):
     template = load_template()
     required_data = build_template(template, course_code, weekstart, weekday)
     ongoing = request_events(course_code, required_data)
-    classes = []
-    for event in ongoing:
-      tmp = {}
-      module_name = event['ExtraProperties'][0]['Value']
-      event_type = event['EventType']
-      location = event['Location']
-      start = event['StartDateTime'].split("T")[1][:5]
-      end = event['EndDateTime'].split("T")[1][:5]
-      tmp['name'] = module_name
-      tmp['event_type'] = event_type
-      tmp['location'] = location
-      tmp['start'] = start
-      tmp['end'] = end
-      classes.append(tmp)
+    with tracing.span('render_timetable'):
+        classes = []
+        for event in ongoing:
+          tmp = {}
+          module_name = event['ExtraProperties'][0]['Value']
+          event_type = event['EventType']
+          location = event['Location']
+          start = event['StartDateTime'].split("T")[1][:5]
+          end = event['EndDateTime'].split("T")[1][:5]
+          tmp['name'] = module_name
+          tmp['event_type'] = event_type
+          tmp['location'] = location
+          tmp['start'] = start
+          tmp['end'] = end
+          classes.append(tmp)
 
 
-    classes.sort(key=lambda x:x['start'])
-    all_cls = to_string(classes)
+        classes.sort(key=lambda x:x['start'])
+        all_cls = to_string(classes)
     return all_cls
@@ -0,0 +1,71 @@
+"""
+Recognises timetable requests such as "timetable tomorrow" or "can i have
+the timetable for monday?" without going through the chatbot, so the
+timetable can be fetched straight away.
+"""
+import re
+import datetime
+
+
+WORD_PATTERN = re.compile(r"[a-z']+")
+
+TIMETABLE_WORDS = frozenset([
+    'timetable', 'class', 'classes', 'lecture', 'lectures',
+])
+
+DAYS = {
+    'monday': 1,
+    'tuesday': 2,
+    'wednesday': 3,
+    'thursday': 4,
+    'friday': 5,
+}
+
+RELATIVE_DAYS = frozenset(['today', 'tomorrow'])
+
+# Words that can appear around a timetable request without changing its meaning
+FILLER_WORDS = frozenset([
+    'can', 'could', 'may', 'i', 'have', 'see', 'get', 'show', 'me', 'give',
+    'the', 'my', 'for', 'on', 'of', 'what', 'whats', "what's", 'is', 'are',
+    'next', 'please',
+])
+
+
+def match_timetable_intent(text):
+    """
+        Returns the day asked for if the text is a timetable request, otherwise None
+    """
+    words = WORD_PATTERN.findall(text.lower())
+
+    if TIMETABLE_WORDS.isdisjoint(words):
+        return None
+
+    days = []
+    for word in words:
+        if word in DAYS or word in RELATIVE_DAYS:
+            days.append(word)
+        elif word not in TIMETABLE_WORDS and word not in FILLER_WORDS:
+            return None
+
+    if len(days) > 1:
+        return None
+
+    # "what are my classes?" is answered with today's timetable
+    return days[0] if days else 'today'
+
+
+def resolve_weekday(day, now=None):
+    """
+        Converts a day name to the weekday number used by fetch_timetable,
+        today and tomorrow are worked out when the request is made
+    """
+    now = now or datetime.datetime.now()
+    if day == 'today':
+        return now.isoweekday() % 6
+    if day == 'tomorrow':
+        return (now.isoweekday() % 6) + 1
+    return DAYS[day]
+
+
+def get_timetable_response(day):
+    return "Here is your timetable for {} :)".format(day)
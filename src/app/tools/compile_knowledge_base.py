@@ -0,0 +1,33 @@
+"""
+Compiles the training corpus into a versioned, read-only knowledge base
+for the 'prebuilt' knowledge base mode. Run from src/app:
+
+    python -m tools.compile_knowledge_base --output artifacts
+    python -m tools.compile_knowledge_base --info artifacts/knowledge_base-<version>.sqlite3
+"""
+import os
+import argparse
+from knowledge_base import compile_knowledge_base, read_metadata
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compile the DCUBuddy knowledge base')
+    parser.add_argument('corpus', nargs='*', default=['../training_data/'])
+    parser.add_argument('--output', default='.', help='directory the artifact is written to')
+    parser.add_argument('--workers', type=int, default=None, help='tagging processes')
+    parser.add_argument('--info', metavar='ARTIFACT', help='print the metadata of an artifact')
+    args = parser.parse_args()
+
+    if args.info:
+        for key, value in sorted(read_metadata(args.info).items()):
+            print('{}: {}'.format(key, value))
+        return
+
+    os.makedirs(args.output, exist_ok=True)
+
+    path = compile_knowledge_base(args.corpus, args.output, workers=args.workers)
+    print('Compiled {}'.format(path))
+
+
+if __name__ == '__main__':
+    main()
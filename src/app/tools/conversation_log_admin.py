@@ -0,0 +1,49 @@
+"""
+Tool for managing the conversation log kept by the 'conversation_log'
+knowledge base mode. Run from src/app:
+
+    python -m tools.conversation_log_admin archive
+    python -m tools.conversation_log_admin promote --contains "library hours"
+"""
+import argparse
+from chatterbot.storage import SQLStorageAdapter
+from conversation_log import ConversationLog, archive_learned_statements, promote_statements
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Manage the DCUBuddy conversation log')
+    parser.add_argument('--database-uri', default='sqlite:///database.sqlite3')
+    parser.add_argument('--directory', default=None, help='conversation log directory')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    subparsers.add_parser(
+        'archive',
+        help='move learned statements out of the statement table into the log'
+    )
+
+    promote = subparsers.add_parser(
+        'promote',
+        help='add logged statements to the searchable knowledge base'
+    )
+    promote.add_argument('--contains', required=True, help='promote statements containing this text')
+
+    args = parser.parse_args()
+
+    storage = SQLStorageAdapter(database_uri=args.database_uri)
+    conversation_log = ConversationLog(directory=args.directory)
+
+    if args.command == 'archive':
+        count = archive_learned_statements(storage, conversation_log)
+        print('Archived {} statements'.format(count))
+    else:
+        contains = args.contains.lower()
+        records = [
+            record for record in conversation_log.read()
+            if contains in record['text'].lower()
+        ]
+        count = promote_statements(storage, records)
+        print('Promoted {} statements'.format(count))
+
+
+if __name__ == '__main__':
+    main()
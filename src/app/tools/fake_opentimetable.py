@@ -0,0 +1,189 @@
+"""
+A local stand-in for the opentimetable.dcu.ie broker API, so the timetable
+path can be load tested and benchmarked offline. Run from src/app:
+
+    python -m tools.fake_opentimetable --port 8001 --latency 0.3 --error-rate 0.01
+    DCUBUDDY_OPENTIMETABLE_URL=http://localhost:8001 python app.py
+
+It serves the three endpoints used by timetable.py and
+tools/map_course_identities.py from JSON fixtures:
+
+    viewOptions.json                    GET  viewOptions
+    events/<identity>-<day>.json        POST categoryTypes/<type>/categories/events/filter
+    events/default.json                 ... for courses without their own fixture
+    categories/page-<number>.json       POST CategoryTypes/<type>/Categories/Filter
+
+Weeks and course identities that have no fixture are generated from the
+current date and resources/course_identities.py.
+
+With --record the requests are sent to the real broker instead, and its
+responses are saved as fixtures before being returned:
+
+    python -m tools.fake_opentimetable --record https://opentimetable.dcu.ie
+"""
+import os
+import json
+import time
+import random
+import argparse
+import datetime
+import logging
+import requests
+from flask import Flask, Response, request
+from resources.course_identities import identities
+from timetable import HEADERS
+
+
+FIXTURE_DIRECTORY = os.path.join(os.path.dirname(__file__), 'fixtures', 'opentimetable')
+
+CATEGORIES_PAGE_SIZE = 20
+
+
+def load_fixture(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r') as fixture_file:
+        return json.load(fixture_file)
+
+
+def save_fixture(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as fixture_file:
+        json.dump(data, fixture_file, indent=2)
+
+
+def generate_view_options(today=None):
+    """
+        Weeks starting on the Mondays from a month ago to twenty weeks ahead
+    """
+    today = today or datetime.date.today()
+    monday = today - datetime.timedelta(days=today.weekday())
+    weeks = []
+    for number in range(-4, 21):
+        first_day = monday + datetime.timedelta(weeks=number)
+        weeks.append({
+            'WeekNumber': number + 5,
+            'WeekLabel': 'Week {}'.format(number + 5),
+            'FirstDayInWeek': first_day.isoformat() + 'T00:00:00.000Z'
+        })
+    return {'Weeks': weeks}
+
+
+def generate_categories_page(page_number):
+    names = sorted(identities)
+    total_pages = (len(names) + CATEGORIES_PAGE_SIZE - 1) // CATEGORIES_PAGE_SIZE
+    start = (page_number - 1) * CATEGORIES_PAGE_SIZE
+    return {
+        'TotalPages': total_pages,
+        'CurrentPage': page_number,
+        'Results': [
+            {'Name': name, 'Identity': identities[name]}
+            for name in names[start:start + CATEGORIES_PAGE_SIZE]
+        ]
+    }
+
+
+def get_events_key(data):
+    identity = data['CategoryIdentities'][0]
+    day = data['ViewOptions']['Days'][0]['DayOfWeek']
+    return '{}-{}'.format(identity, day)
+
+
+def create_app(fixture_directory=FIXTURE_DIRECTORY, latency=0, latency_jitter=0,
+               error_rate=0, payload_scale=1, record_from=None, seed=None):
+    """
+        Creates the fake broker, latency is in seconds and payload_scale
+        repeats the events of each response that many times
+    """
+    app = Flask(__name__)
+    randomness = random.Random(seed)
+
+    def record(fixture_path):
+        response = requests.request(
+            request.method,
+            record_from.rstrip('/') + request.full_path.rstrip('?'),
+            data=request.get_data(),
+            headers=HEADERS
+        )
+        if response.status_code != 200:
+            return Response(response.content, status=response.status_code, content_type='application/json')
+        data = response.json()
+        save_fixture(fixture_path, data)
+        return data
+
+    @app.before_request
+    def simulate_network():
+        delay = latency + randomness.uniform(-latency_jitter, latency_jitter)
+        if delay > 0:
+            time.sleep(delay)
+        if error_rate and randomness.random() < error_rate:
+            return Response('{"Message": "Simulated error"}', status=503, content_type='application/json')
+
+    @app.route('/broker/api/viewOptions', methods=['GET'])
+    def view_options():
+        fixture_path = os.path.join(fixture_directory, 'viewOptions.json')
+        if record_from:
+            return record(fixture_path)
+        return load_fixture(fixture_path) or generate_view_options()
+
+    @app.route('/broker/api/categoryTypes/<category_type>/categories/events/filter', methods=['POST'])
+    def events(category_type):
+        fixture_path = os.path.join(
+            fixture_directory, 'events', get_events_key(request.get_json(force=True)) + '.json'
+        )
+        if record_from:
+            return record(fixture_path)
+
+        data = load_fixture(fixture_path) or load_fixture(
+            os.path.join(fixture_directory, 'events', 'default.json')
+        )
+        if data is None:
+            return Response('{"Message": "No fixture"}', status=404, content_type='application/json')
+
+        if payload_scale != 1:
+            for category in data:
+                category['CategoryEvents'] = category['CategoryEvents'] * payload_scale
+        return Response(json.dumps(data), content_type='application/json')
+
+    @app.route('/broker/api/CategoryTypes/<category_type>/Categories/Filter', methods=['POST'])
+    def categories(category_type):
+        page_number = int(request.args.get('pageNumber', 1))
+        fixture_path = os.path.join(
+            fixture_directory, 'categories', 'page-{}.json'.format(page_number)
+        )
+        if record_from:
+            return record(fixture_path)
+        return load_fixture(fixture_path) or generate_categories_page(page_number)
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run a local stand-in for the opentimetable broker')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8001)
+    parser.add_argument('--fixtures', default=FIXTURE_DIRECTORY, help='fixture directory')
+    parser.add_argument('--latency', type=float, default=0, help='seconds added to every response')
+    parser.add_argument('--latency-jitter', type=float, default=0, help='random +/- seconds of latency')
+    parser.add_argument('--error-rate', type=float, default=0, help='fraction of requests that fail with 503')
+    parser.add_argument('--payload-scale', type=int, default=1, help='repeat each response\'s events this many times')
+    parser.add_argument('--record', metavar='URL', help='save the responses of this broker as fixtures')
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    app = create_app(
+        fixture_directory=args.fixtures,
+        latency=args.latency,
+        latency_jitter=args.latency_jitter,
+        error_rate=args.error_rate,
+        payload_scale=args.payload_scale,
+        record_from=args.record,
+        seed=args.seed
+    )
+    app.run(host=args.host, port=args.port, threaded=True)
+
+
+if __name__ == '__main__':
+    main()
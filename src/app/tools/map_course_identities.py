@@ -2,6 +2,7 @@ import requests
 import json
 import logging
 from functools import reduce
+from timetable import HEADERS, BROKER_URL
 
 '''Tool for fetching identities for course codes and for mapping them to their
 respective course code'''
@@ -11,7 +12,7 @@ def request_course_identities():
         "Identity": "6359fd0c-1bbe-496a-8998-4fefc5cd18de",
         "Values": ["null"]
     }
-    res = requests.post("https://opentimetable.dcu.ie/broker/api/CategoryTypes/241e4d36-60e0-49f8-b27e-99416745d98d/Categories/Filter?pageNumber=1", json=required_data, headers=HEADERS)
+    res = requests.post(BROKER_URL + "/CategoryTypes/241e4d36-60e0-49f8-b27e-99416745d98d/Categories/Filter?pageNumber=1", json=required_data, headers=HEADERS)
     d = json.loads(res.text)
 
     results = []
@@ -21,7 +22,7 @@ def request_course_identities():
     logging.info('Found %s total pages', total_pages)
     for i in range(2, total_pages + 1):
         logging.debug("retrieving identities for course modules - %s", i)
-        res = requests.post("https://opentimetable.dcu.ie/broker/api/CategoryTypes/241e4d36-60e0-49f8-b27e-99416745d98d/Categories/Filter?pageNumber="+str(i), json=required_data, headers=HEADERS)
+        res = requests.post(BROKER_URL + "/CategoryTypes/241e4d36-60e0-49f8-b27e-99416745d98d/Categories/Filter?pageNumber="+str(i), json=required_data, headers=HEADERS)
         if res.status_code != 200:
             logging.critical("Could not load page %s! Not all identities may have been captured", i)
         d = json.loads(res.text)
@@ -0,0 +1,219 @@
+"""
+Per-stage timing of the chat request path.
+
+Code marks the stages of a request with ``span``:
+
+    with tracing.span('search'):
+        ...
+
+Each finished span is added to a histogram of its stage's durations and to
+the trace of the current request. ``init_app`` starts a trace for every
+request and sends it back in a ``Server-Timing`` header. It also serves the
+histograms at ``/metrics`` in the Prometheus text format, followed by the
+metrics of any function given to ``register_metrics``.
+
+Tracing is switched on with ``settings.TRACING_ENABLED``. When it is off,
+``span`` returns a shared context manager that does nothing and ``traced``
+and ``bind`` return the function they are given, so instrumented code only
+pays for a function call. ``/metrics`` is served either way, without stage
+durations when tracing is off.
+"""
+import time
+import threading
+import functools
+import contextvars
+from contextlib import contextmanager
+import settings
+
+
+# Upper bounds in seconds of the histogram buckets
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+enabled = settings.TRACING_ENABLED
+
+# The (stage, duration) pairs recorded while handling the current request
+current_trace = contextvars.ContextVar('current_trace', default=None)
+
+
+class Histogram(object):
+    """
+    Counts of durations in cumulative buckets, like a Prometheus histogram.
+    """
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, duration):
+        with self._lock:
+            self.count += 1
+            self.sum += duration
+            for index, bound in enumerate(self.buckets):
+                if duration <= bound:
+                    self.counts[index] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return list(self.counts), self.count, self.sum
+
+
+histograms = {}
+histograms_lock = threading.Lock()
+
+# Functions returning more lines of metrics for /metrics
+metric_renderers = []
+
+
+def get_histogram(stage):
+    histogram = histograms.get(stage)
+    if histogram is None:
+        with histograms_lock:
+            histogram = histograms.setdefault(stage, Histogram())
+    return histogram
+
+
+def record(stage, duration):
+    get_histogram(stage).observe(duration)
+
+    trace = current_trace.get()
+    if trace is not None:
+        trace.append((stage, duration))
+
+
+class NullSpan(object):
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+NULL_SPAN = NullSpan()
+
+
+@contextmanager
+def timed_span(stage):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(stage, time.perf_counter() - start)
+
+
+def span(stage):
+    """
+        Times the code in a with block as one stage of the request
+    """
+    if not enabled:
+        return NULL_SPAN
+    return timed_span(stage)
+
+
+def traced(stage):
+    """
+        Decorator timing every call of a function as a stage
+    """
+    def decorator(function):
+        if not enabled:
+            return function
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with timed_span(stage):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def bind(function):
+    """
+        Makes a function record its spans in the current request's trace
+        when it is called on another thread, such as an executor's
+    """
+    if not enabled:
+        return function
+    return functools.partial(contextvars.copy_context().run, function)
+
+
+def start_trace():
+    return current_trace.set([])
+
+
+def get_server_timing(trace):
+    """
+        Formats a trace as a Server-Timing header, adding up repeated stages
+    """
+    totals = {}
+    for stage, duration in trace:
+        totals[stage] = totals.get(stage, 0) + duration
+    return ', '.join(
+        '{};dur={:.1f}'.format(stage, 1000 * duration) for stage, duration in totals.items()
+    )
+
+
+def render_metrics():
+    """
+        Formats the histograms in the Prometheus text exposition format
+    """
+    lines = [
+        '# HELP dcubuddy_stage_duration_seconds Time spent in each stage of the chat request path',
+        '# TYPE dcubuddy_stage_duration_seconds histogram',
+    ]
+    for stage in sorted(histograms):
+        histogram = histograms[stage]
+        counts, count, total = histogram.snapshot()
+        for bound, bucket_count in zip(histogram.buckets, counts):
+            lines.append('dcubuddy_stage_duration_seconds_bucket{{stage="{}",le="{}"}} {}'.format(
+                stage, bound, bucket_count
+            ))
+        lines.append('dcubuddy_stage_duration_seconds_bucket{{stage="{}",le="+Inf"}} {}'.format(stage, count))
+        lines.append('dcubuddy_stage_duration_seconds_sum{{stage="{}"}} {}'.format(stage, total))
+        lines.append('dcubuddy_stage_duration_seconds_count{{stage="{}"}} {}'.format(stage, count))
+    for render in metric_renderers:
+        lines.extend(render())
+    return '\n'.join(lines) + '\n'
+
+
+def register_metrics(render):
+    """
+        Adds the lines of Prometheus metrics returned by render to /metrics
+    """
+    metric_renderers.append(render)
+
+
+def init_app(app):
+    """
+        Adds the /metrics endpoint to a Flask app and traces every request
+        when tracing is on
+    """
+    from flask import Response, g
+
+    @app.route('/metrics')
+    def metrics():
+        return Response(render_metrics(), content_type='text/plain; version=0.0.4')
+
+    if not enabled:
+        return
+
+    @app.before_request
+    def begin_request_trace():
+        g.trace_token = start_trace()
+        g.trace_start = time.perf_counter()
+
+    @app.after_request
+    def add_server_timing(response):
+        trace = current_trace.get()
+        if trace is not None:
+            record('total', time.perf_counter() - g.trace_start)
+            response.headers['Server-Timing'] = get_server_timing(trace)
+        return response
+
+    @app.teardown_request
+    def end_request_trace(exception=None):
+        token = g.pop('trace_token', None)
+        if token is not None:
+            current_trace.reset(token)
@@ -0,0 +1,116 @@
+"""
+A search algorithm that finds candidates by the character trigrams they share
+with the input, so misspelled words still find the statements they were
+meant to match.
+
+``IndexedTextSearch`` and ``InvertedIndexSearch`` match the lemma bigrams
+spaCy tags the input with. A typo such as "timetabel" or "glasnevn" gives a
+different lemma, so nothing is found and the input gets the default
+response. Most of a misspelled word's trigrams are still right, and the
+index is searched without running spaCy at all.
+"""
+import re
+from array import array
+from collections import Counter
+from inverted_index_search import InvertedIndexSearch
+
+
+NON_WORD_PATTERN = re.compile(r'[\W_]+')
+
+
+def get_trigrams(text):
+    """
+        Gets the set of character trigrams of the lowercased words of a text,
+        with each text padded by a space so first and last letters count too
+    """
+    words = NON_WORD_PATTERN.sub(' ', text.lower()).strip()
+
+    if not words:
+        return set()
+
+    padded = ' {} '.format(words)
+    return {padded[position:position + 3] for position in range(len(padded) - 2)}
+
+
+class TrigramIndex(object):
+    """
+    An inverted index from each character trigram of a statement's ``text``
+    to a compact array of the ids of the statements containing it.
+    """
+
+    def __init__(self):
+        self.postings = {}
+        self.statements = {}
+        self.sizes = {}
+
+    def __len__(self):
+        return len(self.statements)
+
+    def add(self, statement):
+        trigrams = get_trigrams(statement.text or '')
+
+        self.statements[statement.id] = statement
+        self.sizes[statement.id] = len(trigrams)
+
+        for trigram in trigrams:
+            self.postings.setdefault(trigram, array('I')).append(statement.id)
+
+    def remove(self, statement_id):
+        statement = self.statements.pop(statement_id, None)
+
+        if statement is None:
+            return
+
+        del self.sizes[statement_id]
+
+        for trigram in get_trigrams(statement.text or ''):
+            ids = self.postings.get(trigram)
+            if ids is not None and statement_id in ids:
+                ids.remove(statement_id)
+
+    def candidates(self, text, limit=None):
+        """
+        Return the ids of statements sharing a trigram with the text,
+        ordered by the Jaccard similarity of their trigram sets.
+        """
+        trigrams = get_trigrams(text)
+        overlap = Counter()
+
+        for trigram in trigrams:
+            overlap.update(self.postings.get(trigram, ()))
+
+        def jaccard(item):
+            statement_id, shared = item
+            return shared / (len(trigrams) + self.sizes[statement_id] - shared)
+
+        ranked = sorted(overlap.items(), key=lambda item: (-jaccard(item), item[0]))
+
+        return [statement_id for statement_id, _ in ranked[:limit]]
+
+
+class TrigramSearch(InvertedIndexSearch):
+    """
+    A search algorithm that ranks statements by the Jaccard similarity of
+    their character trigrams to the input's, and only compares the best
+    ranked ones with the statement comparison function.
+
+    The index is kept in memory and up to date like ``InvertedIndexSearch``'s.
+
+    :param statement_comparison_function: The dot-notated import path
+        to a statement comparison function.
+        Defaults to ``LevenshteinDistance``.
+
+    :param max_candidates: The number of best ranked candidates that are
+        compared with the input. Defaults to 10.
+    """
+
+    name = 'trigram_search'
+
+    index_class = TrigramIndex
+
+    def __init__(self, chatbot, **kwargs):
+        kwargs.setdefault('max_candidates', 10)
+        super().__init__(chatbot, **kwargs)
+
+    def get_search_key(self, input_statement):
+        return input_statement.text or ''